@@ -0,0 +1,69 @@
+"""normalize patient phones and add phone_reversed
+
+Revision ID: 5d2b7e9a1c40
+Revises: c4e8a1f05b3d
+Create Date: 2026-10-18 14:00:00.000000
+
+Rewrites patients.phone into the normalized "+<country code><number>" form
+and fills phone_reversed, in batches by id.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.phone import normalize_phone, phone_digits_reversed
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b7e9a1c40'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a1f05b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+patients = sa.table(
+    "patients",
+    sa.column("id", sa.Integer),
+    sa.column("phone", sa.String),
+    sa.column("phone_reversed", sa.String),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "phone_reversed" not in {c["name"] for c in inspector.get_columns("patients")}:
+        op.add_column("patients", sa.Column("phone_reversed", sa.String(length=20), nullable=True))
+    if "ix_patients_phone_reversed" not in {ix["name"] for ix in inspector.get_indexes("patients")}:
+        op.create_index("ix_patients_phone_reversed", "patients", ["phone_reversed"])
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(patients.c.id, patients.c.phone)
+            .where(patients.c.id > last_id)
+            .order_by(patients.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for patient_id, phone in rows:
+            normalized = normalize_phone(phone)
+            bind.execute(
+                patients.update()
+                .where(patients.c.id == patient_id)
+                .values(phone=normalized, phone_reversed=phone_digits_reversed(normalized))
+            )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    Phone numbers stay in normalized form; only the reversed column goes.
+    """
+    op.drop_index("ix_patients_phone_reversed", table_name="patients")
+    op.drop_column("patients", "phone_reversed")
@@ -0,0 +1,62 @@
+"""add indexes for hot query predicates
+
+Revision ID: 9b1f6c2d4e7a
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+The base schema comes from migration.sql / create_all; this revision only
+adds secondary indexes, skipping any that create_all already built.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1f6c2d4e7a'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns, foreign key column the index can back on MySQL)
+INDEXES = [
+    ("ix_doctors_status", "doctors", ["status"], None),
+    ("ix_patients_phone", "patients", ["phone"], None),
+    ("ix_doctor_schedules_doctor_id", "doctor_schedules", ["doctor_id"], "doctor_id"),
+    ("ix_appointments_doctor_date", "appointments", ["doctor_id", "appointment_date"], "doctor_id"),
+    ("ix_appointments_patient_date", "appointments", ["patient_id", "appointment_date", "doctor_id"], "patient_id"),
+    ("ix_appointments_schedule_date", "appointments", ["schedule_id", "appointment_date", "appointment_time"], "schedule_id"),
+    ("ix_appointments_status_doctor", "appointments", ["status", "doctor_id"], None),
+    ("ix_appointments_date", "appointments", ["appointment_date"], None),
+    ("ix_prescriptions_patient_created", "prescriptions", ["patient_id", "created_at"], "patient_id"),
+    ("ix_prescriptions_created_at", "prescriptions", ["created_at"], None),
+    ("ix_medicines_name", "medicines", ["name"], None),
+    ("ix_prescription_medicines_prescription_id", "prescription_medicines", ["prescription_id"], "prescription_id"),
+    ("ix_prescription_medicines_medicine_id", "prescription_medicines", ["medicine_id"], "medicine_id"),
+]
+
+
+def _existing(table: str) -> set:
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns, _ in INDEXES:
+        if name not in _existing(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    mysql = op.get_bind().dialect.name == "mysql"
+    for name, table, columns, fk_column in reversed(INDEXES):
+        if name not in _existing(table):
+            continue
+        if mysql and fk_column and fk_column not in _existing(table):
+            # MySQL dropped the implicit foreign key index when this one was
+            # created and refuses to drop the last index backing the key
+            op.create_index(fk_column, table, [fk_column])
+        op.drop_index(name, table_name=table)
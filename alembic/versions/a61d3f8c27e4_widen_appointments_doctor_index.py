@@ -0,0 +1,42 @@
+"""widen appointments doctor index with patient_id
+
+Revision ID: a61d3f8c27e4
+Revises: e7a3c9d2b816
+Create Date: 2026-10-18 16:00:00.000000
+
+Replaces ix_appointments_doctor_date (doctor_id, appointment_date) with
+ix_appointments_doctor_date_patient so the doctor dashboard's today and
+distinct-patient counts are read from the index alone. The new index is
+created first: on MySQL it takes over backing the doctor_id foreign key.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a61d3f8c27e4'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c9d2b816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing() -> set:
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("appointments")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if "ix_appointments_doctor_date_patient" not in _existing():
+        op.create_index("ix_appointments_doctor_date_patient", "appointments", ["doctor_id", "appointment_date", "patient_id"])
+    if "ix_appointments_doctor_date" in _existing():
+        op.drop_index("ix_appointments_doctor_date", table_name="appointments")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if "ix_appointments_doctor_date" not in _existing():
+        op.create_index("ix_appointments_doctor_date", "appointments", ["doctor_id", "appointment_date"])
+    if "ix_appointments_doctor_date_patient" in _existing():
+        op.drop_index("ix_appointments_doctor_date_patient", table_name="appointments")
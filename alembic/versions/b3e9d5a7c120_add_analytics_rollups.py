@@ -0,0 +1,84 @@
+"""add daily analytics rollup tables
+
+Revision ID: b3e9d5a7c120
+Revises: f2c8b4d61a97
+Create Date: 2026-10-18 18:00:00.000000
+
+Tables behind the admin analytics (filled by `python -m app.jobs.rollups`)
+and ix_users_created_at for rolling up patient registrations by day. Until
+the job has run the analytics read the raw tables, as before.
+ix_appointments_status_date_doctor replaces ix_appointments_status_doctor so
+completed appointments after the watermark are an index range.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e9d5a7c120'
+down_revision: Union[str, Sequence[str], None] = 'f2c8b4d61a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing(table: str) -> set:
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _count() -> sa.Column:
+    return sa.Column("count", sa.Integer(), nullable=False, server_default="0")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "daily_appointment_counts" not in tables:
+        op.create_table(
+            "daily_appointment_counts",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("doctor_id", sa.Integer(), primary_key=True),
+            sa.Column("status", sa.String(length=20), primary_key=True),
+            _count(),
+        )
+        op.create_index("ix_daily_appointment_counts_status_doctor", "daily_appointment_counts", ["status", "doctor_id", "day", "count"])
+    if "daily_medicine_usage" not in tables:
+        op.create_table(
+            "daily_medicine_usage",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("medicine_id", sa.Integer(), primary_key=True),
+            _count(),
+        )
+        op.create_index("ix_daily_medicine_usage_medicine", "daily_medicine_usage", ["medicine_id", "day", "count"])
+    if "daily_new_patients" not in tables:
+        op.create_table(
+            "daily_new_patients",
+            sa.Column("day", sa.Date(), primary_key=True),
+            _count(),
+        )
+    if "rollup_watermarks" not in tables:
+        op.create_table(
+            "rollup_watermarks",
+            sa.Column("name", sa.String(length=50), primary_key=True),
+            sa.Column("through_day", sa.Date(), nullable=True),
+            sa.Column("refreshed_at", sa.TIMESTAMP(), nullable=True),
+        )
+    if "ix_users_created_at" not in _existing("users"):
+        op.create_index("ix_users_created_at", "users", ["created_at"])
+    if "ix_appointments_status_date_doctor" not in _existing("appointments"):
+        op.create_index("ix_appointments_status_date_doctor", "appointments", ["status", "appointment_date", "doctor_id"])
+    if "ix_appointments_status_doctor" in _existing("appointments"):
+        op.drop_index("ix_appointments_status_doctor", table_name="appointments")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if "ix_appointments_status_doctor" not in _existing("appointments"):
+        op.create_index("ix_appointments_status_doctor", "appointments", ["status", "doctor_id"])
+    op.drop_index("ix_appointments_status_date_doctor", table_name="appointments")
+    op.drop_index("ix_users_created_at", table_name="users")
+    op.drop_table("rollup_watermarks")
+    op.drop_table("daily_new_patients")
+    op.drop_table("daily_medicine_usage")
+    op.drop_table("daily_appointment_counts")
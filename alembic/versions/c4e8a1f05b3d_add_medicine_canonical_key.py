@@ -0,0 +1,34 @@
+"""add medicines.canonical_key
+
+Revision ID: c4e8a1f05b3d
+Revises: 9b1f6c2d4e7a
+Create Date: 2026-10-18 12:00:00.000000
+
+Nullable so existing duplicates can stay until `python -m
+app.jobs.dedupe_medicines` merges them and backfills the key.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f05b3d'
+down_revision: Union[str, Sequence[str], None] = '9b1f6c2d4e7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("medicines")}
+    if "canonical_key" not in columns:
+        op.add_column("medicines", sa.Column("canonical_key", sa.String(length=40), nullable=True))
+        op.create_index("uq_medicines_canonical_key", "medicines", ["canonical_key"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_medicines_canonical_key", table_name="medicines")
+    op.drop_column("medicines", "canonical_key")
@@ -0,0 +1,35 @@
+"""add serial_sequences
+
+Revision ID: e7a3c9d2b816
+Revises: 5d2b7e9a1c40
+Create Date: 2026-10-18 15:00:00.000000
+
+Counter table behind the block-reserving patient serial allocator. The
+allocator creates its row on first use.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c9d2b816'
+down_revision: Union[str, Sequence[str], None] = '5d2b7e9a1c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if "serial_sequences" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "serial_sequences",
+            sa.Column("name", sa.String(length=50), primary_key=True),
+            sa.Column("next_value", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("serial_sequences")
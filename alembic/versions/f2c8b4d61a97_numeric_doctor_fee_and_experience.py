@@ -0,0 +1,116 @@
+"""store doctor fee and experience as numbers; index directory search
+
+Revision ID: f2c8b4d61a97
+Revises: a61d3f8c27e4
+Create Date: 2026-10-18 17:00:00.000000
+
+doctors.consultation_fee becomes DECIMAL(10,2) and doctors.experience an
+INT of years, parsed from the old free text ("500 BDT" -> 500, "5 years"
+-> 5; text without a number becomes NULL). ix_doctors_status_fee replaces
+ix_doctors_status, and each doctor association table gets a
+(facet id, doctor_id) index for the directory filters and facet counts.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.numbers import leading_number
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8b4d61a97'
+down_revision: Union[str, Sequence[str], None] = 'a61d3f8c27e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+# (index name, table, columns)
+ASSOCIATION_INDEXES = [
+    ("ix_doctor_specializations_specialization", "doctor_specializations", ["specialization_id", "doctor_id"]),
+    ("ix_doctor_institutes_institute", "doctor_institutes", ["institute_id", "doctor_id"]),
+    ("ix_doctor_qualifications_qualification", "doctor_qualifications", ["qualification_id", "doctor_id"]),
+]
+
+
+def _existing(table: str) -> set:
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _convert(new_types: dict, to_value) -> None:
+    """Fill each doctors.<column>_new from doctors.<column>, in batches by id"""
+    bind = op.get_bind()
+    source = list(new_types)
+    target = [f"{c}_new" for c in new_types]
+    doctors = sa.table(
+        "doctors",
+        sa.column("id", sa.Integer),
+        *(sa.column(c) for c in source),
+        *(sa.column(f"{c}_new", type_) for c, type_ in new_types.items()),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(doctors.c.id, *(doctors.c[c] for c in source))
+            .where(doctors.c.id > last_id)
+            .order_by(doctors.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            values = {new: to_value(old, row._mapping[old]) for old, new in zip(source, target)}
+            bind.execute(doctors.update().where(doctors.c.id == row.id).values(**values))
+        last_id = rows[-1].id
+
+
+def _parse(column: str, value):
+    number = leading_number(value)
+    if number is None:
+        return None
+    return int(number) if column == "experience" else number
+
+
+def _swap_columns(new_types: dict, convert) -> None:
+    """Replace doctors.experience / consultation_fee with columns of `new_types`"""
+    with op.batch_alter_table("doctors") as batch:
+        for column, type_ in new_types.items():
+            batch.add_column(sa.Column(f"{column}_new", type_, nullable=True))
+    _convert(new_types, convert)
+    with op.batch_alter_table("doctors") as batch:
+        for column, type_ in new_types.items():
+            batch.drop_column(column)
+            batch.alter_column(f"{column}_new", new_column_name=column, existing_type=type_)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if "ix_doctors_status" in _existing("doctors"):
+        op.drop_index("ix_doctors_status", table_name="doctors")
+    _swap_columns({"experience": sa.Integer(), "consultation_fee": sa.Numeric(10, 2)}, _parse)
+    op.create_index("ix_doctors_status_fee", "doctors", ["status", "consultation_fee"])
+    for name, table, columns in ASSOCIATION_INDEXES:
+        if name not in _existing(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    Values come back as plain numbers ("500.00", "5"); the original text is lost.
+    """
+    mysql = op.get_bind().dialect.name == "mysql"
+    for name, table, columns in reversed(ASSOCIATION_INDEXES):
+        if name not in _existing(table):
+            continue
+        if mysql and columns[0] not in _existing(table):
+            # keep an index backing the foreign key, as MySQL requires
+            op.create_index(columns[0], table, [columns[0]])
+        op.drop_index(name, table_name=table)
+    op.drop_index("ix_doctors_status_fee", table_name="doctors")
+    _swap_columns(
+        {"experience": sa.String(length=20), "consultation_fee": sa.String(length=20)},
+        lambda column, value: None if value is None else str(value),
+    )
+    op.create_index("ix_doctors_status", "doctors", ["status"])
@@ -0,0 +1,116 @@
+"""
+Small in-process caches
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe bounded LRU cache whose entries expire after a TTL.
+
+    Each entry can carry its own TTL (e.g. capped by a token's `exp`);
+    when the cache is full the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# (cache, model, key function) registered with evict_on_commit
+_evictions: list = []
+
+# eviction key meaning "every entry" (see clear_on_commit)
+_ALL_KEYS = object()
+
+
+def evict_on_commit(cache: TTLCache, model: type, key: Callable[[Any], Hashable]) -> None:
+    """Drop `key(obj)` from `cache` once a transaction that inserted, changed
+    or deleted a `model` instance through the ORM commits (None keys are skipped)"""
+    _evictions.append((cache, model, key))
+
+
+def clear_on_commit(cache: TTLCache, model: type) -> None:
+    """Empty `cache` once a transaction that wrote a `model` instance commits"""
+    evict_on_commit(cache, model, lambda obj: _ALL_KEYS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_evictions(session, flush_context):
+    if not _evictions:
+        return
+    pending = session.info.setdefault("cache_evictions", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        for cache, model, key in _evictions:
+            if isinstance(obj, model):
+                value = key(obj)
+                if value is not None:
+                    pending.add((cache, value))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_evictions(session):
+    if session.in_nested_transaction():
+        return
+    for cache, key in session.info.pop("cache_evictions", ()):
+        if key is _ALL_KEYS:
+            cache.clear()
+        else:
+            cache.pop(key)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_evictions(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("cache_evictions", None)
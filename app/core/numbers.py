@@ -0,0 +1,26 @@
+"""
+Parsing of free-text amounts
+
+Doctor fees and experience used to be free text ("৳ 1,000", "500 BDT",
+"5 years"); the first number in the text is the value.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Union
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def leading_number(raw: Union[str, int, float, Decimal, None]) -> Optional[Decimal]:
+    """Return the first number in `raw` ("1,000 BDT" -> 1000), or None when there is none"""
+    if raw is None or isinstance(raw, bool):
+        return None
+    if isinstance(raw, (int, float, Decimal)):
+        return Decimal(str(raw))
+    match = _NUMBER.search(raw)
+    if not match:
+        return None
+    try:
+        return Decimal(match.group().replace(",", ""))
+    except InvalidOperation:
+        return None
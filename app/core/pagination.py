@@ -0,0 +1,139 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is the sort key of the last row of a page, JSON encoded and
+base64'd so clients treat it as opaque. The next page is fetched with a
+range predicate on that key instead of OFFSET, so deep pages cost the same
+as the first one.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Optional, Sequence
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from ..exceptions.http_exceptions import ValidationException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# upper bound for `limit` on per-entity lists; use the NDJSON export for more
+MAX_PAGE_SIZE = 500
+# rows fetched per round trip by the streamed exports
+EXPORT_BATCH_SIZE = 500
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    """Decode `cursor` into one value per key column, typed like the column"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError
+        values = []
+        for column, value in zip(columns, payload):
+            python_type = column.type.python_type
+            if value is not None and python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            elif value is not None and not isinstance(value, python_type):
+                raise ValueError
+            values.append(value)
+        return values
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise ValidationException("Invalid pagination cursor")
+
+
+def _after(columns: Sequence, values: Sequence, descending: bool):
+    """(c1, c2, ...) > (v1, v2, ...) spelled out so every backend can use the index"""
+    clauses = []
+    for i, column in enumerate(columns):
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*[columns[j] == values[j] for j in range(i)], step))
+    return or_(*clauses)
+
+
+def keyset_query(query, columns: Sequence, cursor: Optional[str] = None, skip: int = 0, limit: int = 100, descending: bool = False):
+    """Apply the cursor predicate, ordering and a LIMIT of `limit + 1` to a Query or select()"""
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+    query = query.order_by(*([c.desc() for c in columns] if descending else columns))
+    if skip and not cursor:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def keyset_split(rows: list, columns: Sequence, limit: int):
+    """Trim the extra look-ahead row and build the cursor for the next page"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], c.key) for c in columns])
+
+
+def keyset_page(
+    query: Query,
+    columns: Sequence,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    descending: bool = False,
+):
+    """Return `(items, next_cursor)` for `query` ordered by the unique key `columns`.
+
+    Without a cursor, `skip` is applied as an OFFSET so existing clients keep
+    working; either way the page carries a cursor for the one after it.
+    """
+    if limit <= 0:
+        return [], None
+    rows = keyset_query(query, columns, cursor, skip, limit, descending).all()
+    return keyset_split(rows, columns, limit)
+
+
+def in_date_range(query, column, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Filter `column` to the inclusive day range [date_from, date_to]"""
+    if column.type.python_type is datetime:
+        if date_from:
+            query = query.filter(column >= datetime.combine(date_from, time.min))
+        if date_to:
+            query = query.filter(column < datetime.combine(date_to + timedelta(days=1), time.min))
+        return query
+    if date_from:
+        query = query.filter(column >= date_from)
+    if date_to:
+        query = query.filter(column <= date_to)
+    return query
+
+
+def paged_response(response: Response, page: tuple) -> list:
+    """Unpack a `keyset_page` result, exposing the cursor as a response header"""
+    items, next_cursor = page
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
+
+
+def ndjson_response(session_factory, fetch: Callable, schema) -> StreamingResponse:
+    """Stream the rows of `fetch(db)` as newline-delimited `schema` JSON.
+
+    The stream opens its own session so it stays usable for as long as the
+    client keeps reading; `fetch` should return a `yield_per` query so only
+    one batch of rows is held in memory at a time.
+    """
+    def lines():
+        db = session_factory()
+        try:
+            for row in fetch(db):
+                yield schema.model_validate(row).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,133 @@
+"""
+Bounded executor for bcrypt hashing and verification
+
+bcrypt is CPU bound and holds the GIL for most of its runtime in our
+profile, so running it on the request threadpool starves unrelated
+endpoints. Work is shipped to a small process pool instead, and the number
+of in-flight operations is capped so a login storm queues (and eventually
+sheds with 503) rather than piling up threads.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional
+
+from passlib.context import CryptContext
+
+
+@lru_cache(maxsize=None)
+def _context(rounds: int) -> CryptContext:
+    # min == max == default so that needs_update() flags any hash whose cost
+    # differs from the configured one, in either direction
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify(plain: str, hashed: str, rounds: int) -> bool:
+    return _context(rounds).verify(plain, hashed)
+
+
+# default cap on in-flight operations per pool worker; kept well below the
+# request threadpool (40 threads in Starlette/anyio) so callers are shed
+# with 503 before hashing can occupy every request thread
+PENDING_PER_WORKER = 4
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full for longer than the wait timeout"""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a size-limited process pool and tracks queue depth"""
+
+    def __init__(self, rounds: int, workers: int, max_pending: Optional[int], wait_timeout: float):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending or max(workers, 1) * PENDING_PER_WORKER
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+
+        with self._lock:
+            self._submitted += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            try:
+                return self._get_executor().submit(fn, *args).result()
+            except BrokenProcessPool:
+                # a worker died (OOM, kill); start a fresh pool and retry once
+                self._reset_executor()
+                return self._get_executor().submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, plain: str, hashed: str) -> bool:
+        return self._run(_verify, plain, hashed, self.rounds)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if `hashed` was produced with a different cost than configured"""
+        return _context(self.rounds).needs_update(hashed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - max(self.workers, 1)),
+                "max_in_flight": self._max_in_flight,
+                "max_pending": self.max_pending,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._reset_executor()
@@ -0,0 +1,38 @@
+"""
+Phone number normalization
+
+Numbers are stored in an E.164-like form: "+" followed by the country code
+and subscriber digits. Local numbers ("01712-345678") get
+PHONE_DEFAULT_COUNTRY_CODE with their trunk 0 dropped.
+"""
+import re
+from typing import Optional
+
+from .config import settings
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(raw: Optional[str], country_code: Optional[str] = None) -> Optional[str]:
+    """Return `raw` as "+<country code><number>", or None when it has no digits"""
+    if raw is None:
+        return None
+    country_code = country_code or settings.PHONE_DEFAULT_COUNTRY_CODE
+    raw = raw.strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if not digits:
+        return None
+    if raw.startswith("+"):
+        return "+" + digits
+    if digits.startswith("00"):
+        return "+" + digits[2:]
+    if digits.startswith(country_code) and len(digits) > 10:
+        return "+" + digits
+    return "+" + country_code + digits.lstrip("0")
+
+
+def phone_digits_reversed(phone: Optional[str]) -> Optional[str]:
+    """Digits of a normalized number, last digit first (backs "ends with" search)"""
+    if not phone:
+        return None
+    return _NON_DIGITS.sub("", phone)[::-1]
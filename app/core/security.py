@@ -1,10 +1,13 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt, JWTError
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Request, status
 from sqlalchemy.orm import Session
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from .cache import TTLCache
 from .config import settings
 from ..database import get_db
 from ..models import User
@@ -12,6 +15,17 @@ from ..models import User
 
 security = HTTPBearer()
 
+# sha256(token) -> verified claims
+_token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
+
+
+class TokenUser:
+    """Authenticated principal built from verified token claims"""
+
+    def __init__(self, id: int, role: Optional[str]):
+        self.id = id
+        self.role = role
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -30,13 +44,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def verify_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(
             token,
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,20 +62,44 @@ def verify_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    ttl = settings.TOKEN_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _token_cache.set(key, payload, ttl=ttl)
+    return payload
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+
+def _request_claims(request: Request, token: str) -> dict:
+    """Claims for `token`, reusing the ones AuthMiddleware already verified"""
+    state = request.state
+    if getattr(state, "token", None) == token and getattr(state, "token_claims", None) is not None:
+        return state.token_claims
+    payload = verify_token(token)
+    state.token = token
+    state.token_claims = payload
+    return payload
+
+
+def _token_from(credentials: HTTPAuthorizationCredentials) -> str:
     token = credentials.credentials  # This is your Bearer token
-    
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
         )
+    return token
+
+
+def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    token = _token_from(credentials)
     
-    payload = verify_token(token)
+    payload = _request_claims(request, token)
     user_id: int = payload.get("id")
     
     if user_id is None:
@@ -76,7 +118,26 @@ def get_current_user(
     return user
 
 
-def get_current_doctor(current_user: User = Depends(get_current_user)) -> User:
+def get_current_principal(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Current user from token claims; loads the users row only if AUTH_LOAD_USER"""
+    if settings.AUTH_LOAD_USER:
+        return get_current_user(request, credentials, db)
+
+    payload = _request_claims(request, _token_from(credentials))
+    user_id = payload.get("id")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+        )
+    return TokenUser(id=user_id, role=payload.get("role"))
+
+
+def get_current_doctor(current_user = Depends(get_current_principal)):
     if current_user.role != "doctor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -85,7 +146,7 @@ def get_current_doctor(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def get_current_patient(current_user: User = Depends(get_current_user)) -> User:
+def get_current_patient(current_user = Depends(get_current_principal)):
     
     if current_user.role != "patient":
         raise HTTPException(
@@ -1,19 +1,326 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import functools
+import itertools
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from .core.config import settings
 
+
+class PoolMetrics:
+    """Checkout wait-time counters shared by the engine's pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.liveness_pings = 0
+        self.liveness_failures = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / attempts * 1000, 3) if attempts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "liveness_pings": self.liveness_pings,
+                "liveness_failures": self.liveness_failures,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - started)
+        return conn
+
+
+def _engine_options(url: str, instrumented: bool = True) -> dict:
+    """Pool arguments for `url`; in-memory SQLite keeps SQLAlchemy's default pool"""
+    options = {"echo": settings.DEBUG, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if instrumented:
+        options["poolclass"] = InstrumentedQueuePool
+    return options
+
+
+def _install_idle_ping(target_engine, idle_seconds: int) -> None:
+    """Ping on checkout only when the connection sat idle longer than `idle_seconds`.
+
+    A cheaper alternative to pool_pre_ping, which pings on every checkout.
+    """
+
+    @event.listens_for(target_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(target_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        last = connection_record.info.get("last_checkin")
+        if last is None or time.monotonic() - last < idle_seconds:
+            return
+        pool_metrics.liveness_pings += 1
+        try:
+            # some drivers already fail opening a cursor on a dead connection
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except Exception:
+            pool_metrics.liveness_failures += 1
+            # the pool discards this connection and retries with a fresh one
+            raise exc.DisconnectionError()
+
+
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    pool_pre_ping=True
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+
+if not settings.DB_POOL_PRE_PING and settings.DB_POOL_PING_IDLE_SECONDS > 0:
+    _install_idle_ping(engine, settings.DB_POOL_PING_IDLE_SECONDS)
+
+
+class _Replica:
+    """Health state of one replica engine"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.usable = True
+        self.checked_at: Optional[float] = None
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # a probe is running; nobody else starts one meanwhile
+        self.probing = False
+
+
+class ReplicaRouter:
+    """Picks a healthy, caught-up replica for read-only queries.
+
+    Each replica is probed at most once per `check_seconds` (connect plus a
+    lag query); one that is down or lags more than `max_lag_seconds` is
+    skipped until a later probe clears it. With no usable replica, reads go
+    to the primary. Probes run outside the router lock: the first one in
+    the thread that needs it, later ones on a background thread while
+    reads keep using the last known state, so a slow or unreachable
+    replica never stalls other requests.
+    """
+
+    def __init__(self, primary: Engine, replicas: list, max_lag_seconds: float, check_seconds: float):
+        self.primary = primary
+        self.replicas = [_Replica(r) for r in replicas]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self._cycle = itertools.cycle(self.replicas)
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def replica_lag(self, conn) -> Optional[float]:
+        """Seconds the replica behind `conn` trails its source; None if replication is stopped"""
+        if conn.dialect.name != "mysql":
+            return 0.0
+        try:
+            row = conn.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+        except exc.DBAPIError:
+            # MySQL < 8.0.22 / MariaDB
+            row = conn.exec_driver_sql("SHOW SLAVE STATUS").mappings().first()
+        if row is None:
+            # not configured as a replica (e.g. a read-only copy); nothing to lag behind
+            return 0.0
+        lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        return None if lag is None else float(lag)
+
+    def _probe(self, replica: _Replica) -> None:
+        """Refresh `replica`'s state; called without the router lock held"""
+        try:
+            with replica.engine.connect() as conn:
+                replica.lag = self.replica_lag(conn)
+            replica.usable = replica.lag is not None and replica.lag <= self.max_lag_seconds
+            replica.last_error = None if replica.usable else "lagging"
+        except exc.DBAPIError as e:
+            replica.usable = False
+            replica.last_error = type(e.orig).__name__ if e.orig is not None else type(e).__name__
+        finally:
+            replica.checked_at = time.monotonic()
+            replica.probing = False
+
+    def mark_down(self, engine: Engine) -> None:
+        """Take a replica out of rotation until its next probe"""
+        for replica in self.replicas:
+            if replica.engine is engine:
+                replica.usable = False
+                replica.last_error = "connection failed"
+                replica.checked_at = time.monotonic()
+
+    def pick(self) -> Engine:
+        """A usable replica engine, round-robin, or the primary if none is"""
+        now = time.monotonic()
+        first, due = [], []
+        with self._lock:
+            for replica in self.replicas:
+                if replica.probing:
+                    continue
+                if replica.checked_at is None:
+                    first.append(replica)
+                elif now - replica.checked_at >= self.check_seconds:
+                    due.append(replica)
+                else:
+                    continue
+                replica.probing = True
+        for replica in due:
+            threading.Thread(target=self._probe, args=(replica,), name="replica-probe", daemon=True).start()
+        for replica in first:
+            self._probe(replica)
+
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                # a replica whose first probe is still running is not known good yet
+                if replica.usable and replica.checked_at is not None:
+                    self.replica_reads += 1
+                    return replica.engine
+            if self.replicas:
+                self.primary_fallbacks += 1
+        return self.primary
+
+    def stats(self) -> dict:
+        return {
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {"url": r.engine.url.render_as_string(), "usable": r.usable, "lag": r.lag, "error": r.last_error}
+                for r in self.replicas
+            ],
+        }
+
+
+class RoutingSession(Session):
+    """Session that sends `replica_read` queries to a replica.
+
+    Writes, flushes and everything outside a `replica_read` call use the
+    primary. Once the session has written anything it stays on the primary
+    for the rest of its life (one request), so a request reads its own writes.
+    """
+
+    def __init__(self, *args, router: Optional[ReplicaRouter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.router = router
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.router is None
+            or not self.info.get("replica_read")
+            or self.info.get("sticky_primary")
+            or self._flushing
+        ):
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        # pin one replica per transaction so a unit of reads sees one snapshot
+        bind = self.info.get("replica_bind")
+        if bind is None:
+            bind = self.info["replica_bind"] = self.router.pick()
+        return bind
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_after_flush(session, flush_context):
+    session.info["sticky_primary"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _stick_after_bulk_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["sticky_primary"] = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _unpin_replica(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("replica_bind", None)
+
+
+def replica_read(fn):
+    """Run a read-only repository method (first argument `db`) on a replica.
+
+    Falls back to the primary when the session already wrote, no replica is
+    usable, or the chosen replica fails mid-query.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        if not isinstance(db, RoutingSession) or db.router is None or db.info.get("replica_read"):
+            return fn(db, *args, **kwargs)
+        db.info["replica_read"] = True
+        try:
+            return fn(db, *args, **kwargs)
+        except exc.DBAPIError:
+            bind = db.info.get("replica_bind")
+            if bind is None or bind is db.router.primary:
+                raise
+            db.router.mark_down(bind)
+            db.rollback()
+            db.info["replica_read"] = False
+            return fn(db, *args, **kwargs)
+        finally:
+            db.info["replica_read"] = False
+
+    return wrapper
+
+
+replica_urls = [u.strip() for u in settings.DATABASE_REPLICA_URLS.split(",") if u.strip()]
+replica_router = (
+    ReplicaRouter(
+        engine,
+        [create_engine(u, **_engine_options(u, instrumented=False)) for u in replica_urls],
+        max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        check_seconds=settings.DB_REPLICA_CHECK_SECONDS,
+    )
+    if replica_urls
+    else None
 )
 
 # Create session factory
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    router=replica_router,
     autocommit=False,
     autoflush=False,
     bind=engine
@@ -23,6 +330,70 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+def get_pool_stats() -> dict:
+    """Current pool gauges plus cumulative checkout wait metrics"""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            in_use=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    stats.update(pool_metrics.as_dict())
+    if replica_router is not None:
+        stats["read_replicas"] = replica_router.stats()
+    return stats
+
+
+def async_database_url(url: str) -> str:
+    """Swap the sync DBAPI driver in `url` for its asyncio counterpart"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "mysql":
+        parsed = parsed.set(drivername="mysql+aiomysql")
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+_async_engine = None
+_async_session_factory = None
+_async_lock = threading.Lock()
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """Create the async engine on first use (the async driver is optional)"""
+    global _async_engine, _async_session_factory
+    with _async_lock:
+        if _async_session_factory is None:
+            url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+            options = _engine_options(url, instrumented=False)
+            if make_url(url).get_backend_name() == "sqlite":
+                # aiosqlite runs on NullPool/StaticPool, which take no sizing arguments
+                options = {"echo": options["echo"]}
+            _async_engine = create_async_engine(url, **options)
+            _async_session_factory = async_sessionmaker(
+                _async_engine,
+                class_=AsyncSession,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+        return _async_session_factory
+
+
+async def get_async_db():
+    """
+    Async database session dependency for FastAPI
+
+    Yields:
+        AsyncSession
+    """
+    async with get_async_session_factory()() as db:
+        yield db
+
+
 def get_db():
     """
     Database session dependency for FastAPI
@@ -57,3 +57,33 @@ class ValidationException(HTTPException):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=detail
         )
+
+
+class SlotUnavailableException(HTTPException):
+    """Exception raised when a requested appointment slot cannot be booked"""
+    def __init__(self, detail: str = "Requested slot is not available"):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail
+        )
+
+
+class DuplicateMedicineException(HTTPException):
+    """Exception raised when a medicine with the same canonical key already exists"""
+    def __init__(self, detail: str = "Medicine already exists"):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail
+        )
+
+
+class MedicineSuggestionException(HTTPException):
+    """Exception raised when new medicine names closely match existing ones"""
+    def __init__(self, medicines: list):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Similar medicines already exist; use one of them or resend with confirm_new_medicines",
+                "medicines": medicines,
+            }
+        )
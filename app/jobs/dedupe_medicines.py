@@ -0,0 +1,93 @@
+"""
+Medicine catalog deduplication
+
+Groups medicines by canonical key, repoints `prescription_medicines` and
+the `daily_medicine_usage` rollup rows at one survivor per group, deletes
+the duplicates and backfills `canonical_key`.
+The survivor is the row that already carries the key (it may be cached by
+the API) or else the lowest id. The bulk statements bypass the ORM events
+that keep the typeahead index current, so an index built in this process is
+rebuilt afterwards; API workers pick the change up with their periodic
+rebuild (MEDICINE_INDEX_REBUILD_SECONDS). Safe to re-run:
+
+    python -m app.jobs.dedupe_medicines [--dry-run] [--batch-size 500]
+"""
+import argparse
+import logging
+from collections import defaultdict
+from typing import Callable
+
+from ..database import SessionLocal
+from ..models import Medicine, PrescriptionMedicine
+from ..repositories.medicine_index import medicine_index
+from ..repositories.medicine_repo import medicine_key
+from ..repositories.rollup_repo import RollupRepository
+
+logger = logging.getLogger(__name__)
+
+
+def dedupe_medicines(session_factory: Callable = SessionLocal, batch_size: int = 500, dry_run: bool = False) -> dict:
+    """Merge duplicate medicines; returns counts of groups merged, rows removed and keys backfilled"""
+    db = session_factory()
+    try:
+        groups = defaultdict(list)
+        rows = db.query(Medicine.id, Medicine.name, Medicine.strength, Medicine.form, Medicine.manufacturer, Medicine.canonical_key)
+        for row in rows.order_by(Medicine.id).yield_per(batch_size):
+            groups[medicine_key(row.name, row.strength, row.form, row.manufacturer)].append((row.id, row.canonical_key))
+
+        stats = {"scanned": sum(len(g) for g in groups.values()), "merged": 0, "removed": 0, "backfilled": 0}
+        # keys that no longer match their row (edited outside the API) are
+        # cleared first so re-keying another row cannot collide with them
+        stale = [medicine_id for key, members in groups.items() for medicine_id, current in members if current not in (None, key)]
+        if stale and not dry_run:
+            db.query(Medicine).filter(Medicine.id.in_(stale)).update({Medicine.canonical_key: None}, synchronize_session=False)
+
+        pending = 0
+        for key, members in groups.items():
+            keyed = [medicine_id for medicine_id, current in members if current == key]
+            survivor = keyed[0] if keyed else members[0][0]
+            duplicates = [medicine_id for medicine_id, _ in members if medicine_id != survivor]
+
+            if duplicates:
+                stats["merged"] += 1
+                stats["removed"] += len(duplicates)
+            if not keyed:
+                stats["backfilled"] += 1
+            if dry_run or (keyed and not duplicates):
+                continue
+
+            if duplicates:
+                (
+                    db.query(PrescriptionMedicine)
+                    .filter(PrescriptionMedicine.medicine_id.in_(duplicates))
+                    .update({PrescriptionMedicine.medicine_id: survivor}, synchronize_session=False)
+                )
+                # rolled-up days still name the duplicates, which top_medicines would drop
+                RollupRepository.merge_medicine_usage(db, survivor, duplicates)
+                db.query(Medicine).filter(Medicine.id.in_(duplicates)).delete(synchronize_session=False)
+            if not keyed:
+                db.query(Medicine).filter(Medicine.id == survivor).update(
+                    {Medicine.canonical_key: key}, synchronize_session=False
+                )
+            pending += 1
+            if pending >= batch_size:
+                db.commit()
+                pending = 0
+        db.commit()
+        if medicine_index.ready and not dry_run and stats["removed"]:
+            medicine_index.build(session_factory)
+        return stats
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logger.info("medicine dedupe: %s", dedupe_medicines(batch_size=args.batch_size, dry_run=args.dry_run))
@@ -0,0 +1,160 @@
+"""
+Email outbox dispatcher
+
+Delivers rows queued in `email_outbox` over a single reused SMTP connection
+per batch, retrying failures with exponential backoff. Runs either as a
+daemon thread inside the API process (EMAIL_OUTBOX_DISPATCH_IN_APP) or as a
+separate process:
+
+    python -m app.jobs.email_outbox
+"""
+import logging
+import smtplib
+import threading
+from email.message import EmailMessage
+from typing import Callable, Optional
+
+from ..core.config import settings
+from ..database import SessionLocal
+from ..repositories.email_outbox_repo import EmailOutboxRepository
+
+logger = logging.getLogger(__name__)
+
+
+def smtp_configured() -> bool:
+    """True once Settings name a server and sender (and a password for SMTP_USERNAME)"""
+    return bool(settings.SMTP_HOST and settings.EMAIL_FROM and (settings.SMTP_PASSWORD or not settings.SMTP_USERNAME))
+
+
+def default_smtp_factory() -> smtplib.SMTP:
+    """Open an authenticated SMTP connection from Settings"""
+    if settings.SMTP_USE_SSL:
+        server = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+    else:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+    if settings.SMTP_USERNAME:
+        server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+    return server
+
+
+class EmailOutboxDispatcher:
+    """Polls the outbox and sends due messages in batches"""
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        smtp_factory: Callable[[], smtplib.SMTP] = default_smtp_factory,
+        batch_size: int = settings.EMAIL_OUTBOX_BATCH_SIZE,
+        poll_seconds: float = settings.EMAIL_OUTBOX_POLL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.smtp_factory = smtp_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._warned_unconfigured = False
+
+    def _build_message(self, row) -> EmailMessage:
+        msg = EmailMessage()
+        msg["Subject"] = row.subject
+        msg["From"] = settings.EMAIL_FROM
+        msg["To"] = row.to_email
+        msg.set_content(row.body or "")
+        return msg
+
+    def _fail(self, row, error: str) -> None:
+        EmailOutboxRepository.mark_failed(
+            row,
+            error,
+            max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            backoff_seconds=settings.EMAIL_OUTBOX_BACKOFF_SECONDS,
+            backoff_max_seconds=settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS,
+        )
+
+    def run_once(self) -> int:
+        """Send one batch of due messages; returns the number delivered"""
+        if self.smtp_factory is default_smtp_factory and not smtp_configured():
+            # leave the messages queued rather than burn their attempts
+            if not self._warned_unconfigured:
+                logger.warning("Email outbox is not sending: set SMTP_HOST, EMAIL_FROM and SMTP credentials")
+                self._warned_unconfigured = True
+            return 0
+        db = self.session_factory()
+        sent = 0
+        try:
+            rows = EmailOutboxRepository.claim_due(db, self.batch_size)
+            if not rows:
+                db.commit()
+                return 0
+
+            server = None
+            try:
+                for i, row in enumerate(rows):
+                    if server is None:
+                        try:
+                            server = self.smtp_factory()
+                        except (smtplib.SMTPException, OSError) as exc:
+                            logger.warning("Email outbox could not connect to SMTP server: %r", exc)
+                            for pending in rows[i:]:
+                                self._fail(pending, repr(exc))
+                            break
+                    try:
+                        server.send_message(self._build_message(row))
+                        EmailOutboxRepository.mark_sent(row)
+                        sent += 1
+                    except smtplib.SMTPServerDisconnected as exc:
+                        # reconnect for the next message in the batch
+                        server = None
+                        self._fail(row, repr(exc))
+                    except (smtplib.SMTPException, OSError) as exc:
+                        logger.warning("Email outbox delivery of message %s failed: %r", row.id, exc)
+                        self._fail(row, repr(exc))
+            finally:
+                if server is not None:
+                    try:
+                        server.quit()
+                    except (smtplib.SMTPException, OSError):
+                        pass
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return sent
+
+    def run_forever(self) -> None:
+        """Drain the outbox until stopped, sleeping when it is empty"""
+        while not self._stop.is_set():
+            try:
+                sent = self.run_once()
+            except Exception:
+                logger.exception("Email outbox dispatcher iteration failed")
+                sent = 0
+            if sent < self.batch_size:
+                self._stop.wait(self.poll_seconds)
+
+    def start(self) -> None:
+        """Run the dispatcher on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+dispatcher = EmailOutboxDispatcher()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        dispatcher.run_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,138 @@
+"""
+Admin analytics rollups
+
+Rebuilds the daily rollup tables (appointments per doctor/status/day,
+medicine usage per day, new patients per day) from the day after the
+watermark, and the last ANALYTICS_ROLLUP_LOOKBACK_DAYS before it, up to
+yesterday, then moves the watermark. The first run backfills from the
+earliest row, one committed chunk of days at a time, so an interrupted
+backfill resumes where it stopped. Each chunk is rebuilt while holding a
+lock on the watermark row, so when every API worker runs the refresher
+(ANALYTICS_ROLLUP_IN_APP) only one of them rebuilds at a time, and a
+refresh finished by another worker within half the interval is not
+repeated. It can also run as a separate process:
+
+    python -m app.jobs.rollups [--rebuild] [--forever]
+"""
+import argparse
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+from ..core.config import settings
+from ..database import SessionLocal
+from ..repositories.rollup_repo import RollupRepository
+
+logger = logging.getLogger(__name__)
+
+CHUNK_DAYS = 31
+
+
+def refresh_rollups(
+    session_factory: Callable = SessionLocal,
+    lookback_days: int = settings.ANALYTICS_ROLLUP_LOOKBACK_DAYS,
+    rebuild: bool = False,
+    today: Optional[date] = None,
+    min_interval_seconds: float = 0,
+) -> int:
+    """Bring the rollups up to yesterday; returns the number of days rebuilt.
+
+    Does nothing while another process holds the watermark lock, or when
+    the rollups were refreshed less than `min_interval_seconds` ago.
+    """
+    yesterday = (today or date.today()) - timedelta(days=1)
+    db = session_factory()
+    try:
+        watermark = RollupRepository.claim_watermark(db)
+        if watermark is None:
+            logger.info("Analytics rollups are being refreshed by another process")
+            return 0
+        if (
+            min_interval_seconds and watermark.refreshed_at is not None
+            and datetime.utcnow() - watermark.refreshed_at < timedelta(seconds=min_interval_seconds)
+        ):
+            return 0
+        through = None if rebuild else watermark.through_day
+        if through is None:
+            start = RollupRepository.first_day(db) or yesterday + timedelta(days=1)
+        else:
+            start = min(through + timedelta(days=1), yesterday - timedelta(days=lookback_days - 1))
+
+        rebuilt = 0
+        while start <= yesterday:
+            end = min(start + timedelta(days=CHUNK_DAYS - 1), yesterday)
+            RollupRepository.rebuild_days(db, start, end)
+            RollupRepository.set_watermark(db, end)
+            db.commit()
+            rebuilt += (end - start).days + 1
+            start = end + timedelta(days=1)
+            # the commit released the lock; stop if another process took it over
+            if start <= yesterday and RollupRepository.claim_watermark(db) is None:
+                break
+        if through is None and rebuilt == 0:
+            # nothing to roll up yet; later days are read live either way
+            RollupRepository.set_watermark(db, yesterday)
+            db.commit()
+        return rebuilt
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class RollupRefresher:
+    """Runs refresh_rollups every `interval_seconds`"""
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        interval_seconds: float = settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # every worker wakes up; the first one in each half interval does the work
+                refresh_rollups(self.session_factory, min_interval_seconds=self.interval_seconds / 2)
+            except Exception:
+                logger.exception("Analytics rollup refresh failed")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        """Run the refresher on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="analytics-rollups", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+refresher = RollupRefresher()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the admin analytics rollups")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every day, ignoring the watermark")
+    parser.add_argument("--lookback-days", type=int, default=settings.ANALYTICS_ROLLUP_LOOKBACK_DAYS)
+    parser.add_argument("--forever", action="store_true", help=f"keep refreshing every {settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS}s")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.forever:
+        try:
+            refresher.run_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        days = refresh_rollups(lookback_days=args.lookback_days, rebuild=args.rebuild)
+        logger.info("Rebuilt %d day(s) of analytics rollups", days)
@@ -1,9 +1,17 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import Base, engine
+from .database import Base, SessionLocal, engine, get_pool_stats
 from .core.config import settings
+from .core.pagination import NEXT_CURSOR_HEADER
 from .middleware.auth_middleware import AuthMiddleware
+from .jobs.email_outbox import dispatcher as email_outbox_dispatcher
+from .jobs.rollups import refresher as rollup_refresher
+from .repositories.availability_index import availability_index
+from .repositories.medicine_index import medicine_index
+from .utils import password_hasher
 from .routers import (
     auth_router,
     users_router,
@@ -18,16 +26,35 @@ from .routers import (
     specializations_router,
     institutes_router,
     qualifications_router,
+    async_reads_router,
 )
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop in-process background workers"""
+    if settings.MEDICINE_INDEX_ENABLED:
+        medicine_index.build(SessionLocal)
+    if settings.EMAIL_OUTBOX_DISPATCH_IN_APP:
+        email_outbox_dispatcher.start()
+    if settings.ANALYTICS_ROLLUP_IN_APP:
+        rollup_refresher.start()
+    yield
+    email_outbox_dispatcher.stop(timeout=5)
+    rollup_refresher.stop(timeout=5)
+    password_hasher.shutdown()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="Medical connectivity platform API"
+    description="Medical connectivity platform API",
+    lifespan=lifespan
 )
 
 # Add middleware
@@ -40,10 +67,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 app.add_middleware(AuthMiddleware)
 
 # Include routers
+if settings.ASYNC_DB_ENABLED:
+    # registered first so these take precedence over the sync routes on the same paths
+    app.include_router(async_reads_router)
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(doctors_router)
@@ -66,6 +97,17 @@ def health_check():
     return {"status": "healthy", "service": settings.APP_NAME}
 
 
+@app.get("/metrics")
+def metrics():
+    """Runtime gauges for capacity tuning"""
+    return {
+        "password_hashing": password_hasher.stats(),
+        "db_pool": get_pool_stats(),
+        "medicine_index": medicine_index.stats(),
+        "availability_index": availability_index.stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
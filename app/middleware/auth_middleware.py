@@ -1,50 +1,79 @@
+"""
+Authentication middleware - decodes the bearer token once per request and
+exposes the caller on request.state
+"""
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from fastapi import HTTPException
 from ..core.security import verify_token
 import logging
 
 logger = logging.getLogger(__name__)
 
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+}
 
-class AuthMiddleware(BaseHTTPMiddleware):
+
+class AuthMiddleware:
     """
     Custom middleware for authentication extraction.
     Reads an Authorization header (or `authorization`) and verifies the token.
-    If token is valid, sets `request.state.user_id` and `request.state.user_role`.
+    If token is valid, sets `request.state.user_id`, `request.state.user_role`
+    and the verified claims on `request.state.token_claims`.
+
+    Implemented as plain ASGI rather than BaseHTTPMiddleware so responses are
+    passed straight through instead of being re-streamed via an extra task.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        """
-        Process request and attach authentication context
-        """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Log incoming request
-        logger.info(f"{request.method} {request.url.path}")
+        logger.info("%s %s", scope["method"], scope["path"])
+
+        # Default state (backs `request.state` for everything downstream)
+        state = scope.setdefault("state", {})
+        state["user_id"] = None
+        state["user_role"] = None
+        state["token"] = None
+        state["token_claims"] = None
 
-        # Default state
-        request.state.user_id = None
-        request.state.user_role = None
+        auth_header = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth_header = value.decode("latin-1")
+                break
 
-        auth_header = request.headers.get("authorization") or request.headers.get("Authorization")
         if auth_header:
             # Accept either 'Bearer <token>' or raw token in header
             token = auth_header
-            if isinstance(auth_header, str) and auth_header.lower().startswith("bearer "):
+            if auth_header.lower().startswith("bearer "):
                 token = auth_header.split(None, 1)[1]
             try:
                 payload = verify_token(token)
-                request.state.user_id = payload.get("id")
-                request.state.user_role = payload.get("role")
+                # shared with core.security dependencies so the token is decoded once
+                state["token"] = token
+                state["token_claims"] = payload
+                state["user_id"] = payload.get("id")
+                state["user_role"] = payload.get("role")
             except HTTPException:
                 # Invalid token: leave state as None and continue
                 logger.debug("Invalid auth token in request; continuing as anonymous")
 
-        # Call next middleware/route
-        response = await call_next(request)
-
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Add security headers
+                headers = MutableHeaders(scope=message)
+                for key, value in SECURITY_HEADERS.items():
+                    headers[key] = value
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
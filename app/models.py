@@ -1,24 +1,31 @@
 from sqlalchemy import (
     Column,
     Integer,
+    Numeric,
     String,
     TIMESTAMP,
     ForeignKey,
     Time,
     Date,
     Text,
-    Table
+    Table,
+    Index
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 
 from app.database import Base
+from app.core.numbers import leading_number
+from app.core.phone import normalize_phone, phone_digits_reversed
 from sqlalchemy import Enum as SAEnum
 
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(100), unique=True, nullable=True)
@@ -84,6 +91,8 @@ doctor_specializations = Table(
     Base.metadata,
     Column("doctor_id", Integer, ForeignKey("doctors.id"), primary_key=True),
     Column("specialization_id", Integer, ForeignKey("specializations.id"), primary_key=True),
+    # directory search filters and counts doctors by specialization
+    Index("ix_doctor_specializations_specialization", "specialization_id", "doctor_id"),
 )
 
 doctor_institutes = Table(
@@ -91,6 +100,8 @@ doctor_institutes = Table(
     Base.metadata,
     Column("doctor_id", Integer, ForeignKey("doctors.id"), primary_key=True),
     Column("institute_id", Integer, ForeignKey("institutes.id"), primary_key=True),
+    # directory search filters and counts doctors by institute
+    Index("ix_doctor_institutes_institute", "institute_id", "doctor_id"),
 )
 
 doctor_qualifications = Table(
@@ -98,10 +109,15 @@ doctor_qualifications = Table(
     Base.metadata,
     Column("doctor_id", Integer, ForeignKey("doctors.id"), primary_key=True),
     Column("qualification_id", Integer, ForeignKey("qualifications.id"), primary_key=True),
+    # directory search filters and counts doctors by qualification
+    Index("ix_doctor_qualifications_qualification", "qualification_id", "doctor_id"),
 )
 
 class Doctor(Base):
     __tablename__ = "doctors"
+    __table_args__ = (
+        Index("ix_doctors_status_fee", "status", "consultation_fee"),
+    )
 
     id = Column(Integer, ForeignKey("users.id"), primary_key=True)
 
@@ -109,8 +125,8 @@ class Doctor(Base):
     phone = Column(String(20), unique=True, nullable=False)
     chamber = Column(String(256))
     bmdc_number = Column(String(20), unique=True)
-    experience = Column(String(20))
-    consultation_fee = Column(String(20))
+    experience = Column(Integer)  # years
+    consultation_fee = Column(Numeric(10, 2))
 
     status = Column(
         SAEnum("pending", "approved", "rejected", "blocked", name="doctor_status"),
@@ -148,16 +164,31 @@ class Doctor(Base):
         back_populates="doctor"
     )
 
+    @validates("experience", "consultation_fee")
+    def _parse_number(self, key, value):
+        # free-text input ("5 years", "500 BDT") keeps working
+        number = leading_number(value)
+        if number is None or key == "consultation_fee":
+            return number
+        return int(number)
+
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        Index("ix_patients_phone", "phone"),
+        Index("ix_patients_phone_reversed", "phone_reversed"),
+    )
 
     id = Column(Integer, ForeignKey("users.id"), primary_key=True)
 
     full_name = Column(String(120))
     age = Column(Integer)
     gender = Column(String(20))
+    # normalized on assignment (see core.phone); phone_reversed backs
+    # "last N digits" lookups with an index range scan
     phone = Column(String(20))
+    phone_reversed = Column(String(20))
 
     blood_group_id = Column(Integer, ForeignKey("blood_groups.id"))
 
@@ -168,10 +199,19 @@ class Patient(Base):
     blood_group = relationship("BloodGroup", back_populates="patients")
     appointments = relationship("Appointment", back_populates="patient")
 
+    @validates("phone")
+    def _normalize_phone(self, key, value):
+        value = normalize_phone(value)
+        self.phone_reversed = phone_digits_reversed(value)
+        return value
+
 
 
 class DoctorSchedule(Base):
     __tablename__ = "doctor_schedules"
+    __table_args__ = (
+        Index("ix_doctor_schedules_doctor_id", "doctor_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
@@ -188,6 +228,13 @@ class DoctorSchedule(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index("ix_appointments_doctor_date_patient", "doctor_id", "appointment_date", "patient_id"),
+        Index("ix_appointments_patient_date", "patient_id", "appointment_date", "doctor_id"),
+        Index("ix_appointments_schedule_date", "schedule_id", "appointment_date", "appointment_time"),
+        Index("ix_appointments_status_date_doctor", "status", "appointment_date", "doctor_id"),
+        Index("ix_appointments_date", "appointment_date"),
+    )
 
     id = Column(Integer, primary_key=True)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
@@ -216,6 +263,10 @@ class Appointment(Base):
 
 class Prescription(Base):
     __tablename__ = "prescriptions"
+    __table_args__ = (
+        Index("ix_prescriptions_patient_created", "patient_id", "created_at"),
+        Index("ix_prescriptions_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     appointment_id = Column(
@@ -244,12 +295,19 @@ class Prescription(Base):
 
 class Medicine(Base):
     __tablename__ = "medicines"
+    __table_args__ = (
+        Index("ix_medicines_name", "name"),
+        Index("uq_medicines_canonical_key", "canonical_key", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(150), nullable=False)
     strength = Column(String(50))        
     form = Column(String(50))            
     manufacturer = Column(String(150))
+    # sha1 of the normalized (name, strength, form, manufacturer); NULL until
+    # backfilled by app.jobs.dedupe_medicines
+    canonical_key = Column(String(40))
 
     prescription_medicines = relationship(
         "PrescriptionMedicine",
@@ -259,6 +317,10 @@ class Medicine(Base):
     
 class PrescriptionMedicine(Base):
     __tablename__ = "prescription_medicines"
+    __table_args__ = (
+        Index("ix_prescription_medicines_prescription_id", "prescription_id"),
+        Index("ix_prescription_medicines_medicine_id", "medicine_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -285,3 +347,78 @@ class PrescriptionMedicine(Base):
         "Medicine",
         back_populates="prescription_medicines"
     )
+
+
+class EmailOutbox(Base):
+    """Outgoing e-mail queued in the same transaction as the write that caused it"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String(100), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text)
+
+    status = Column(
+        SAEnum("pending", "sent", "failed", name="email_outbox_status"),
+        default="pending",
+        nullable=False
+    )
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(TIMESTAMP, default=datetime.utcnow)
+    last_error = Column(String(500))
+
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    sent_at = Column(TIMESTAMP, nullable=True)
+
+
+class SerialSequence(Base):
+    """Named counter handed out in blocks (see repositories.serial_repo)"""
+    __tablename__ = "serial_sequences"
+
+    name = Column(String(50), primary_key=True)
+    next_value = Column(Integer, nullable=False, default=0)
+
+
+class DailyAppointmentCount(Base):
+    """Appointments per day (appointment_date), doctor and status; see app.jobs.rollups"""
+    __tablename__ = "daily_appointment_counts"
+    __table_args__ = (
+        Index("ix_daily_appointment_counts_status_doctor", "status", "doctor_id", "day", "count"),
+    )
+
+    day = Column(Date, primary_key=True)
+    doctor_id = Column(Integer, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class DailyMedicineUsage(Base):
+    """Prescription lines per day (prescription created_at) and medicine"""
+    __tablename__ = "daily_medicine_usage"
+    __table_args__ = (
+        Index("ix_daily_medicine_usage_medicine", "medicine_id", "day", "count"),
+    )
+
+    day = Column(Date, primary_key=True)
+    medicine_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class DailyNewPatients(Base):
+    """Patients registered per day (user created_at)"""
+    __tablename__ = "daily_new_patients"
+
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """Last day a rollup covers; later days are still read from the raw tables"""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    through_day = Column(Date, nullable=True)
+    refreshed_at = Column(TIMESTAMP, nullable=True)
@@ -1,38 +1,94 @@
 """
 Admin repository - queries used by admin/dashboard and analytics
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from ..models import Doctor, Patient, Appointment, PrescriptionMedicine, Medicine
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import column, func, desc, literal, select, table, union_all
+from ..core.cache import TTLCache, clear_on_commit
+from ..core.config import settings
+from ..database import replica_read
+from ..models import Doctor, Patient, Appointment, Medicine, Specialization, doctor_specializations
+from .rollup_repo import RollupRepository
 from datetime import date, timedelta
 
+# (today, days, limit) -> specialization rows; any committed doctor,
+# specialization or appointment write in this process empties it
+_specialization_cache = TTLCache(maxsize=64, ttl=settings.SPECIALIZATION_STATS_CACHE_TTL_SECONDS)
+for _model in (Doctor, Specialization, Appointment):
+    clear_on_commit(_specialization_cache, _model)
+
+# estimated dashboard totals (not the pending count), reused for ADMIN_COUNTS_CACHE_TTL_SECONDS
+_counts_cache = TTLCache(maxsize=1, ttl=settings.ADMIN_COUNTS_CACHE_TTL_SECONDS)
+
+_information_schema_tables = table(
+    "TABLES", column("TABLE_SCHEMA"), column("TABLE_NAME"), column("TABLE_ROWS"), schema="information_schema",
+)
+
+
+def _count_of(model, *criteria):
+    return select(func.count()).select_from(model).where(*criteria).scalar_subquery()
+
+
+def _estimated_rows(model):
+    # InnoDB's row estimate from table statistics (may be off by tens of percent)
+    t = _information_schema_tables.c
+    return (
+        select(t.TABLE_ROWS)
+        .where(t.TABLE_SCHEMA == func.database(), t.TABLE_NAME == model.__tablename__)
+        .scalar_subquery()
+    )
+
 
 class AdminRepository:
 
     @staticmethod
-    def get_counts(db: Session) -> dict:
-        total_doctors = db.query(func.count(Doctor.id)).scalar() or 0
-        total_patients = db.query(func.count(Patient.id)).scalar() or 0
-        pending_doctors = db.query(func.count(Doctor.id)).filter(Doctor.status == 'pending').scalar() or 0
-        total_appointments = db.query(func.count(Appointment.id)).scalar() or 0
-
-        return {
-            "total_doctors": int(total_doctors),
-            "total_patients": int(total_patients),
-            "pending_doctors": int(pending_doctors),
-            "total_appointments": int(total_appointments),
-        }
+    @replica_read
+    def get_counts(db: Session, exact: bool = False) -> dict:
+        """Admin dashboard counts in one statement.
+
+        Unless `exact`, MySQL totals come from table statistics (no scan) and
+        are cached in _counts_cache; pending doctors are counted on every
+        call, over the status index, so approving a doctor shows up at once.
+        Other databases always count exactly.
+        """
+        approximate = not exact and db.get_bind().dialect.name == "mysql"
+        pending = _count_of(Doctor, Doctor.status == 'pending')
+        totals = _counts_cache.get("totals") if approximate else None
+        if totals is None:
+            total = _estimated_rows if approximate else _count_of
+            row = db.execute(
+                select(
+                    total(Doctor).label("total_doctors"),
+                    total(Patient).label("total_patients"),
+                    pending.label("pending_doctors"),
+                    total(Appointment).label("total_appointments"),
+                )
+            ).one()
+            counts = {key: int(value or 0) for key, value in row._mapping.items()}
+            if approximate:
+                _counts_cache.set("totals", {k: v for k, v in counts.items() if k != "pending_doctors"})
+        else:
+            counts = {
+                "total_doctors": totals["total_doctors"],
+                "total_patients": totals["total_patients"],
+                "pending_doctors": int(db.execute(select(pending)).scalar() or 0),
+                "total_appointments": totals["total_appointments"],
+            }
+        counts["approximate"] = approximate
+        return counts
 
     @staticmethod
+    @replica_read
     def list_pending_doctors(db: Session):
         return db.query(Doctor).filter(Doctor.status == 'pending').all()
 
     @staticmethod
+    @replica_read
     def top_medicines(db: Session, limit: int = 10):
-        # Count usage of medicines in prescriptions
+        # Count usage of medicines in prescriptions (daily rollups + rows since)
+        usage = RollupRepository.medicine_usage(RollupRepository.get_watermark(db))
         q = (
-            db.query(Medicine, func.count(PrescriptionMedicine.id).label('used'))
-            .join(PrescriptionMedicine, PrescriptionMedicine.medicine_id == Medicine.id)
+            db.query(Medicine, func.sum(usage.c.used).label('used'))
+            .join(usage, usage.c.medicine_id == Medicine.id)
             .group_by(Medicine.id)
             .order_by(desc('used'))
             .limit(limit)
@@ -40,11 +96,13 @@ class AdminRepository:
         return q.all()
 
     @staticmethod
+    @replica_read
     def top_doctors_by_completed_appointments(db: Session, limit: int = 5):
+        completed = RollupRepository.appointment_counts(RollupRepository.get_watermark(db), "doctor_id", status='completed')
         q = (
-            db.query(Doctor, func.count(Appointment.id).label('completed'))
-            .join(Appointment, Appointment.doctor_id == Doctor.id)
-            .filter(Appointment.status == 'completed')
+            db.query(Doctor, func.sum(completed.c.count).label('completed'))
+            .options(selectinload(Doctor.specializations))
+            .join(completed, completed.c.doctor_id == Doctor.id)
             .group_by(Doctor.id)
             .order_by(desc('completed'))
             .limit(limit)
@@ -52,18 +110,7 @@ class AdminRepository:
         return q.all()
 
     @staticmethod
-    def appointment_overview(db: Session, days: int = 7):
-        """Return appointment counts grouped by date for the last `days` days."""
-        today = date.today()
-        start = today - timedelta(days=days - 1)
-
-        q = (
-            db.query(Appointment.appointment_date.label('date'), func.count(Appointment.id).label('count'))
-            .filter(Appointment.appointment_date >= start)
-            .group_by(Appointment.appointment_date)
-            .order_by(Appointment.appointment_date)
-        )
-        results = q.all()
+    def _daily_series(results, start: date, days: int) -> list:
         # Normalize into list of dicts for each day in range (include zeros)
         counts_by_date = {r.date.isoformat(): int(r.count) for r in results}
         out = []
@@ -73,12 +120,90 @@ class AdminRepository:
         return out
 
     @staticmethod
-    def popular_specializations(db: Session, limit: int = 10):
-        """Return top specializations by number of doctors."""
+    @replica_read
+    def appointment_overview(db: Session, days: int = 7):
+        """Return appointment counts grouped by date for the last `days` days."""
+        today = date.today()
+        start = today - timedelta(days=days - 1)
+
+        per_day = RollupRepository.appointment_counts(RollupRepository.get_watermark(db), "day", day_from=start)
+        q = (
+            db.query(per_day.c.day.label('date'), func.sum(per_day.c.count).label('count'))
+            .group_by(per_day.c.day)
+            .order_by(per_day.c.day)
+        )
+        return AdminRepository._daily_series(q.all(), start, days)
+
+    @staticmethod
+    @replica_read
+    def new_patients_overview(db: Session, days: int = 7):
+        """Return patient registrations grouped by date for the last `days` days."""
+        today = date.today()
+        start = today - timedelta(days=days - 1)
+
+        per_day = RollupRepository.new_patient_counts(RollupRepository.get_watermark(db), start)
         q = (
-            db.query(Doctor.specialization.label('specialization'), func.count(Doctor.id).label('count'))
-            .group_by(Doctor.specialization)
-            .order_by(desc('count'))
+            db.query(per_day.c.day.label('date'), func.sum(per_day.c.count).label('count'))
+            .group_by(per_day.c.day)
+            .order_by(per_day.c.day)
+        )
+        return AdminRepository._daily_series(q.all(), start, days)
+
+    @staticmethod
+    @replica_read
+    def popular_specializations(db: Session, limit: int = 10, days: int = 30):
+        """Top specializations by number of doctors, with the appointments booked
+        and completed with those doctors over the last `days` days.
+
+        Rows are (id, name, doctors, appointments, completed) and are cached
+        in _specialization_cache.
+        """
+        today = date.today()
+        key = (today, days, limit)
+        cached = _specialization_cache.get(key)
+        if cached is not None:
+            return cached
+
+        ds = doctor_specializations.c
+        through = RollupRepository.get_watermark(db)
+        window = {"day_from": today - timedelta(days=days - 1), "day_to": today}
+        booked = RollupRepository.appointment_counts(through, "doctor_id", **window)
+        completed = RollupRepository.appointment_counts(through, "doctor_id", status='completed', **window)
+        per_doctor = union_all(
+            select(booked.c.doctor_id, booked.c.count.label('appointments'), literal(0).label('completed')),
+            select(completed.c.doctor_id, literal(0), completed.c.count),
+        ).subquery()
+        visits = (
+            select(
+                ds.specialization_id,
+                func.sum(per_doctor.c.appointments).label('appointments'),
+                func.sum(per_doctor.c.completed).label('completed'),
+            )
+            .join(per_doctor, per_doctor.c.doctor_id == ds.doctor_id)
+            .group_by(ds.specialization_id)
+            .subquery()
+        )
+        doctors = (
+            select(ds.specialization_id, func.count(ds.doctor_id).label('doctors'))
+            .group_by(ds.specialization_id)
+            .subquery()
+        )
+
+        doctor_count = func.coalesce(doctors.c.doctors, 0)
+        appointment_count = func.coalesce(visits.c.appointments, 0)
+        q = (
+            db.query(
+                Specialization.id,
+                Specialization.name,
+                doctor_count.label('doctors'),
+                appointment_count.label('appointments'),
+                func.coalesce(visits.c.completed, 0).label('completed'),
+            )
+            .outerjoin(doctors, doctors.c.specialization_id == Specialization.id)
+            .outerjoin(visits, visits.c.specialization_id == Specialization.id)
+            .order_by(desc(doctor_count), desc(appointment_count), Specialization.id)
             .limit(limit)
         )
-        return q.all()
+        rows = [tuple(r) for r in q.all()]
+        _specialization_cache.set(key, rows)
+        return rows
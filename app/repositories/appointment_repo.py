@@ -1,27 +1,49 @@
 """
 Appointment repository - Database access layer for Appointment model
 """
+from typing import Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
+from ..core.pagination import EXPORT_BATCH_SIZE, in_date_range, keyset_page
+from ..core.phone import normalize_phone
 from ..models import Appointment, Patient, User
 from ..schemas import AppointmentCreate, AppointmentWithPatientCreate
-import random
 import uuid
-from ..utils import hash_password, generate_temp_password
+from ..utils import hash_password, generate_temp_password, build_patient_welcome_email
+from .email_outbox_repo import EmailOutboxRepository
+from .serial_repo import patient_serials
+from .slot_repo import SlotRepository
 from datetime import date
 
+# newest first; id breaks ties between appointments on the same day
+APPOINTMENT_PAGE_KEY = (Appointment.appointment_date, Appointment.id)
+
+
 class AppointmentRepository:
     """Repository for Appointment database operations"""
     
     @staticmethod
     def create_appointment(db: Session, appointment: AppointmentCreate) -> Appointment:
+        appointment_time = appointment.appointment_time
+        if appointment.schedule_id:
+            appointment_time = SlotRepository.assign_slot(
+                db,
+                appointment.schedule_id,
+                appointment.doctor_id,
+                appointment.appointment_date,
+                appointment.appointment_time,
+            )
+
         db_appointment = Appointment(
             doctor_id=appointment.doctor_id,
             patient_id=appointment.patient_id,
             schedule_id=appointment.schedule_id,
-            appointment_date=appointment.appointment_date
+            appointment_date=appointment.appointment_date,
+            appointment_time=appointment_time
         )
         db.add(db_appointment)
         db.commit()
+        SlotRepository.invalidate(appointment.schedule_id, appointment.appointment_date)
         db.refresh(db_appointment)
         return db_appointment
 
@@ -32,14 +54,14 @@ class AppointmentRepository:
     ) -> Appointment:
         
         existing_user = None
-        
+
         if data.patient.phone:
             existing_user = (
                 db.query(User)
                 .join(Patient, Patient.id == User.id)
                 .filter(
                     User.role == "patient",
-                    Patient.phone == data.patient.phone
+                    Patient.phone == normalize_phone(data.patient.phone)
                 )
                 .first()
             )
@@ -63,19 +85,11 @@ class AppointmentRepository:
                 raise ValueError("User exists but patient record not found")
             
             patient_id = existing_patient.id
-            temp_password = None  # No new password needed
-            email = existing_user.email
             
         else:
             # ✨ Create new patient (original logic)
-            def generate_8digit_id():
-                return random.randint(10000000, 99999999)
-
-            serial_number = generate_8digit_id()
-            while db.query(Patient).filter(
-                Patient.serial_number == serial_number
-            ).first():
-                serial_number = generate_8digit_id()
+            # served from a reserved block, no query per booking
+            serial_number = patient_serials.allocate(db)
 
             temp_password = generate_temp_password()
             hashed_password = hash_password(temp_password)
@@ -105,24 +119,39 @@ class AppointmentRepository:
             
             patient_id = new_patient.id
 
+            # Queue the credentials mail in this transaction; the outbox
+            # dispatcher delivers it after commit, off the request path
+            if email:
+                subject, body = build_patient_welcome_email(email, temp_password)
+                EmailOutboxRepository.enqueue(db, email, subject, body)
+
+        # Lock the schedule and pick the slot only now, after the patient
+        # lookups and password hashing, so concurrent bookings against the
+        # same schedule queue up for the inserts and commit alone
+        appointment_time = data.appointment_time
+        if data.schedule_id:
+            appointment_time = SlotRepository.assign_slot(
+                db,
+                data.schedule_id,
+                data.doctor_id,
+                data.appointment_date,
+                data.appointment_time,
+            )
+
         # 3️⃣ Create appointment (works for both new and existing patients)
         new_appointment = Appointment(
             doctor_id=data.doctor_id,
             patient_id=patient_id,
             schedule_id=data.schedule_id,
             appointment_date=data.appointment_date,
-            appointment_time=data.appointment_time
+            appointment_time=appointment_time
         )
         db.add(new_appointment)
 
         db.commit()
+        SlotRepository.invalidate(data.schedule_id, data.appointment_date)
         db.refresh(new_appointment)
 
-        # Attach metadata only if new patient was created
-        if temp_password:
-            new_appointment._temp_password = temp_password
-            new_appointment._email = email
-
         return new_appointment
     @staticmethod
     def get_appointment_by_id(db: Session, appointment_id: int) -> Appointment:
@@ -130,44 +159,90 @@ class AppointmentRepository:
         return db.query(Appointment).filter(Appointment.id == appointment_id).first()
     
     @staticmethod
-    def get_appointments_by_patient(db: Session, patient_id: int):
-        
-        return db.query(Appointment).options(joinedload(Appointment.patient)).filter(Appointment.patient_id == patient_id).all()
-    
+    def _patient_appointments(db: Session, patient_id: int, date_from: Optional[date], date_to: Optional[date]):
+        query = db.query(Appointment).filter(Appointment.patient_id == patient_id)
+        return in_date_range(query, Appointment.appointment_date, date_from, date_to)
+
     @staticmethod
-    def get_appointments_by_doctor(db: Session, doctor_id: int):
-        """Get all appointments for a doctor"""
-        return (
-        db.query(Appointment)
-        .options(joinedload(Appointment.patient))  # load patient relationship
-        .filter(Appointment.doctor_id == doctor_id)
-        .all()
-    )
+    def _doctor_appointments(db: Session, doctor_id: int, date_from: Optional[date], date_to: Optional[date]):
+        query = (
+            db.query(Appointment)
+            .options(joinedload(Appointment.patient).joinedload(Patient.blood_group))  # load patient relationship
+            .filter(Appointment.doctor_id == doctor_id)
+        )
+        return in_date_range(query, Appointment.appointment_date, date_from, date_to)
+
     @staticmethod
-    def get_patients_by_doctor(db: Session, doctor_id: int):
-    
-        patients = (
+    def get_appointments_by_patient(
+        db: Session,
+        patient_id: int,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ):
+        """Page of a patient's appointments, newest first; returns (items, next_cursor)"""
+        query = AppointmentRepository._patient_appointments(db, patient_id, date_from, date_to)
+        return keyset_page(query, APPOINTMENT_PAGE_KEY, cursor, limit=limit, descending=True)
+
+    @staticmethod
+    def iter_appointments_by_patient(db: Session, patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """All of a patient's appointments, newest first, fetched in batches"""
+        query = AppointmentRepository._patient_appointments(db, patient_id, date_from, date_to)
+        return query.order_by(*[c.desc() for c in APPOINTMENT_PAGE_KEY]).yield_per(EXPORT_BATCH_SIZE)
+
+    @staticmethod
+    def get_appointments_by_doctor(
+        db: Session,
+        doctor_id: int,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ):
+        """Page of a doctor's appointments, newest first; returns (items, next_cursor)"""
+        query = AppointmentRepository._doctor_appointments(db, doctor_id, date_from, date_to)
+        return keyset_page(query, APPOINTMENT_PAGE_KEY, cursor, limit=limit, descending=True)
+
+    @staticmethod
+    def iter_appointments_by_doctor(db: Session, doctor_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """All of a doctor's appointments with patients, newest first, fetched in batches"""
+        query = AppointmentRepository._doctor_appointments(db, doctor_id, date_from, date_to)
+        return query.order_by(*[c.desc() for c in APPOINTMENT_PAGE_KEY]).yield_per(EXPORT_BATCH_SIZE)
+
+    @staticmethod
+    def get_patients_by_doctor(
+        db: Session,
+        doctor_id: int,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ):
+        """Page of distinct patients seen by a doctor, by id; returns (items, next_cursor)"""
+        query = (
             db.query(Patient)
             .join(Appointment, Appointment.patient_id == Patient.id)
             .filter(Appointment.doctor_id == doctor_id)
-            .distinct()
-            .all()
         )
-        return patients
+        query = in_date_range(query, Appointment.appointment_date, date_from, date_to).distinct()
+        return keyset_page(query, [Patient.id], cursor, limit=limit)
     @staticmethod
-    def get_all_appointments(db: Session, skip: int = 0, limit: int = 100):
-        """Get all appointments with pagination"""
-        return db.query(Appointment).offset(skip).limit(limit).all()
+    def get_all_appointments(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of appointments ordered by id; returns (items, next_cursor)"""
+        return keyset_page(db.query(Appointment), [Appointment.id], cursor, skip, limit)
     
     @staticmethod
     def update_appointment(db: Session, appointment_id: int, update_data: dict) -> Appointment:
         """Update appointment"""
         appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
         if appointment:
+            SlotRepository.invalidate(appointment.schedule_id, appointment.appointment_date)
             for key, value in update_data.items():
                 setattr(appointment, key, value)
             db.commit()
             db.refresh(appointment)
+            SlotRepository.invalidate(appointment.schedule_id, appointment.appointment_date)
         return appointment
     
     @staticmethod
@@ -175,8 +250,10 @@ class AppointmentRepository:
         """Delete appointment"""
         appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
         if appointment:
+            schedule_id, appointment_date = appointment.schedule_id, appointment.appointment_date
             db.delete(appointment)
             db.commit()
+            SlotRepository.invalidate(schedule_id, appointment_date)
             return True
         return False
     
@@ -194,6 +271,20 @@ class AppointmentRepository:
             .all()
         )
     
+    @staticmethod
+    def count_booked_by_doctor_day(db: Session, date_from: date, date_to: date) -> dict:
+        """(doctor_id, date) -> non-cancelled appointments in [date_from, date_to]"""
+        rows = (
+            db.query(Appointment.doctor_id, Appointment.appointment_date, func.count(Appointment.id))
+            .filter(
+                Appointment.appointment_date >= date_from,
+                Appointment.appointment_date <= date_to,
+                Appointment.status != "cancelled",
+            )
+            .group_by(Appointment.doctor_id, Appointment.appointment_date)
+        )
+        return {(doctor_id, day): count for doctor_id, day, count in rows}
+
     @staticmethod
     def get_appointment_count_today(db: Session, doctor_id: int) -> int:
         """Get count of appointments for a doctor today"""
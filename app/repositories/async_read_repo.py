@@ -0,0 +1,77 @@
+"""
+Async read repository - AsyncSession variants of the hot read paths
+
+Everything the response models serialize is eager-loaded, since lazy loads
+are not available on an AsyncSession.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from ..core.pagination import in_date_range, keyset_query, keyset_split
+from ..models import Appointment, Patient, Prescription, PrescriptionMedicine
+from .appointment_repo import APPOINTMENT_PAGE_KEY
+from .doctor_repo import DOCTOR_OUT_OPTIONS
+from .patient_repo import dashboard_cache, dashboard_counts_query
+from .prescription_repo import PRESCRIPTION_PAGE_KEY
+
+
+class AsyncReadRepository:
+    """Async repository for doctor appointments, patient dashboard and prescription history"""
+
+    @staticmethod
+    async def get_appointments_by_doctor(
+        db: AsyncSession,
+        doctor_id: int,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ):
+        """Page of a doctor's appointments with the patient loaded; returns (items, next_cursor)"""
+        stmt = (
+            select(Appointment)
+            .options(joinedload(Appointment.patient).joinedload(Patient.blood_group))
+            .filter(Appointment.doctor_id == doctor_id)
+        )
+        stmt = in_date_range(stmt, Appointment.appointment_date, date_from, date_to)
+        result = await db.execute(keyset_query(stmt, APPOINTMENT_PAGE_KEY, cursor, limit=limit, descending=True))
+        return keyset_split(result.scalars().all(), APPOINTMENT_PAGE_KEY, limit)
+
+    @staticmethod
+    async def get_patient_dashboard_counts(db: AsyncSession, patient_id: int) -> dict:
+        """Upcoming appointments, visited doctors and prescriptions for a patient"""
+        today = date.today()
+        cached = dashboard_cache.get(patient_id)
+        if cached is not None and cached[0] == today:
+            return dict(cached[1])
+        row = (await db.execute(dashboard_counts_query(patient_id, today))).one()
+        counts = {key: value or 0 for key, value in row._mapping.items()}
+        dashboard_cache.set(patient_id, (today, counts))
+        return dict(counts)
+
+    @staticmethod
+    async def get_prescriptions_by_patient(
+        db: AsyncSession,
+        patient_id: int,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ):
+        """Page of a patient's prescriptions with medicines and the treating doctor; returns (items, next_cursor)"""
+        doctor = selectinload(Prescription.appointment).selectinload(Appointment.doctor)
+        stmt = (
+            select(Prescription)
+            .options(
+                selectinload(Prescription.medicines).selectinload(PrescriptionMedicine.medicine),
+                doctor.options(*DOCTOR_OUT_OPTIONS),
+            )
+            .filter(Prescription.patient_id == patient_id)
+        )
+        stmt = in_date_range(stmt, Prescription.created_at, date_from, date_to)
+        result = await db.execute(keyset_query(stmt, PRESCRIPTION_PAGE_KEY, cursor, limit=limit, descending=True))
+        return keyset_split(result.scalars().all(), PRESCRIPTION_PAGE_KEY, limit)
@@ -0,0 +1,259 @@
+"""
+Doctor availability index - in-memory "who has free capacity on these days"
+
+Per weekday the index holds each approved doctor's capacity (the slot count
+of every schedule running that day, as booking materializes them); per
+date it holds booked appointment counts. A query subtracts one from the
+other for every day in the range, so it never touches appointments.
+
+Booked counts for a date are loaded on first use with one grouped query
+over ix_appointments_date and reloaded once older than
+AVAILABILITY_REFRESH_SECONDS, which bounds staleness from other
+processes. ORM writes to appointments, schedules and doctors in this
+process are applied when their transaction commits; schedules and doctors
+are reloaded every AVAILABILITY_REBUILD_SECONDS.
+"""
+import heapq
+import threading
+import time
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import Appointment, Doctor, DoctorSchedule
+from .appointment_repo import AppointmentRepository
+from .doctor_repo import DoctorRepository
+from .schedule_repo import ScheduleRepository
+from .slot_repo import materialize_slots, schedule_runs_on
+
+# any Monday; day i of the week is _MONDAY + i days
+_MONDAY = date(2024, 1, 1)
+
+
+def _schedule_entry(schedule) -> tuple:
+    """(doctor_id, slots per weekday) of a schedule, 0 on days it does not run"""
+    capacity = len(materialize_slots(schedule))
+    weekly = tuple(capacity if schedule_runs_on(schedule, _MONDAY + timedelta(days=i)) else 0 for i in range(7))
+    return schedule.doctor_id, weekly
+
+
+class AvailabilityIndex:
+    """Weekday capacities and per-date booked counts for approved doctors"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget everything; the next query rebuilds"""
+        with self._lock:
+            self._schedules: dict[int, tuple] = {}
+            self._doctors: dict[int, str] = {}
+            # weekday -> doctor id -> slots that day
+            self._capacity: list[dict[int, int]] = [{} for _ in range(7)]
+            # weekday -> sorted doctor ids of _capacity[weekday], rebuilt on change
+            self._ordered: list[Optional[list]] = [None] * 7
+            # date -> doctor id -> booked appointments; when each date was loaded
+            self._booked: dict[date, dict[int, int]] = {}
+            self._loaded_at: dict[date, float] = {}
+            self._built_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._built_at is not None
+
+    def build(self, db: Session) -> int:
+        """(Re)load schedules and approved doctors; returns the number of doctors"""
+        schedules = {s.id: _schedule_entry(s) for s in ScheduleRepository.iter_schedules(db)}
+        doctors = DoctorRepository.get_names_by_status(db, "approved")
+        with self._lock:
+            self._schedules, self._doctors = schedules, doctors
+            self._capacity = [{} for _ in range(7)]
+            self._ordered = [None] * 7
+            for entry in schedules.values():
+                self._add_capacity(*entry)
+            self._built_at = time.monotonic()
+        return len(doctors)
+
+    def _load_days(self, db: Session, days: list) -> None:
+        """Reload booked counts for `days` (ascending) in one grouped query"""
+        booked = AppointmentRepository.count_booked_by_doctor_day(db, days[0], days[-1])
+        loaded_at = time.monotonic()
+        wanted = set(days)
+        with self._lock:
+            for day in wanted:
+                self._booked[day] = {}
+                self._loaded_at[day] = loaded_at
+            for (doctor_id, day), count in booked.items():
+                if day in wanted:
+                    self._booked[day][doctor_id] = count
+            # forget dates that have gone by
+            for day in [d for d in self._booked if d < date.today()]:
+                self._booked.pop(day, None)
+                self._loaded_at.pop(day, None)
+
+    def available(self, db: Session, date_from: date, date_to: date, limit: int = 100) -> list[dict]:
+        """Approved doctors with free capacity on any day in [date_from, date_to], by doctor id"""
+        now = time.monotonic()
+        if self._built_at is None or now - self._built_at > settings.AVAILABILITY_REBUILD_SECONDS:
+            self.build(db)
+        days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+        stale = [d for d in days if now - self._loaded_at.get(d, float("-inf")) > settings.AVAILABILITY_REFRESH_SECONDS]
+        if stale:
+            self._load_days(db, stale)
+
+        result = []
+        with self._lock:
+            for doctor_id in self._doctor_ids({day.weekday() for day in days}):
+                if doctor_id not in self._doctors:
+                    continue
+                open_days = []
+                for day in days:
+                    capacity = self._capacity[day.weekday()].get(doctor_id, 0)
+                    taken = self._booked.get(day, {}).get(doctor_id, 0)
+                    if taken < capacity:
+                        open_days.append({"date": day, "capacity": capacity, "booked": taken, "remaining": capacity - taken})
+                if open_days:
+                    result.append({"doctor_id": doctor_id, "full_name": self._doctors[doctor_id], "days": open_days})
+                    if len(result) >= limit:
+                        break
+        return result
+
+    def _doctor_ids(self, weekdays: set):
+        """Doctor ids with a schedule on any of `weekdays`, ascending, without repeats"""
+        for weekday in weekdays:
+            if self._ordered[weekday] is None:
+                self._ordered[weekday] = sorted(self._capacity[weekday])
+        last = None
+        for doctor_id in heapq.merge(*(self._ordered[w] for w in weekdays)):
+            if doctor_id != last:
+                last = doctor_id
+                yield doctor_id
+
+    def book(self, doctor_id: int, day: Optional[date], delta: int) -> None:
+        with self._lock:
+            booked = self._booked.get(day)
+            if booked is not None:
+                booked[doctor_id] = max(0, booked.get(doctor_id, 0) + delta)
+
+    def upsert_schedule(self, schedule_id: int, entry: tuple) -> None:
+        with self._lock:
+            self._set_schedule(schedule_id, entry)
+
+    def remove_schedule(self, schedule_id: int) -> None:
+        with self._lock:
+            self._set_schedule(schedule_id, None)
+
+    def _set_schedule(self, schedule_id: int, entry: Optional[tuple]) -> None:
+        old = self._schedules.pop(schedule_id, None)
+        if old is not None:
+            self._add_capacity(*old, sign=-1)
+        if entry is not None:
+            self._schedules[schedule_id] = entry
+            self._add_capacity(*entry)
+
+    def _add_capacity(self, doctor_id: int, weekly: tuple, sign: int = 1) -> None:
+        for weekday, slots in enumerate(weekly):
+            if slots:
+                self._ordered[weekday] = None
+                capacity = self._capacity[weekday]
+                value = capacity.get(doctor_id, 0) + sign * slots
+                if value > 0:
+                    capacity[doctor_id] = value
+                else:
+                    capacity.pop(doctor_id, None)
+
+    def set_doctor(self, doctor_id: int, full_name: Optional[str], status: Optional[str]) -> None:
+        with self._lock:
+            if status == "approved":
+                self._doctors[doctor_id] = full_name
+            else:
+                self._doctors.pop(doctor_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "doctors": len(self._doctors),
+            "schedules": len(self._schedules),
+            "days_loaded": len(self._booked),
+        }
+
+
+availability_index = AvailabilityIndex()
+
+
+def _counted(doctor_id, day, status) -> Optional[tuple]:
+    """The (doctor, date) an appointment takes capacity from, or None if cancelled"""
+    if doctor_id is None or day is None or status == "cancelled":
+        return None
+    return doctor_id, day
+
+
+def _previous(state, key: str):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, key)
+
+
+# Keep the index in step with ORM writes: collect changes per flush (while
+# attribute history still shows the previous values) and apply them once
+# the surrounding transaction has committed.
+@event.listens_for(Session, "after_flush")
+def _collect_availability_changes(session, flush_context):
+    if not availability_index.ready:
+        return
+    changes = session.info.setdefault("availability_changes", [])
+    for obj in session.new:
+        if isinstance(obj, Appointment):
+            changes.append(("book", _counted(obj.doctor_id, obj.appointment_date, obj.status), 1))
+    for obj in session.dirty:
+        if isinstance(obj, Appointment):
+            state = inspect(obj)
+            before = _counted(*(_previous(state, k) for k in ("doctor_id", "appointment_date", "status")))
+            after = _counted(obj.doctor_id, obj.appointment_date, obj.status)
+            if before != after:
+                changes.append(("book", before, -1))
+                changes.append(("book", after, 1))
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            state = inspect(obj)
+            changes.append(("book", _counted(*(_previous(state, k) for k in ("doctor_id", "appointment_date", "status"))), -1))
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, DoctorSchedule):
+            changes.append(("schedule", obj.id, _schedule_entry(obj)))
+        elif isinstance(obj, Doctor):
+            changes.append(("doctor", obj.id, (obj.full_name, obj.status)))
+    for obj in session.deleted:
+        if isinstance(obj, DoctorSchedule):
+            changes.append(("schedule", obj.id, None))
+        elif isinstance(obj, Doctor):
+            changes.append(("doctor", obj.id, (None, None)))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_availability_changes(session):
+    if session.in_nested_transaction():
+        # a savepoint was released; the outer transaction may still roll back
+        return
+    for kind, key, value in session.info.pop("availability_changes", ()):
+        if kind == "book":
+            if key is not None:
+                availability_index.book(*key, value)
+        elif kind == "schedule":
+            if value is None:
+                availability_index.remove_schedule(key)
+            else:
+                availability_index.upsert_schedule(key, value)
+        else:
+            availability_index.set_doctor(key, *value)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_availability_changes(session, transaction):
+    # outermost transaction ended without a commit applying the changes
+    if transaction.parent is None:
+        session.info.pop("availability_changes", None)
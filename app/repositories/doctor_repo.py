@@ -1,10 +1,55 @@
 """
 Doctor repository - Database access layer for Doctor model
 """
-from sqlalchemy.orm import Session
-from ..models import Doctor, Appointment, Patient, Specialization, Institute, Qualification
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session, object_session, selectinload
+from ..core.cache import TTLCache, evict_on_commit
+from ..core.config import settings
+from ..core.pagination import keyset_page
+from ..database import replica_read
+from ..models import (
+    Doctor, Appointment, Patient, Prescription, Specialization, Institute, Qualification,
+    doctor_specializations, doctor_institutes, doctor_qualifications,
+)
 from ..schemas import DoctorCreate
 
+# everything DoctorOut serializes: one SELECT ... IN per relationship for a
+# whole page instead of three lazy loads per doctor
+DOCTOR_OUT_OPTIONS = (
+    selectinload(Doctor.specializations),
+    selectinload(Doctor.institutes),
+    selectinload(Doctor.qualifications),
+)
+
+# directory facet -> (association column, facet model); filters within a
+# facet are OR'ed, facets are AND'ed
+DOCTOR_FACETS = {
+    "specializations": (doctor_specializations.c.specialization_id, Specialization),
+    "institutes": (doctor_institutes.c.institute_id, Institute),
+    "qualifications": (doctor_qualifications.c.qualification_id, Qualification),
+}
+# most common values returned per facet
+DIRECTORY_FACET_LIMIT = 50
+# filter combination -> (total, facets)
+_facet_cache = TTLCache(maxsize=settings.DOCTOR_DIRECTORY_FACET_CACHE_SIZE, ttl=settings.DOCTOR_DIRECTORY_FACET_TTL_SECONDS)
+
+# doctor id -> (day, dashboard counts); dropped when the doctor's
+# appointments or their prescriptions change through this process
+dashboard_cache = TTLCache(maxsize=settings.DOCTOR_DASHBOARD_CACHE_SIZE, ttl=settings.DOCTOR_DASHBOARD_CACHE_TTL_SECONDS)
+evict_on_commit(dashboard_cache, Appointment, lambda a: a.doctor_id)
+
+
+def _prescription_doctor_id(prescription: Prescription) -> Optional[int]:
+    # a freshly inserted prescription has appointment_id but no loaded appointment
+    appointment = prescription.appointment or object_session(prescription).get(Appointment, prescription.appointment_id)
+    return appointment.doctor_id if appointment else None
+
+
+evict_on_commit(dashboard_cache, Prescription, _prescription_doctor_id)
+
 
 class DoctorRepository:
     
@@ -60,17 +105,103 @@ class DoctorRepository:
     
     @staticmethod
     def get_doctor_by_id(db: Session, doctor_id: int) -> Doctor:
-        return db.query(Doctor).filter(Doctor.id == doctor_id).first()
+        return db.query(Doctor).options(*DOCTOR_OUT_OPTIONS).filter(Doctor.id == doctor_id).first()
     
     @staticmethod
-    def get_all_doctors(db: Session, skip: int = 0, limit: int = 100):
-        """Get all doctors with pagination"""
-        return db.query(Doctor).offset(skip).limit(limit).all()
+    @replica_read
+    def get_all_doctors(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of doctors ordered by id; returns (items, next_cursor)"""
+        return keyset_page(db.query(Doctor).options(*DOCTOR_OUT_OPTIONS), [Doctor.id], cursor, skip, limit)
     
     @staticmethod
+    def _directory_filters(
+        selected: dict,
+        status: Optional[str],
+        fee_min: Optional[Decimal],
+        fee_max: Optional[Decimal],
+        min_experience: Optional[int],
+        skip_facet: Optional[str] = None,
+    ) -> list:
+        clauses = []
+        if status:
+            clauses.append(Doctor.status == status)
+        if fee_min is not None:
+            clauses.append(Doctor.consultation_fee >= fee_min)
+        if fee_max is not None:
+            clauses.append(Doctor.consultation_fee <= fee_max)
+        if min_experience is not None:
+            clauses.append(Doctor.experience >= min_experience)
+        for facet, ids in selected.items():
+            if ids and facet != skip_facet:
+                column = DOCTOR_FACETS[facet][0]
+                clauses.append(Doctor.id.in_(select(column.table.c.doctor_id).where(column.in_(ids))))
+        return clauses
+
+    @staticmethod
+    @replica_read
+    def search_directory(
+        db: Session,
+        selected: dict,
+        status: Optional[str] = "approved",
+        fee_min: Optional[Decimal] = None,
+        fee_max: Optional[Decimal] = None,
+        min_experience: Optional[int] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """Page of doctors matching the filters, their total and per-facet counts.
+
+        `selected` maps facet names to the ids to match. Each facet is counted
+        against every filter except its own, so the counts show what picking
+        another value of that facet would return. Total and facets are cached
+        for DOCTOR_DIRECTORY_FACET_TTL_SECONDS per filter combination.
+        """
+        clauses = DoctorRepository._directory_filters(selected, status, fee_min, fee_max, min_experience)
+        items, next_cursor = keyset_page(
+            db.query(Doctor).options(*DOCTOR_OUT_OPTIONS).filter(*clauses), [Doctor.id], cursor, 0, limit
+        )
+        key = (
+            status, fee_min, fee_max, min_experience,
+            tuple(sorted((facet, tuple(sorted(ids))) for facet, ids in selected.items() if ids)),
+        )
+        cached = _facet_cache.get(key)
+        if cached is None:
+            cached = (
+                db.query(func.count(Doctor.id)).filter(*clauses).scalar(),
+                DoctorRepository._facet_counts(db, selected, status, fee_min, fee_max, min_experience),
+            )
+            _facet_cache.set(key, cached)
+        total, facets = cached
+        return {"items": items, "total": total, "facets": facets, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _facet_counts(db: Session, selected: dict, status, fee_min, fee_max, min_experience) -> dict:
+        facets = {}
+        for facet, (column, model) in DOCTOR_FACETS.items():
+            link = column.table
+            count = func.count(link.c.doctor_id)
+            rows = (
+                db.query(model.id, model.name, count.label("count"))
+                .join(link, column == model.id)
+                .join(Doctor, Doctor.id == link.c.doctor_id)
+                .filter(*DoctorRepository._directory_filters(selected, status, fee_min, fee_max, min_experience, facet))
+                .group_by(model.id, model.name)
+                .order_by(count.desc(), model.name)
+                .limit(DIRECTORY_FACET_LIMIT)
+            )
+            facets[facet] = [{"id": r.id, "name": r.name, "count": r.count} for r in rows]
+        return facets
+
+    @staticmethod
+    @replica_read
     def get_doctors_by_status(db: Session, status: str):
         """Get doctors by status"""
-        return db.query(Doctor).filter(Doctor.status == status).all()
+        return db.query(Doctor).options(*DOCTOR_OUT_OPTIONS).filter(Doctor.status == status).all()
+    
+    @staticmethod
+    def get_names_by_status(db: Session, status: str) -> dict:
+        """Doctor id -> full name for every doctor with `status`"""
+        return dict(db.query(Doctor.id, Doctor.full_name).filter(Doctor.status == status).all())
     
     @staticmethod
     def update_doctor(db: Session, doctor_id: int, update_data: dict) -> Doctor:
@@ -93,6 +224,30 @@ class DoctorRepository:
             return True
         return False
     
+    @staticmethod
+    def get_dashboard_counts(db: Session, doctor_id: int) -> dict:
+        """Today's appointments, distinct patients and prescriptions written for a
+        doctor in one pass over ix_appointments_doctor_date_patient, served from
+        dashboard_cache for up to DOCTOR_DASHBOARD_CACHE_TTL_SECONDS"""
+        today = date.today()
+        cached = dashboard_cache.get(doctor_id)
+        if cached is not None and cached[0] == today:
+            return dict(cached[1])
+        query = (
+            select(
+                func.count(case((Appointment.appointment_date == today, Appointment.id))).label("today_appointments"),
+                func.count(func.distinct(Appointment.patient_id)).label("total_patients"),
+                func.count(Prescription.id).label("pending_reports"),
+            )
+            .select_from(Appointment)
+            .outerjoin(Prescription, Prescription.appointment_id == Appointment.id)
+            .where(Appointment.doctor_id == doctor_id)
+        )
+        row = db.execute(query).one()
+        counts = {key: value or 0 for key, value in row._mapping.items()}
+        dashboard_cache.set(doctor_id, (today, counts))
+        return dict(counts)
+
     @staticmethod
     def get_patient_count(db: Session, doctor_id: int) -> int:
         """Get total number of unique patients for a doctor"""
@@ -0,0 +1,75 @@
+"""
+Email outbox repository - Database access layer for EmailOutbox model
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..models import EmailOutbox
+
+
+class EmailOutboxRepository:
+    """Repository for the transactional e-mail outbox"""
+
+    @staticmethod
+    def enqueue(db: Session, to_email: str, subject: str, body: str) -> EmailOutbox:
+        """Queue a message; it is committed together with the caller's transaction"""
+        message = EmailOutbox(
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+        )
+        db.add(message)
+        return message
+
+    @staticmethod
+    def claim_due(db: Session, limit: int, now: Optional[datetime] = None):
+        """Lock and return up to `limit` pending messages whose retry time has come.
+
+        SKIP LOCKED lets several dispatchers share the table without
+        sending the same row twice.
+        """
+        now = now or datetime.utcnow()
+        return (
+            db.query(EmailOutbox)
+            .filter(
+                EmailOutbox.status == "pending",
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    @staticmethod
+    def mark_sent(message: EmailOutbox) -> None:
+        message.status = "sent"
+        message.sent_at = datetime.utcnow()
+        message.attempts = (message.attempts or 0) + 1
+        message.last_error = None
+        # the body carries a temporary password; don't keep it around once delivered
+        message.body = None
+
+    @staticmethod
+    def mark_failed(
+        message: EmailOutbox,
+        error: str,
+        max_attempts: int,
+        backoff_seconds: int,
+        backoff_max_seconds: int,
+    ) -> None:
+        """Record a failed attempt and schedule the retry with exponential backoff"""
+        message.attempts = (message.attempts or 0) + 1
+        message.last_error = error[:500]
+        if message.attempts >= max_attempts:
+            message.status = "failed"
+            # never delivered, so the temporary password in it is no use either
+            message.body = None
+            return
+        delay = min(backoff_seconds * 2 ** (message.attempts - 1), backoff_max_seconds)
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
@@ -0,0 +1,311 @@
+"""
+Medicine typeahead index - in-memory prefix search over the medicine catalog
+
+Every medicine contributes its normalized full name plus each word of its
+name, strength and form as terms. Terms live in one sorted array, so the
+medicines matching a prefix are a contiguous `bisect` range. Ranking uses
+how closely the name matches and how often the medicine was prescribed.
+
+Misspelled names ("paracetmol") are matched through a trigram index over
+the normalized names: candidates sharing the most trigrams with the query
+(at least MIN_TRIGRAM_OVERLAP of them) are re-checked with a bounded edit
+distance. Drug names differ by a letter or two ("hydroxyzine" and
+"hydralazine"), so the edit budget stays small.
+
+Built at startup; ORM writes to Medicine in this process are applied after
+their transaction commits, and prescriptions bump the usage counts. Writes
+the ORM events never see (other workers, bulk updates such as the dedupe
+job) are picked up by a background rebuild once the index is older than
+MEDICINE_INDEX_REBUILD_SECONDS; until then callers drop ids that no longer
+exist (MedicineService resolves results against the database).
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import Counter
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import Medicine
+from .medicine_repo import MedicineRepository, normalize_medicine_text
+
+logger = logging.getLogger(__name__)
+
+# largest prefix range scanned for candidates; wider ranges come from 1-2
+# character prefixes and are cut down before ranking
+MAX_CANDIDATES = 2000
+# single-word queries up to this length match too much of the catalog to rank
+# per keystroke, so their results are cached until the catalog changes or
+# SHORT_PREFIX_TTL_SECONDS pass (usage counts drift in the meantime)
+SHORT_PREFIX_LENGTH = 2
+SHORT_PREFIX_TTL_SECONDS = 60
+SHORT_PREFIX_RESULTS = 50
+# distinct names sharing the most trigrams with a fuzzy query that get an
+# edit distance check
+FUZZY_CANDIDATES = 100
+# share of the query's trigrams a candidate name must contain; a single edit
+# in a short name already costs up to three of them
+MIN_TRIGRAM_OVERLAP = 0.5
+# names shorter than this tolerate one edit, longer ones two
+LONG_NAME_LENGTH = 8
+
+
+@dataclass
+class IndexedMedicine:
+    id: int
+    name: str
+    strength: Optional[str]
+    form: Optional[str]
+    manufacturer: Optional[str]
+    normalized_name: str
+    terms: tuple
+
+
+def _terms(name: str, strength: Optional[str], form: Optional[str]) -> tuple:
+    normalized_name = normalize_medicine_text(name)
+    words = set(normalized_name.split())
+    for value in (strength, form):
+        words.update(normalize_medicine_text(value).split())
+    words.add(normalized_name)
+    return normalized_name, tuple(sorted(w for w in words if w))
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(text: str) -> int:
+    """Edit distance still treated as a misspelling: 1 below LONG_NAME_LENGTH characters, else 2"""
+    return 1 if len(text) < LONG_NAME_LENGTH else 2
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance of `a` and `b`, or `limit + 1` once it must exceed `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class MedicineIndex:
+    """Sorted (term, id) array with per-medicine prescription counts"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: list[tuple[str, int]] = []
+        self._entries: dict[int, IndexedMedicine] = {}
+        self._usage: dict[int, int] = {}
+        self._short: dict[str, tuple[float, list]] = {}
+        # trigram -> normalized names, name -> medicine ids (one name, many strengths)
+        self._grams: dict[str, set[str]] = {}
+        self._names: dict[str, set[int]] = {}
+        self._session_factory: Optional[Callable] = None
+        self._built_at: Optional[float] = None
+        self._rebuilding = False
+        self.ready = False
+
+    def build(self, session_factory: Callable) -> int:
+        """Load the whole catalog and usage counts; returns the number of medicines"""
+        db = session_factory()
+        try:
+            rows = list(MedicineRepository.iter_catalog(db))
+            usage = MedicineRepository.get_usage_counts(db)
+        finally:
+            db.close()
+        entries, keys, grams, names = {}, [], {}, {}
+        for row in rows:
+            entry = self._entry(row.id, row.name, row.strength, row.form, row.manufacturer)
+            entries[entry.id] = entry
+            keys.extend((term, entry.id) for term in entry.terms)
+            names.setdefault(entry.normalized_name, set()).add(entry.id)
+        for name in names:
+            for gram in trigrams(name):
+                grams.setdefault(gram, set()).add(name)
+        keys.sort()
+        with self._lock:
+            self._entries, self._keys, self._usage = entries, keys, usage
+            self._grams, self._names = grams, names
+            self._short = {}
+            self._session_factory, self._built_at = session_factory, time.monotonic()
+            self.ready = True
+        return len(entries)
+
+    def rebuild_if_stale(self, max_age: Optional[float] = None) -> bool:
+        """Start a background rebuild once the index is older than `max_age`
+        (MEDICINE_INDEX_REBUILD_SECONDS); searches keep using the current one"""
+        max_age = settings.MEDICINE_INDEX_REBUILD_SECONDS if max_age is None else max_age
+        with self._lock:
+            if not self.ready or self._rebuilding or time.monotonic() - self._built_at < max_age:
+                return False
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name="medicine-index-rebuild", daemon=True).start()
+        return True
+
+    def _rebuild(self) -> None:
+        try:
+            self.build(self._session_factory)
+        except Exception:
+            logger.exception("Medicine index rebuild failed")
+        finally:
+            self._rebuilding = False
+
+    @staticmethod
+    def _entry(medicine_id, name, strength, form, manufacturer) -> IndexedMedicine:
+        normalized_name, terms = _terms(name or "", strength, form)
+        return IndexedMedicine(medicine_id, name, strength, form, manufacturer, normalized_name, terms)
+
+    def upsert(self, medicine_id: int, name: str, strength=None, form=None, manufacturer=None) -> None:
+        entry = self._entry(medicine_id, name, strength, form, manufacturer)
+        with self._lock:
+            self._remove_keys(medicine_id)
+            self._entries[medicine_id] = entry
+            self._short = {}
+            for term in entry.terms:
+                insort(self._keys, (term, medicine_id))
+            ids = self._names.setdefault(entry.normalized_name, set())
+            if not ids:
+                for gram in trigrams(entry.normalized_name):
+                    self._grams.setdefault(gram, set()).add(entry.normalized_name)
+            ids.add(medicine_id)
+
+    def remove(self, medicine_id: int) -> None:
+        with self._lock:
+            self._remove_keys(medicine_id)
+            self._entries.pop(medicine_id, None)
+            self._usage.pop(medicine_id, None)
+            self._short = {}
+
+    def _remove_keys(self, medicine_id: int) -> None:
+        old = self._entries.get(medicine_id)
+        if old is None:
+            return
+        for term in old.terms:
+            i = bisect_left(self._keys, (term, medicine_id))
+            if i < len(self._keys) and self._keys[i] == (term, medicine_id):
+                del self._keys[i]
+        ids = self._names.get(old.normalized_name, set())
+        ids.discard(medicine_id)
+        if not ids:
+            self._names.pop(old.normalized_name, None)
+            for gram in trigrams(old.normalized_name):
+                self._grams.get(gram, set()).discard(old.normalized_name)
+
+    def record_usage(self, medicine_ids: Iterable[int]) -> None:
+        with self._lock:
+            for medicine_id in medicine_ids:
+                self._usage[medicine_id] = self._usage.get(medicine_id, 0) + 1
+
+    def _prefix_range(self, prefix: str) -> tuple[int, int]:
+        return bisect_left(self._keys, (prefix,)), bisect_right(self._keys, (prefix + "\uffff",))
+
+    def search(self, query: str, limit: int = 10) -> list[IndexedMedicine]:
+        """Top `limit` medicines whose terms cover every word of `query` as a prefix"""
+        normalized = normalize_medicine_text(query)
+        tokens = normalized.split()
+        if not tokens or limit <= 0:
+            return []
+        with self._lock:
+            if len(tokens) == 1 and len(normalized) <= SHORT_PREFIX_LENGTH and limit <= SHORT_PREFIX_RESULTS:
+                cached = self._short.get(normalized)
+                if cached is None or cached[0] <= time.monotonic():
+                    cached = (time.monotonic() + SHORT_PREFIX_TTL_SECONDS, self._rank(normalized, tokens, SHORT_PREFIX_RESULTS))
+                    self._short[normalized] = cached
+                return cached[1][:limit]
+            return self._rank(normalized, tokens, limit)
+
+    def _rank(self, normalized: str, tokens: list, limit: int) -> list[IndexedMedicine]:
+        # drive the lookup from the most selective word
+        lo, hi = min((self._prefix_range(t) for t in tokens), key=lambda r: r[1] - r[0])
+        candidates = {medicine_id for _, medicine_id in self._keys[lo:min(hi, lo + MAX_CANDIDATES)]}
+        usage = self._usage
+        scored = []
+        for medicine_id in candidates:
+            entry = self._entries[medicine_id]
+            if len(tokens) > 1 and not all(any(term.startswith(t) for term in entry.terms) for t in tokens):
+                continue
+            name = entry.normalized_name
+            match = 0 if name.startswith(normalized) else 1 if name.startswith(tokens[0]) else 2
+            scored.append((match, -usage.get(medicine_id, 0), len(name), name, medicine_id))
+        return [self._entries[s[-1]] for s in heapq.nsmallest(limit, scored)]
+
+    def fuzzy(self, query: str, limit: int = 10) -> list[tuple[IndexedMedicine, int]]:
+        """Medicines whose name is within `max_edits` of `query` and shares at least
+        MIN_TRIGRAM_OVERLAP of its trigrams, as (medicine, distance), closest first"""
+        normalized = normalize_medicine_text(query)
+        if not normalized or limit <= 0:
+            return []
+        limit_edits = max_edits(normalized)
+        query_grams = trigrams(normalized)
+        min_shared = MIN_TRIGRAM_OVERLAP * len(query_grams)
+        with self._lock:
+            overlap = Counter()
+            for gram in query_grams:
+                overlap.update(self._grams.get(gram, ()))
+            scored = []
+            for name, shared in overlap.most_common(FUZZY_CANDIDATES):
+                if shared < min_shared:
+                    break
+                distance = bounded_levenshtein(normalized, name, limit_edits)
+                if distance > limit_edits:
+                    continue
+                for medicine_id in self._names[name]:
+                    scored.append((distance, -self._usage.get(medicine_id, 0), len(name), name, medicine_id))
+            return [(self._entries[s[-1]], s[0]) for s in heapq.nsmallest(limit, scored)]
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "medicines": len(self._entries), "terms": len(self._keys), "trigrams": len(self._grams)}
+
+
+medicine_index = MedicineIndex()
+
+
+# Keep the index in step with ORM writes: collect changed medicines per flush
+# and apply them once the surrounding transaction has committed.
+@event.listens_for(Session, "after_flush")
+def _collect_medicine_changes(session, flush_context):
+    if not medicine_index.ready:
+        return
+    changes = session.info.setdefault("medicine_index_changes", [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Medicine):
+            changes.append((obj, (obj.id, obj.name, obj.strength, obj.form, obj.manufacturer)))
+    for obj in session.deleted:
+        if isinstance(obj, Medicine):
+            changes.append((obj, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_medicine_changes(session):
+    if session.in_nested_transaction():
+        # a savepoint was released; the outer transaction may still roll back
+        return
+    changes = session.info.pop("medicine_index_changes", None)
+    for obj, values in changes or ():
+        state = inspect(obj)
+        if values is None:
+            if state.was_deleted:
+                medicine_index.remove(state.identity[0])
+        elif not state.transient:
+            # transient again means the insert was rolled back with a savepoint
+            medicine_index.upsert(*values)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_medicine_changes(session, transaction):
+    # outermost transaction ended without a commit applying the changes
+    if transaction.parent is None:
+        session.info.pop("medicine_index_changes", None)
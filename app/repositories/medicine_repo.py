@@ -1,53 +1,185 @@
 """
 Medicine repository - Database access layer for Medicine model
 """
+import hashlib
+import re
+from typing import Optional, Sequence
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from ..models import Medicine
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.pagination import keyset_page
+from ..models import Medicine, PrescriptionMedicine
 from ..schemas import MedicineCreate
 
+MEDICINE_KEY_FIELDS = ("name", "strength", "form", "manufacturer")
+
+# canonical key -> medicine id; rows created by a still-open session are not
+# cached, so a rollback cannot leave a dangling id behind
+_key_cache = TTLCache(maxsize=settings.MEDICINE_KEY_CACHE_SIZE, ttl=settings.MEDICINE_KEY_CACHE_TTL_SECONDS)
+
+
+def normalize_medicine_text(value: Optional[str]) -> str:
+    value = " ".join((value or "").lower().split())
+    # "500 mg" and "500mg" are the same strength
+    return re.sub(r"(\d)\s+(?=[a-z%])", r"\1", value)
+
+
+def medicine_key(name: Optional[str], strength: Optional[str] = None, form: Optional[str] = None, manufacturer: Optional[str] = None) -> str:
+    """Canonical key of a medicine: sha1 of its case/whitespace-normalized fields"""
+    normalized = "|".join(normalize_medicine_text(v) for v in (name, strength, form, manufacturer))
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def _payload_key(medicine) -> str:
+    if isinstance(medicine, dict):
+        return medicine_key(*(medicine.get(f) for f in MEDICINE_KEY_FIELDS))
+    return medicine_key(*(getattr(medicine, f, None) for f in MEDICINE_KEY_FIELDS))
+
+
+def _payload_field(medicine, field: str):
+    return medicine.get(field) if isinstance(medicine, dict) else getattr(medicine, field, None)
+
 
 class MedicineRepository:
 
+    @staticmethod
+    def get_or_create_many(db: Session, medicines: Sequence) -> list[int]:
+        """Resolve medicine payloads (MedicineCreate or dicts) to ids, one per payload.
+
+        Known keys come from the cache or a single IN query; the rest are
+        inserted in one flush inside a savepoint. If a concurrent writer wins
+        the unique key, its rows are re-read and only the remainder retried.
+        Does not commit.
+        """
+        keys = [_payload_key(m) for m in medicines]
+        created = db.info.setdefault("created_medicine_keys", set())
+        ids = {}
+        for key in set(keys):
+            cached = _key_cache.get(key)
+            if cached is not None:
+                ids[key] = cached
+
+        for attempt in range(2):
+            missing = {k for k in keys if k not in ids}
+            if not missing:
+                break
+            query = db.query(Medicine.canonical_key, Medicine.id).filter(Medicine.canonical_key.in_(missing))
+            if attempt:
+                # locking read so MySQL sees rows committed after our snapshot
+                query = query.with_for_update(read=True)
+            for key, medicine_id in query:
+                ids[key] = medicine_id
+                if key not in created:
+                    _key_cache.set(key, medicine_id)
+
+            pending = {}
+            for key, payload in zip(keys, medicines):
+                if key not in ids and key not in pending:
+                    pending[key] = Medicine(
+                        name=_payload_field(payload, "name"),
+                        strength=_payload_field(payload, "strength"),
+                        form=_payload_field(payload, "form"),
+                        manufacturer=_payload_field(payload, "manufacturer"),
+                        canonical_key=key,
+                    )
+            if not pending:
+                break
+            try:
+                with db.begin_nested():
+                    db.add_all(pending.values())
+            except IntegrityError:
+                if attempt:
+                    raise
+                continue
+            ids.update((key, medicine.id) for key, medicine in pending.items())
+            created.update(pending)
+
+        return [ids[k] for k in keys]
+
+    @staticmethod
+    def get_medicine_by_key(db: Session, key: str) -> Optional[Medicine]:
+        return db.query(Medicine).filter(Medicine.canonical_key == key).first()
+
     @staticmethod
     def create_medicine(db: Session, medicine: MedicineCreate) -> Medicine:
-        db_med = Medicine(
-            name=medicine.name,
-            strength=medicine.strength,
-            form=medicine.form,
-            manufacturer=medicine.manufacturer,
-        )
-        db.add(db_med)
+        """Create a medicine, or return the existing one with the same canonical key"""
+        medicine_id = MedicineRepository.get_or_create_many(db, [medicine])[0]
         db.commit()
-        db.refresh(db_med)
-        return db_med
+        return MedicineRepository.get_medicine_by_id(db, medicine_id)
 
     @staticmethod
     def get_medicine_by_id(db: Session, medicine_id: int) -> Medicine:
         return db.query(Medicine).filter(Medicine.id == medicine_id).first()
 
     @staticmethod
-    def get_all_medicines(db: Session, skip: int = 0, limit: int = 100):
-        return db.query(Medicine).offset(skip).limit(limit).all()
+    def get_all_medicines(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of medicines ordered by id; returns (items, next_cursor)"""
+        return keyset_page(db.query(Medicine), [Medicine.id], cursor, skip, limit)
 
     @staticmethod
     def get_medicine_by_name(db: Session, name: str):
         return db.query(Medicine).filter(Medicine.name == name).all()
 
+    @staticmethod
+    def search_by_name_prefix(db: Session, prefix: str, limit: int = 10):
+        """Medicines whose name starts with `prefix`, in name order (a range scan on ix_medicines_name)"""
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return (
+            db.query(Medicine)
+            .filter(Medicine.name.like(f"{escaped}%", escape="\\"))
+            .order_by(Medicine.name)
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def get_existing_ids(db: Session, medicine_ids: Sequence[int]) -> set:
+        """The subset of `medicine_ids` still in the catalog (a primary key lookup)"""
+        if not medicine_ids:
+            return set()
+        return {row.id for row in db.query(Medicine.id).filter(Medicine.id.in_(medicine_ids))}
+
+    @staticmethod
+    def iter_catalog(db: Session, batch_size: int = 1000):
+        """Stream (id, name, strength, form, manufacturer) for every medicine"""
+        return (
+            db.query(Medicine.id, Medicine.name, Medicine.strength, Medicine.form, Medicine.manufacturer)
+            .yield_per(batch_size)
+        )
+
+    @staticmethod
+    def get_usage_counts(db: Session) -> dict:
+        """Number of prescription lines per medicine id"""
+        rows = (
+            db.query(PrescriptionMedicine.medicine_id, func.count(PrescriptionMedicine.id))
+            .group_by(PrescriptionMedicine.medicine_id)
+        )
+        return dict(rows.all())
+
     @staticmethod
     def update_medicine(db: Session, medicine_id: int, update_data: dict) -> Medicine:
         med = db.query(Medicine).filter(Medicine.id == medicine_id).first()
         if med:
+            old_key = med.canonical_key
             for key, value in update_data.items():
                 setattr(med, key, value)
+            med.canonical_key = medicine_key(*(getattr(med, f) for f in MEDICINE_KEY_FIELDS))
             db.commit()
             db.refresh(med)
+            if old_key:
+                _key_cache.pop(old_key)
         return med
 
     @staticmethod
     def delete_medicine(db: Session, medicine_id: int) -> bool:
         med = db.query(Medicine).filter(Medicine.id == medicine_id).first()
         if med:
+            key = med.canonical_key
             db.delete(med)
             db.commit()
+            if key:
+                _key_cache.pop(key)
             return True
         return False
@@ -1,12 +1,42 @@
 """
 Patient repository - Database access layer for Patient model
 """
+from typing import Optional
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
+from ..core.cache import TTLCache, evict_on_commit
+from ..core.config import settings
+from ..core.pagination import keyset_page
+from ..core.phone import normalize_phone, phone_digits_reversed
 from ..models import Patient, Appointment, Prescription
 from datetime import date
 from sqlalchemy.orm import joinedload
 from ..schemas import PatientCreate
 
+# patient id -> (day, dashboard counts); dropped when the patient's
+# appointments or prescriptions change through this process
+dashboard_cache = TTLCache(maxsize=settings.PATIENT_DASHBOARD_CACHE_SIZE, ttl=settings.PATIENT_DASHBOARD_CACHE_TTL_SECONDS)
+evict_on_commit(dashboard_cache, Appointment, lambda a: a.patient_id)
+evict_on_commit(dashboard_cache, Prescription, lambda p: p.patient_id)
+
+
+def dashboard_counts_query(patient_id: int, today: date):
+    """Upcoming appointments, visited doctors and prescriptions in one statement.
+
+    Both appointment counts come from one range scan of
+    ix_appointments_patient_date; prescriptions are a scalar subquery.
+    """
+    prescriptions = (
+        select(func.count(Prescription.id))
+        .where(Prescription.patient_id == patient_id)
+        .scalar_subquery()
+    )
+    return select(
+        func.count(case((Appointment.appointment_date >= today, Appointment.id))).label("upcoming_appointments"),
+        func.count(func.distinct(case((Appointment.appointment_date < today, Appointment.doctor_id)))).label("visited_doctors"),
+        prescriptions.label("active_prescriptions"),
+    ).where(Appointment.patient_id == patient_id)
+
 
 class PatientRepository:
     """Repository for Patient database operations"""
@@ -34,9 +64,9 @@ class PatientRepository:
         return db.query(Patient).filter(Patient.id == patient_id).first()
     
     @staticmethod
-    def get_all_patients(db: Session, skip: int = 0, limit: int = 100):
-        """Get all patients with pagination"""
-        return db.query(Patient).offset(skip).limit(limit).all()
+    def get_all_patients(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of patients ordered by id; returns (items, next_cursor)"""
+        return keyset_page(db.query(Patient), [Patient.id], cursor, skip, limit)
     
     @staticmethod
     def update_patient(db: Session, patient_id: int, update_data: dict) -> Patient:
@@ -59,6 +89,19 @@ class PatientRepository:
             return True
         return False
 
+    @staticmethod
+    def get_dashboard_counts(db: Session, patient_id: int) -> dict:
+        """Dashboard counts for a patient in one round trip, served from
+        dashboard_cache for up to PATIENT_DASHBOARD_CACHE_TTL_SECONDS"""
+        today = date.today()
+        cached = dashboard_cache.get(patient_id)
+        if cached is not None and cached[0] == today:
+            return dict(cached[1])
+        row = db.execute(dashboard_counts_query(patient_id, today)).one()
+        counts = {key: value or 0 for key, value in row._mapping.items()}
+        dashboard_cache.set(patient_id, (today, counts))
+        return dict(counts)
+
     @staticmethod
     def count_upcoming_appointments(db: Session, patient_id: int) -> int:
         """Count appointments for patient where appointment_date >= today"""
@@ -112,9 +155,25 @@ class PatientRepository:
         )
 
     @staticmethod
-    def search_patients_by_phone(db: Session, phone: str):
-     
-        if not phone:
-            return []
-       
-        return db.query(Patient).filter(Patient.phone.contains(phone)).all()
+    def search_patients_by_phone(db: Session, phone: str, limit: int = 20, cursor: Optional[str] = None, match: Optional[str] = None):
+        """Page of patients matching `phone`; returns (items, next_cursor).
+
+        With match="prefix" numbers beginning with `phone` are returned, with
+        match="suffix" numbers ending in its digits. By default a query
+        starting with "+" or "0", or a full-length number, is a prefix and
+        any other digit string a suffix. Either way it is an index range
+        scan, and an exact match sorts first.
+        """
+        digits = "".join(c for c in phone or "" if c.isdigit())
+        if not digits:
+            return [], None
+
+        if match is None:
+            match = "prefix" if phone.strip().startswith(("+", "0")) or len(digits) >= 10 else "suffix"
+        if match == "prefix":
+            column, value = Patient.phone, normalize_phone(phone)
+        else:
+            column, value = Patient.phone_reversed, phone_digits_reversed(digits)
+        # "~" sorts after every digit, so [value, value~) is "starts with value"
+        query = db.query(Patient).filter(column >= value, column < value + "~")
+        return keyset_page(query, [column, Patient.id], cursor, limit=limit)
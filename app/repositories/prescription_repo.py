@@ -1,79 +1,104 @@
 """
 Prescription repository - Database access layer for Prescription model
 """
-from sqlalchemy.orm import joinedload, Session
-from sqlalchemy import func
+from typing import Optional
+from sqlalchemy.orm import joinedload, selectinload, Session
+from ..core.pagination import EXPORT_BATCH_SIZE, in_date_range, keyset_page
+from sqlalchemy import func, insert
 from datetime import date
+from ..database import replica_read
 from ..models import Prescription, Medicine, PrescriptionMedicine, Appointment
+from .doctor_repo import DOCTOR_OUT_OPTIONS
+from .medicine_repo import MedicineRepository
 from ..schemas import PrescriptionCreate, PrescriptionMedicineCreate, MedicineCreate
 
+PRESCRIPTION_PAGE_KEY = (Prescription.created_at, Prescription.id)
+
 
 class PrescriptionRepository:
     """Repository for Prescription database operations"""
     
     @staticmethod
-    def create_prescription(db: Session, prescription: PrescriptionCreate) -> Prescription:
-        """Create a new prescription and associated prescription medicines"""
-        # check for existing prescription for same patient and same doctor on the same day
-        appointment = db.query(Appointment).filter(Appointment.id == prescription.appointment_id).first()
-        if appointment:
-            existing = (
-                db.query(Prescription)
-                .join(Appointment, Prescription.appointment)
-                .filter(
-                    Prescription.patient_id == prescription.patient_id,
-                    Appointment.doctor_id == appointment.doctor_id,
-                    func.date(Prescription.created_at) == date.today(),
+    def create_prescription(db: Session, prescription: PrescriptionCreate, appointment: Optional[Appointment] = None) -> Prescription:
+        """Create a prescription with its medicines in a single transaction.
+
+        New inline medicines and the prescription are flushed together, the
+        prescription_medicines rows go out as one executemany, and when
+        `appointment` is passed it is marked completed in the same commit.
+        """
+        if appointment is None:
+            appointment = db.query(Appointment).filter(Appointment.id == prescription.appointment_id).first()
+
+        try:
+            # check for existing prescription for same patient and same doctor on the same day
+            if appointment:
+                existing = (
+                    db.query(Prescription)
+                    .join(Appointment, Prescription.appointment)
+                    .filter(
+                        Prescription.patient_id == prescription.patient_id,
+                        Appointment.doctor_id == appointment.doctor_id,
+                        func.date(Prescription.created_at) == date.today(),
+                    )
+                    .first()
                 )
-                .first()
+                if existing:
+                    # update existing prescription instead of creating a new one
+                    appointment.status = "completed"
+                    return PrescriptionRepository.update_prescription(db, existing.id, prescription.dict(exclude={"confirm_new_medicines"}))
+
+            db_prescription = Prescription(
+                appointment_id=prescription.appointment_id,
+                patient_id=prescription.patient_id,
+                notes=prescription.notes
             )
-            if existing:
-                # update existing prescription instead of creating a new one
-                return PrescriptionRepository.update_prescription(db, existing.id, prescription.dict())
-
-        db_prescription = Prescription(
-            appointment_id=prescription.appointment_id,
-            patient_id=prescription.patient_id,
-            notes=prescription.notes
-        )
-        db.add(db_prescription)
-        db.commit()
-        db.refresh(db_prescription)
+            db.add(db_prescription)
+
+            # medicine per line: an existing id, or inline details resolved
+            # against the catalog (created in bulk when missing)
+            meds = getattr(prescription, "medicines", None) or []
+            line_medicines = []
+            inline = []
+            for med in meds:
+                medicine_id = getattr(med, "medicine_id", None)
+                m: Optional[MedicineCreate] = getattr(med, "medicine", None)
+                if not medicine_id and m:
+                    medicine_id = m.id
+                    if not medicine_id:
+                        inline.append((len(line_medicines), m))
+                line_medicines.append(medicine_id)
+            if inline:
+                resolved = MedicineRepository.get_or_create_many(db, [m for _, m in inline])
+                for (i, _), medicine_id in zip(inline, resolved):
+                    line_medicines[i] = medicine_id
+
+            # flush assigns the prescription id
+            db.flush()
+
+            rows = [
+                {
+                    "prescription_id": db_prescription.id,
+                    "medicine_id": medicine_id,
+                    "dosage": getattr(med, "dosage", None),
+                    "duration": getattr(med, "duration", None),
+                    "instruction": getattr(med, "instruction", None),
+                }
+                for med, medicine_id in zip(meds, line_medicines)
+                if medicine_id
+            ]
+            if rows:
+                db.execute(insert(PrescriptionMedicine), rows)
+
+            if appointment:
+                appointment.status = "completed"
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
 
-        # handle medicines if provided
-        meds = getattr(prescription, "medicines", None) or []
-        for med in meds:
-            # med can be PrescriptionMedicineCreate
-            medicine_id = None
-            if getattr(med, "medicine_id", None):
-                medicine_id = med.medicine_id
-            elif getattr(med, "medicine", None):
-                m: MedicineCreate = med.medicine
-                # create medicine record if details provided
-                db_med = Medicine(
-                    name=m.name,
-                    strength=m.strength,
-                    form=m.form,
-                    manufacturer=m.manufacturer
-                )
-                db.add(db_med)
-                db.commit()
-                db.refresh(db_med)
-                medicine_id = db_med.id
-
-            if medicine_id:
-                db_pm = PrescriptionMedicine(
-                    prescription_id=db_prescription.id,
-                    medicine_id=medicine_id,
-                    dosage=getattr(med, "dosage", None),
-                    duration=getattr(med, "duration", None),
-                    instruction=getattr(med, "instruction", None)
-                )
-                db.add(db_pm)
-        db.commit()
         db.refresh(db_prescription)
         return db_prescription
-    
+
     @staticmethod
     def get_prescription_by_id(db: Session, prescription_id: int) -> Prescription:
         """Get prescription by ID, eager-load medicines and medicine details"""
@@ -95,26 +120,44 @@ class PrescriptionRepository:
         )
     
     @staticmethod
-    def get_prescriptions_by_patient(db: Session, patient_id: int):
-        """Get all prescriptions for a patient"""
-        # eager-load medicines->medicine and appointment->doctor for a richer response
-        from sqlalchemy.orm import joinedload
-        from ..models import Appointment
-
-        return (
+    def _patient_prescriptions(db: Session, patient_id: int, date_from: Optional[date], date_to: Optional[date]):
+        # eager-load medicines->medicine and appointment->doctor for a richer response;
+        # selectin for the collection so LIMIT and yield_per apply to prescriptions
+        query = (
             db.query(Prescription)
             .options(
-                joinedload(Prescription.medicines).joinedload(PrescriptionMedicine.medicine),
-                joinedload(Prescription.appointment).joinedload(Appointment.doctor),
+                selectinload(Prescription.medicines).joinedload(PrescriptionMedicine.medicine),
+                joinedload(Prescription.appointment).joinedload(Appointment.doctor).options(*DOCTOR_OUT_OPTIONS),
             )
             .filter(Prescription.patient_id == patient_id)
-            .all()
         )
-    
+        return in_date_range(query, Prescription.created_at, date_from, date_to)
+
+    @staticmethod
+    @replica_read
+    def get_prescriptions_by_patient(
+        db: Session,
+        patient_id: int,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ):
+        """Page of a patient's prescriptions, newest first; returns (items, next_cursor)"""
+        query = PrescriptionRepository._patient_prescriptions(db, patient_id, date_from, date_to)
+        return keyset_page(query, PRESCRIPTION_PAGE_KEY, cursor, limit=limit, descending=True)
+
     @staticmethod
-    def get_all_prescriptions(db: Session, skip: int = 0, limit: int = 100):
-        """Get all prescriptions with pagination"""
-        return db.query(Prescription).offset(skip).limit(limit).all()
+    def iter_prescriptions_by_patient(db: Session, patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """All of a patient's prescriptions, newest first, fetched in batches"""
+        query = PrescriptionRepository._patient_prescriptions(db, patient_id, date_from, date_to)
+        return query.order_by(*[c.desc() for c in PRESCRIPTION_PAGE_KEY]).yield_per(EXPORT_BATCH_SIZE)
+
+    @staticmethod
+    @replica_read
+    def get_all_prescriptions(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of prescriptions ordered by id; returns (items, next_cursor)"""
+        return keyset_page(db.query(Prescription), [Prescription.id], cursor, skip, limit)
     
     @staticmethod
     def update_prescription(db: Session, prescription_id: int, update_data: dict) -> Prescription:
@@ -137,30 +180,26 @@ class PrescriptionRepository:
                         return payload.dict(exclude_unset=True)
                     return dict(payload)
 
-                for med_entry in medicines_payload or []:
-                    med_data = _to_dict(med_entry)
-                    if not med_data:
-                        continue
+                entries = [d for d in (_to_dict(e) for e in medicines_payload or []) if d]
 
+                # Resolve nested medicine payloads against the catalog in one go
+                nested_ids = {}
+                to_resolve = []
+                for i, med_data in enumerate(entries):
+                    nested_data = _to_dict(med_data.get("medicine"))
+                    if med_data.get("medicine_id") or not nested_data:
+                        continue
+                    if nested_data.get("id"):
+                        nested_ids[i] = nested_data["id"]
+                    elif nested_data.get("name"):
+                        to_resolve.append((i, nested_data))
+                if to_resolve:
+                    resolved = MedicineRepository.get_or_create_many(db, [d for _, d in to_resolve])
+                    nested_ids.update((i, medicine_id) for (i, _), medicine_id in zip(to_resolve, resolved))
+
+                for i, med_data in enumerate(entries):
                     pm_id = med_data.get("id")
-                    medicine_id = med_data.get("medicine_id")
-
-                    # Handle nested medicine creation/update payload
-                    nested_medicine = med_data.get("medicine")
-                    if not medicine_id and nested_medicine:
-                        nested_data = _to_dict(nested_medicine)
-                        if nested_data.get("id"):
-                            medicine_id = nested_data["id"]
-                        elif nested_data.get("name"):
-                            db_medicine = Medicine(
-                                name=nested_data.get("name"),
-                                strength=nested_data.get("strength"),
-                                form=nested_data.get("form"),
-                                manufacturer=nested_data.get("manufacturer")
-                            )
-                            db.add(db_medicine)
-                            db.flush()
-                            medicine_id = db_medicine.id
+                    medicine_id = med_data.get("medicine_id") or nested_ids.get(i)
 
                     if pm_id and pm_id in existing_items:
                         pm_model = existing_items.pop(pm_id)
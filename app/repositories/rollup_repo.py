@@ -0,0 +1,204 @@
+"""
+Rollup repository - daily analytics tables and the reads that combine them
+with the raw rows not rolled up yet
+
+Rollups cover every day up to the "daily_analytics" watermark. Reads sum
+the rollup rows for those days and count the raw rows after the watermark
+(an index range on the date column), so their cost grows with the number
+of days, not with the number of appointments or prescription lines.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, union_all, Date
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import (
+    Appointment, DailyAppointmentCount, DailyMedicineUsage, DailyNewPatients, Patient, Prescription,
+    PrescriptionMedicine, RollupWatermark, User,
+)
+
+ANALYTICS_WATERMARK = "daily_analytics"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def _created_day(column):
+    # DATE() of a timestamp; typed so SQLite's 'YYYY-MM-DD' text comes back as a date
+    return func.date(column, type_=Date)
+
+
+class RollupRepository:
+    """Repository for the daily analytics rollups"""
+
+    @staticmethod
+    def get_watermark(db: Session, name: str = ANALYTICS_WATERMARK) -> Optional[date]:
+        """Last day the rollups cover, or None before the first run"""
+        return db.query(RollupWatermark.through_day).filter(RollupWatermark.name == name).scalar()
+
+    @staticmethod
+    def claim_watermark(db: Session, name: str = ANALYTICS_WATERMARK) -> Optional[RollupWatermark]:
+        """Lock the watermark row until the transaction ends; None while another process holds it.
+
+        SKIP LOCKED lets every API worker run the refresher while only one
+        of them rebuilds at a time. The row is created (through_day NULL)
+        on first use so there is something to lock.
+        """
+        if db.query(RollupWatermark.name).filter(RollupWatermark.name == name).first() is None:
+            try:
+                db.add(RollupWatermark(name=name))
+                db.commit()
+            except IntegrityError:
+                # another process created it first
+                db.rollback()
+        return (
+            db.query(RollupWatermark)
+            .filter(RollupWatermark.name == name)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+
+    @staticmethod
+    def set_watermark(db: Session, through_day: date, name: str = ANALYTICS_WATERMARK) -> None:
+        db.merge(RollupWatermark(name=name, through_day=through_day, refreshed_at=datetime.utcnow()))
+
+    @staticmethod
+    def first_day(db: Session) -> Optional[date]:
+        """Earliest day with anything to roll up"""
+        first_appointment = db.query(func.min(Appointment.appointment_date)).scalar()
+        first_prescription = db.query(func.min(Prescription.created_at)).scalar()
+        first_user = db.query(func.min(User.created_at)).scalar()
+        days = [first_appointment] + [d.date() for d in (first_prescription, first_user) if d is not None]
+        days = [d for d in days if d is not None]
+        return min(days) if days else None
+
+    @staticmethod
+    def rebuild_days(db: Session, day_from: date, day_to: date) -> None:
+        """Recompute every rollup for days in [day_from, day_to] from the raw rows"""
+        start, end = _day_start(day_from), _day_start(day_to + timedelta(days=1))
+
+        db.execute(delete(DailyAppointmentCount).where(DailyAppointmentCount.day.between(day_from, day_to)))
+        status = func.coalesce(Appointment.status, "pending")
+        db.execute(
+            insert(DailyAppointmentCount).from_select(
+                ["day", "doctor_id", "status", "count"],
+                select(Appointment.appointment_date, Appointment.doctor_id, status, func.count(Appointment.id))
+                .where(Appointment.appointment_date.between(day_from, day_to))
+                .group_by(Appointment.appointment_date, Appointment.doctor_id, status),
+            )
+        )
+
+        db.execute(delete(DailyMedicineUsage).where(DailyMedicineUsage.day.between(day_from, day_to)))
+        prescribed_on = _created_day(Prescription.created_at)
+        db.execute(
+            insert(DailyMedicineUsage).from_select(
+                ["day", "medicine_id", "count"],
+                select(prescribed_on, PrescriptionMedicine.medicine_id, func.count(PrescriptionMedicine.id))
+                .join(Prescription, PrescriptionMedicine.prescription_id == Prescription.id)
+                .where(Prescription.created_at >= start, Prescription.created_at < end)
+                .group_by(prescribed_on, PrescriptionMedicine.medicine_id),
+            )
+        )
+
+        db.execute(delete(DailyNewPatients).where(DailyNewPatients.day.between(day_from, day_to)))
+        registered_on = _created_day(User.created_at)
+        db.execute(
+            insert(DailyNewPatients).from_select(
+                ["day", "count"],
+                select(registered_on, func.count(Patient.id))
+                .join(Patient, Patient.id == User.id)
+                .where(User.created_at >= start, User.created_at < end)
+                .group_by(registered_on),
+            )
+        )
+
+    @staticmethod
+    def merge_medicine_usage(db: Session, survivor: int, duplicates: list) -> None:
+        """Fold the usage rows of `duplicates` into `survivor`'s, day by day"""
+        merged = [survivor, *duplicates]
+        totals = db.execute(
+            select(DailyMedicineUsage.day, func.sum(DailyMedicineUsage.count))
+            .where(DailyMedicineUsage.medicine_id.in_(merged))
+            .group_by(DailyMedicineUsage.day)
+        ).all()
+        db.execute(delete(DailyMedicineUsage).where(DailyMedicineUsage.medicine_id.in_(merged)))
+        if totals:
+            db.execute(insert(DailyMedicineUsage), [
+                {"day": day, "medicine_id": survivor, "count": count} for day, count in totals
+            ])
+
+    @staticmethod
+    def medicine_usage(through: Optional[date]):
+        """Subquery of (medicine_id, used) rows; sum `used` per medicine for the total"""
+        live = (
+            select(PrescriptionMedicine.medicine_id, func.count(PrescriptionMedicine.id).label("used"))
+            .group_by(PrescriptionMedicine.medicine_id)
+        )
+        if through is None:
+            return live.subquery()
+        rolled = (
+            select(DailyMedicineUsage.medicine_id, func.sum(DailyMedicineUsage.count).label("used"))
+            .where(DailyMedicineUsage.day <= through)
+            .group_by(DailyMedicineUsage.medicine_id)
+        )
+        # the recent prescriptions first, then their lines (not every line, then its prescription)
+        recent = select(Prescription.id).where(Prescription.created_at >= _day_start(through + timedelta(days=1)))
+        live = live.where(PrescriptionMedicine.prescription_id.in_(recent))
+        return union_all(rolled, live).subquery()
+
+    @staticmethod
+    def appointment_counts(
+        through: Optional[date],
+        by: str,
+        status: Optional[str] = None,
+        day_from: Optional[date] = None,
+        day_to: Optional[date] = None,
+    ):
+        """Subquery of (`by`, count) rows, `by` being "doctor_id" or "day"; sum `count` per key for the total"""
+        live_key = Appointment.doctor_id if by == "doctor_id" else Appointment.appointment_date
+        live = select(live_key.label(by), func.count(Appointment.id).label("count")).group_by(live_key)
+        if status is not None:
+            live = live.where(Appointment.status == status)
+        if day_from is not None:
+            live = live.where(Appointment.appointment_date >= day_from)
+        if day_to is not None:
+            live = live.where(Appointment.appointment_date <= day_to)
+        if through is None:
+            return live.subquery()
+
+        rolled_key = getattr(DailyAppointmentCount, by)
+        rolled = (
+            select(rolled_key.label(by), func.sum(DailyAppointmentCount.count).label("count"))
+            .where(DailyAppointmentCount.day <= through)
+            .group_by(rolled_key)
+        )
+        if status is not None:
+            rolled = rolled.where(DailyAppointmentCount.status == status)
+        if day_from is not None:
+            rolled = rolled.where(DailyAppointmentCount.day >= day_from)
+        if day_to is not None:
+            rolled = rolled.where(DailyAppointmentCount.day <= day_to)
+        live = live.where(Appointment.appointment_date > through)
+        return union_all(rolled, live).subquery()
+
+    @staticmethod
+    def new_patient_counts(through: Optional[date], day_from: date):
+        """Subquery of (day, count) rows of patients registered since `day_from`"""
+        registered_on = _created_day(User.created_at)
+        live_from = day_from if through is None else max(day_from, through + timedelta(days=1))
+        live = (
+            select(registered_on.label("day"), func.count(Patient.id).label("count"))
+            .join(Patient, Patient.id == User.id)
+            .where(User.created_at >= _day_start(live_from))
+            .group_by(registered_on)
+        )
+        if through is None or through < day_from:
+            return live.subquery()
+        rolled = (
+            select(DailyNewPatients.day, DailyNewPatients.count)
+            .where(DailyNewPatients.day.between(day_from, through))
+        )
+        return union_all(rolled, live).subquery()
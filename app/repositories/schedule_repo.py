@@ -1,7 +1,9 @@
 """
 Schedule repository - Database access layer for DoctorSchedule model
 """
+from typing import Optional
 from sqlalchemy.orm import Session
+from ..core.pagination import keyset_page
 from ..models import DoctorSchedule
 from ..schemas import ScheduleCreate
 
@@ -35,9 +37,14 @@ class ScheduleRepository:
         return db.query(DoctorSchedule).filter(DoctorSchedule.doctor_id == doctor_id).all()
     
     @staticmethod
-    def get_all_schedules(db: Session, skip: int = 0, limit: int = 100):
-        """Get all schedules with pagination"""
-        return db.query(DoctorSchedule).offset(skip).limit(limit).all()
+    def get_all_schedules(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of schedules ordered by id; returns (items, next_cursor)"""
+        return keyset_page(db.query(DoctorSchedule), [DoctorSchedule.id], cursor, skip, limit)
+    
+    @staticmethod
+    def iter_schedules(db: Session, batch_size: int = 1000):
+        """Stream every schedule"""
+        return db.query(DoctorSchedule).yield_per(batch_size)
     
     @staticmethod
     def update_schedule(db: Session, schedule_id: int, update_data: dict) -> DoctorSchedule:
@@ -0,0 +1,120 @@
+"""
+Serial repository - collision-free serial numbers handed out from reserved blocks
+
+Each process reserves a block of counter values from `serial_sequences` in
+one short transaction of its own, then allocates from memory until the
+block runs out, so the request path issues no queries for it. Counter
+values are mapped through a keyed Feistel permutation of the serial range,
+which keeps numbers unique while making them look random. Values that
+collide with serials assigned before this allocator existed are dropped
+when the block is reserved.
+"""
+import hashlib
+import threading
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import Patient, SerialSequence
+
+
+class FeistelPermutation:
+    """Keyed bijection on range(size): a balanced Feistel network with cycle walking"""
+
+    def __init__(self, size: int, key: str, rounds: int = 4):
+        self.size = size
+        self.rounds = rounds
+        self._key = key.encode()
+        bits = max(2, (size - 1).bit_length())
+        self._half_bits = (bits + 1) // 2
+        self._mask = (1 << self._half_bits) - 1
+
+    def _round(self, i: int, value: int) -> int:
+        digest = hashlib.blake2b(f"{i}:{value}".encode(), key=self._key[:64], digest_size=8).digest()
+        return int.from_bytes(digest, "big") & self._mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half_bits, value & self._mask
+        for i in range(self.rounds):
+            left, right = right, left ^ self._round(i, right)
+        return (left << self._half_bits) | right
+
+    def __call__(self, value: int) -> int:
+        if not 0 <= value < self.size:
+            raise ValueError("value outside the permutation domain")
+        # the network permutes the enclosing power of two; re-encrypt until
+        # the result lands back inside range(size)
+        value = self._encrypt(value)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+class SerialAllocator:
+    """Hands out unique numbers in [low, high] from blocks reserved in `serial_sequences`"""
+
+    def __init__(self, name: str, low: int, high: int, block_size: int, key: Optional[str] = None, column=None):
+        self.name = name
+        # column already holding serials, checked for collisions per block
+        self.column = column
+        self.low = low
+        self.size = high - low + 1
+        self.block_size = block_size
+        self._permute = FeistelPermutation(self.size, key) if key else None
+        self._free: deque = deque()
+        self._lock = threading.Lock()
+        self.blocks_reserved = 0
+
+    def allocate(self, db: Session) -> int:
+        """Next serial; reserves a new block via the session's engine when the current one is used up"""
+        with self._lock:
+            while not self._free:
+                self._reserve(db.get_bind())
+            return self._free.popleft()
+
+    def _reserve(self, bind) -> None:
+        if isinstance(bind, Connection):
+            bind = bind.engine
+        # own connection and transaction: the sequence row lock is held only
+        # for this update, not for the rest of the caller's booking
+        with bind.begin() as conn:
+            start = conn.execute(
+                select(SerialSequence.next_value).where(SerialSequence.name == self.name).with_for_update()
+            ).scalar()
+            if start is None:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(SerialSequence.__table__.insert().values(name=self.name, next_value=0))
+                except IntegrityError:
+                    pass  # another process created it first
+                return
+            end = min(start + self.block_size, self.size)
+            if start >= end:
+                raise RuntimeError(f"serial sequence {self.name!r} is exhausted")
+            conn.execute(
+                update(SerialSequence).where(SerialSequence.name == self.name).values(next_value=end)
+            )
+            values = [self.low + (self._permute(n) if self._permute else n) for n in range(start, end)]
+            taken = set()
+            if self.column is not None:
+                taken = set(conn.execute(select(self.column).where(self.column.in_(values))).scalars())
+        self._free.extend(v for v in values if v not in taken)
+        self.blocks_reserved += 1
+
+    def stats(self) -> dict:
+        return {"free": len(self._free), "blocks_reserved": self.blocks_reserved, "block_size": self.block_size}
+
+
+patient_serials = SerialAllocator(
+    "patient_serial",
+    low=10000000,
+    high=99999999,
+    block_size=settings.PATIENT_SERIAL_BLOCK_SIZE,
+    key=settings.PATIENT_SERIAL_KEY or settings.SECRET_KEY,
+    column=Patient.serial_number,
+)
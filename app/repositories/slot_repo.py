@@ -0,0 +1,205 @@
+"""
+Slot repository - materializes bookable slots from DoctorSchedule and assigns them
+"""
+import re
+import threading
+import time as _time
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..exceptions.http_exceptions import (
+    ResourceNotFoundException,
+    SlotUnavailableException,
+    ValidationException,
+)
+from ..models import Appointment, DoctorSchedule
+
+
+# a weekday name or abbreviation; the group index is Monday=0 .. Sunday=6
+_DAY = (
+    r"\b(?:(mon(?:day)?)|(tue(?:sday|s)?)|(wed(?:nesday|s)?)|(thu(?:rsday|rs|r)?)"
+    r"|(fri(?:day)?)|(sat(?:urday)?)|(sun(?:day)?))\b\.?"
+)
+_DAY_RE = re.compile(_DAY)
+_RANGE_RE = re.compile(rf"({_DAY})\s*(?:-|\u2013|\bto\b)\s*({_DAY})")
+
+
+def _weekday(match_text: str) -> int:
+    match = _DAY_RE.match(match_text)
+    return next(i for i, group in enumerate(match.groups()) if group)
+
+
+@lru_cache(maxsize=1024)
+def parse_weekdays(raw: Optional[str]) -> frozenset:
+    """Weekdays (Monday=0) named in free text such as "Sunday", "sun, tue" or
+    "Monday - Friday"; ranges may wrap past Sunday ("Fri - Mon")"""
+    text = (raw or "").lower()
+    days = set()
+
+    def expand(match) -> str:
+        first, last = _weekday(match.group(1)), _weekday(match.group(9))
+        days.update((first + i) % 7 for i in range((last - first) % 7 + 1))
+        return " "
+
+    text = _RANGE_RE.sub(expand, text)
+    days.update(_weekday(m.group(0)) for m in _DAY_RE.finditer(text))
+    return frozenset(days)
+
+
+def schedule_runs_on(schedule: DoctorSchedule, day: date) -> bool:
+    """Return True if `day` falls on one of the schedule's days.
+
+    `day_of_week` is free text ("Sunday", "sun,tue", "Monday - Friday" ...);
+    a schedule without any recognizable weekday is treated as running daily.
+    """
+    days = parse_weekdays(schedule.day_of_week)
+    return not days or day.weekday() in days
+
+
+def materialize_slots(schedule: DoctorSchedule) -> list[time]:
+    """Return the sorted start times of every bookable slot of a schedule."""
+    if not schedule.start_time or not schedule.end_time:
+        return []
+
+    step = timedelta(minutes=schedule.duration_per_appointment or 30)
+    cursor = datetime.combine(date.min, schedule.start_time)
+    end = datetime.combine(date.min, schedule.end_time)
+    limit = schedule.max_patients
+
+    slots = []
+    while cursor + step <= end and (limit is None or len(slots) < limit):
+        slots.append(cursor.time())
+        cursor += step
+    return slots
+
+
+class SlotBook:
+    """Slots of one schedule on one date, with the free ones kept sorted.
+
+    `next_free` is a binary search over the free list, so answering
+    "next free slot" never walks the day's appointments.
+    """
+
+    def __init__(self, slots: list[time], booked: Iterable[time]):
+        self.slots = slots
+        taken = set(booked)
+        self.free = [s for s in slots if s not in taken]
+
+    def is_slot(self, value: time) -> bool:
+        i = bisect_left(self.slots, value)
+        return i < len(self.slots) and self.slots[i] == value
+
+    def is_free(self, value: time) -> bool:
+        i = bisect_left(self.free, value)
+        return i < len(self.free) and self.free[i] == value
+
+    def next_free(self, after: Optional[time] = None) -> Optional[time]:
+        if after is None:
+            return self.free[0] if self.free else None
+        i = bisect_left(self.free, after)
+        return self.free[i] if i < len(self.free) else None
+
+
+# (schedule_id, date) -> (expires_at, SlotBook)
+_slot_cache: dict = {}
+_slot_cache_lock = threading.Lock()
+
+
+class SlotRepository:
+    """Repository for slot lookup and atomic slot assignment"""
+
+    @staticmethod
+    def get_booked_times(db: Session, schedule_id: int, day: date, for_update: bool = False) -> list[time]:
+        """Return appointment times already taken (non-cancelled) for a schedule/date"""
+        q = db.query(Appointment.appointment_time).filter(
+            Appointment.schedule_id == schedule_id,
+            Appointment.appointment_date == day,
+            Appointment.status != "cancelled",
+            Appointment.appointment_time.isnot(None),
+        )
+        if for_update:
+            # a locking read sees the latest committed rows, not the snapshot
+            q = q.with_for_update()
+        return [row.appointment_time for row in q.all()]
+
+    @staticmethod
+    def get_slot_book(db: Session, schedule: DoctorSchedule, day: date) -> SlotBook:
+        """Return the (cached) slot book for a schedule/date pair"""
+        key = (schedule.id, day)
+        now = _time.monotonic()
+        with _slot_cache_lock:
+            cached = _slot_cache.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        if schedule_runs_on(schedule, day):
+            book = SlotBook(
+                materialize_slots(schedule),
+                SlotRepository.get_booked_times(db, schedule.id, day),
+            )
+        else:
+            book = SlotBook([], [])
+
+        with _slot_cache_lock:
+            _slot_cache[key] = (now + settings.SLOT_CACHE_TTL_SECONDS, book)
+        return book
+
+    @staticmethod
+    def invalidate(schedule_id: Optional[int], day: Optional[date]) -> None:
+        """Drop the cached slot book after a booking, cancellation or delete"""
+        if schedule_id is None or day is None:
+            return
+        with _slot_cache_lock:
+            _slot_cache.pop((schedule_id, day), None)
+
+    @staticmethod
+    def assign_slot(
+        db: Session,
+        schedule_id: int,
+        doctor_id: int,
+        day: date,
+        requested_time: Optional[time] = None,
+    ) -> time:
+        """Pick the appointment time for a new booking.
+
+        Locks the schedule row so concurrent bookings against the same
+        schedule serialize; the caller must insert the appointment and
+        commit in the same transaction, then `invalidate` the cached slot
+        book (dropping it earlier lets a concurrent read re-cache the
+        pre-booking free list).
+        """
+        schedule = (
+            db.query(DoctorSchedule)
+            .filter(DoctorSchedule.id == schedule_id)
+            .with_for_update()
+            .first()
+        )
+        if not schedule:
+            raise ResourceNotFoundException("Schedule not found")
+        if schedule.doctor_id != doctor_id:
+            raise ValidationException("Schedule does not belong to this doctor")
+        if not schedule_runs_on(schedule, day):
+            raise SlotUnavailableException("Doctor is not available on this date")
+
+        book = SlotBook(
+            materialize_slots(schedule),
+            SlotRepository.get_booked_times(db, schedule_id, day, for_update=True),
+        )
+
+        if requested_time is not None:
+            if not book.is_slot(requested_time):
+                raise SlotUnavailableException("Requested time is not a bookable slot")
+            if not book.is_free(requested_time):
+                raise SlotUnavailableException("Requested slot is already booked")
+            slot = requested_time
+        else:
+            slot = book.next_free()
+            if slot is None:
+                raise SlotUnavailableException("No free slots left for this schedule on the requested date")
+
+        return slot
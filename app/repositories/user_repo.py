@@ -1,4 +1,6 @@
+from typing import Optional
 from sqlalchemy.orm import Session
+from ..core.pagination import keyset_page
 from ..models import Patient, User
 from ..schemas import UserCreate
 
@@ -28,8 +30,9 @@ class UserRepository:
         return db.query(User).filter(User.email == email).first()
     
     @staticmethod
-    def get_all_users(db: Session, skip: int = 0, limit: int = 100):
-        return db.query(User).offset(skip).limit(limit).all()
+    def get_all_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of users ordered by id; returns (items, next_cursor)"""
+        return keyset_page(db.query(User), [User.id], cursor, skip, limit)
     @staticmethod
     def get_by_phone_or_email(db: Session, value: str):
 
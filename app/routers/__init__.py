@@ -14,6 +14,7 @@ from .admin import router as admin_router
 from .specializations import router as specializations_router
 from .institutes import router as institutes_router
 from .qualifications import router as qualifications_router
+from .async_reads import router as async_reads_router
 __all__ = [
     "auth_router",
     "users_router",
@@ -28,4 +29,5 @@ __all__ = [
     "specializations_router",
     "institutes_router",
     "qualifications_router",
+    "async_reads_router",
 ]
@@ -8,9 +8,9 @@ router = APIRouter(prefix="/api/v1/admin", tags=["Admin"])
 
 
 @router.get("/dashboard")
-def get_dashboard(db: Session = Depends(get_db)):
-    """Return top-level counts for admin dashboard"""
-    return AdminService.get_dashboard_counts(db)
+def get_dashboard(exact: bool = False, db: Session = Depends(get_db)):
+    """Return top-level counts for admin dashboard (estimated totals on MySQL unless `exact`)"""
+    return AdminService.get_dashboard_counts(db, exact)
 
 
 @router.get("/pending-doctors")
@@ -36,7 +36,10 @@ def analytics_top_medicines(limit: int = 10, db: Session = Depends(get_db)):
 def analytics_top_doctors(limit: int = 5, db: Session = Depends(get_db)):
     rows = AdminService.top_doctors_by_completed_appointments(db, limit)
     return [
-        {"doctor": {"id": d.id, "full_name": d.full_name, "specialization": d.specialization}, "completed": int(c)}
+        {
+            "doctor": {"id": d.id, "full_name": d.full_name, "specializations": [s.name for s in d.specializations]},
+            "completed": int(c),
+        }
         for d, c in rows
     ]
 
@@ -47,8 +50,24 @@ def analytics_appointments_overview(days: int = 7, db: Session = Depends(get_db)
     return AdminService.appointment_overview(db, days)
 
 
+@router.get("/analytics/new-patients")
+def analytics_new_patients(days: int = 7, db: Session = Depends(get_db)):
+    """Return patient registrations per day for the last `days` days"""
+    return AdminService.new_patients_overview(db, days)
+
+
 @router.get("/analytics/specializations")
-def analytics_specializations(limit: int = 10, db: Session = Depends(get_db)):
-    """Return popular specializations (doctor counts)"""
-    rows = AdminService.popular_specializations(db, limit)
-    return [{"specialization": spec, "count": int(cnt)} for spec, cnt in rows]
+def analytics_specializations(limit: int = 10, days: int = 30, db: Session = Depends(get_db)):
+    """Return popular specializations (doctor counts) with appointments and
+    completed visits over the last `days` days"""
+    rows = AdminService.popular_specializations(db, limit, days)
+    return [
+        {
+            "id": spec_id,
+            "specialization": name,
+            "count": int(doctors),
+            "appointments": int(appointments),
+            "completed": int(completed),
+        }
+        for spec_id, name, doctors, appointments, completed in rows
+    ]
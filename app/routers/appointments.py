@@ -2,10 +2,15 @@
 Appointment routes
 """
 from webbrowser import get
-from fastapi import APIRouter, Depends, status, Request
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import SessionLocal, get_db
+from ..core.pagination import MAX_PAGE_SIZE, ndjson_response, paged_response
 from ..schemas import AppointmentCreate, AppointmentOut, AppointmentWithPatientCreate, AppointmentDoctorOut, PatientOut
 from ..services.appointment_service import AppointmentService
 
@@ -34,30 +39,92 @@ def create_appointment_with_patient(
     """Create patient (if new) and appointment in one API call"""
     return AppointmentService.create_appointment_with_patient(db, data)
 @router.get("/patient/{patient_id}", response_model=list[AppointmentOut])
-def get_patient_appointments(patient_id: int, db: Session = Depends(get_db)):
-    return AppointmentService.get_patient_appointments(db, patient_id)
+def get_patient_appointments(
+    patient_id: int,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    return paged_response(
+        response,
+        AppointmentService.get_patient_appointments(db, patient_id, date_from, date_to, limit, cursor),
+    )
+
+
+@router.get("/patient/{patient_id}/export", response_class=StreamingResponse)
+def export_patient_appointments(patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Stream every appointment for a patient as NDJSON"""
+    return ndjson_response(
+        SessionLocal,
+        lambda db: AppointmentService.export_patient_appointments(db, patient_id, date_from, date_to),
+        AppointmentOut,
+    )
 
 
 @router.get("/doctor/{doctor_id}", response_model=list[AppointmentDoctorOut])
-def get_doctor_appointments(  request: Request,doctor_id: int, db: Session = Depends(get_db)):
+def get_doctor_appointments(
+    request: Request,
+    doctor_id: int,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     user_id = getattr(request.state, "user_id", None)
    
-    return AppointmentService.get_doctor_appointments(db, user_id)
+    return paged_response(
+        response,
+        AppointmentService.get_doctor_appointments(db, user_id, date_from, date_to, limit, cursor),
+    )
+
+
+@router.get("/doctor/{doctor_id}/export", response_class=StreamingResponse)
+def export_doctor_appointments(
+    request: Request,
+    doctor_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """Stream every appointment for the signed-in doctor as NDJSON"""
+    user_id = getattr(request.state, "user_id", None)
+    return ndjson_response(
+        SessionLocal,
+        lambda db: AppointmentService.export_doctor_appointments(db, user_id, date_from, date_to),
+        AppointmentDoctorOut,
+    )
 
 
 @router.get("/", response_model=list[AppointmentOut])
 def list_appointments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """List all appointments"""
-    return AppointmentService.list_appointments(db, skip, limit)
+    return paged_response(response, AppointmentService.list_appointments(db, skip, limit, cursor))
 
 @router.get("/patients/doctor/{doctor_id}", response_model=list[PatientOut])
-def get_patients_by_doctor(doctor_id: int, db: Session = Depends(get_db)):
+def get_patients_by_doctor(
+    doctor_id: int,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     
-    return AppointmentService.get_patients_by_doctor(db, doctor_id)
+    return paged_response(
+        response,
+        AppointmentService.get_patients_by_doctor(db, doctor_id, date_from, date_to, limit, cursor),
+    )
 
 @router.put("/{appointment_id}", response_model=AppointmentOut)
 def update_appointment(
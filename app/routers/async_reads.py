@@ -0,0 +1,68 @@
+"""
+Async variants of the hot read routes
+
+Mounted ahead of the sync routers when ASYNC_DB_ENABLED is set, so they take
+over the same paths with the same response models while awaiting the
+database instead of pinning a threadpool thread per request.
+"""
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_async_db
+from ..core.pagination import MAX_PAGE_SIZE, paged_response
+from ..schemas import AppointmentDoctorOut, PrescriptionWithDoctorOut
+from ..services.async_read_service import AsyncReadService
+from ..core.security import get_current_patient
+
+router = APIRouter(tags=["Async reads"])
+
+
+@router.get("/api/v1/appointments/doctor/{doctor_id}", response_model=list[AppointmentDoctorOut])
+async def get_doctor_appointments(
+    request: Request,
+    doctor_id: int,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = getattr(request.state, "user_id", None)
+
+    return paged_response(
+        response,
+        await AsyncReadService.get_doctor_appointments(db, user_id, date_from, date_to, limit, cursor),
+    )
+
+
+@router.get("/api/v1/patients/me/dashboard")
+async def get_my_dashboard(
+    current_user = Depends(get_current_patient),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    patient_id = getattr(current_user, "id", None)
+    if not patient_id:
+        return {"upcoming_appointments": 0, "visited_doctors": 0, "active_prescriptions": 0}
+    return await AsyncReadService.get_patient_dashboard_stats(db, patient_id)
+
+
+@router.get("/api/v1/prescriptions/patient/{patient_id}", response_model=list[PrescriptionWithDoctorOut])
+async def get_patient_prescriptions(
+    patient_id: int,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of prescriptions for a patient, newest first"""
+    return paged_response(
+        response,
+        await AsyncReadService.get_patient_prescriptions(db, patient_id, date_from, date_to, limit, cursor),
+    )
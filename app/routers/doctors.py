@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, status, Request
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status, Request, Response
 from sqlalchemy.orm import Session
 
 from app.models import Doctor
 
 from ..database import get_db
-from ..schemas import DoctorCreate, DoctorOut, ScheduleOut, AppointmentDoctorOut, DashboardStats
+from ..core.pagination import MAX_PAGE_SIZE, paged_response
+from ..schemas import DoctorAvailabilityOut, DoctorCreate, DoctorOut, DoctorSearchOut, ScheduleOut, AppointmentDoctorOut, DashboardStats
 from ..services.doctor_service import DoctorService
 from ..core.security import get_current_doctor
 
@@ -22,6 +27,43 @@ def create_doctor(
     return DoctorService.create_doctor(db, doctor, user_id=user_id)
 
 
+@router.get("/search", response_model=DoctorSearchOut)
+def search_doctors(
+    response: Response,
+    specialization_id: Optional[list[int]] = Query(None),
+    institute_id: Optional[list[int]] = Query(None),
+    qualification_id: Optional[list[int]] = Query(None),
+    doctor_status: Optional[str] = Query("approved", alias="status"),
+    fee_min: Optional[Decimal] = Query(None, ge=0),
+    fee_max: Optional[Decimal] = Query(None, ge=0),
+    min_experience: Optional[int] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Directory search; repeat an id parameter to match any of several values.
+    The next page's cursor is in the X-Next-Cursor header, as on every paged list"""
+    selected = {
+        "specializations": specialization_id,
+        "institutes": institute_id,
+        "qualifications": qualification_id,
+    }
+    page = DoctorService.search_directory(db, selected, doctor_status, fee_min, fee_max, min_experience, limit, cursor)
+    page["items"] = paged_response(response, (page["items"], page.pop("next_cursor")))
+    return page
+
+
+@router.get("/available", response_model=list[DoctorAvailabilityOut])
+def list_available_doctors(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """Doctors with free capacity on each day of the range (default: today)"""
+    return DoctorService.list_available(db, date_from, date_to, limit)
+
+
 @router.get("/{doctor_id}", response_model=DoctorOut)
 def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
     return DoctorService.get_doctor(db, doctor_id)
@@ -29,11 +71,13 @@ def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[DoctorOut])
 def list_doctors(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    return DoctorService.list_doctors(db, skip, limit)
+    return paged_response(response, DoctorService.list_doctors(db, skip, limit, cursor))
 
 
 @router.get("/status/{status}", response_model=list[DoctorOut])
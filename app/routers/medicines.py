@@ -1,10 +1,13 @@
 """
 Medicine routes
 """
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.orm import Session
 
 from ..database import get_db
+from ..core.pagination import paged_response
 from ..schemas import MedicineCreate, MedicineOut
 from ..services.medicine_service import MedicineService
 
@@ -16,14 +19,30 @@ def create_medicine(medicine: MedicineCreate, db: Session = Depends(get_db)):
     return MedicineService.create_medicine(db, medicine)
 
 
+@router.get("/typeahead", response_model=list[MedicineOut])
+def typeahead_medicines(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    mode: str = Query("prefix", pattern="^(prefix|fuzzy)$"),
+    db: Session = Depends(get_db)
+):
+    return MedicineService.typeahead(db, q, limit, mode)
+
+
 @router.get("/{medicine_id}", response_model=MedicineOut)
 def get_medicine(medicine_id: int, db: Session = Depends(get_db)):
     return MedicineService.get_medicine(db, medicine_id)
 
 
 @router.get("/", response_model=list[MedicineOut])
-def list_medicines(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return MedicineService.list_medicines(db, skip, limit)
+def list_medicines(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    return paged_response(response, MedicineService.list_medicines(db, skip, limit, cursor))
 
 
 @router.get("/search/{name}", response_model=list[MedicineOut])
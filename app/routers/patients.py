@@ -1,8 +1,11 @@
 
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status, Response
 from sqlalchemy.orm import Session
 
 from ..database import get_db
+from ..core.pagination import MAX_PAGE_SIZE, paged_response
 from ..schemas import PatientCreate, PatientOut
 from ..services.patient_service import PatientService
 from ..core.security import get_current_patient
@@ -22,10 +25,14 @@ def create_patient(
 
 @router.get("/search", response_model=list[PatientOut])
 def search_patients(
-    phone: str,
+    response: Response,
+    phone: str = Query(..., min_length=3, max_length=20),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    match: Optional[str] = Query(None, pattern="^(prefix|suffix)$"),
     db: Session = Depends(get_db)
 ):
-    return PatientService.search_by_phone(db, phone)
+    return paged_response(response, PatientService.search_by_phone(db, phone, limit, cursor, match))
 
 
 @router.get("/{patient_id}", response_model=PatientOut)
@@ -36,20 +43,14 @@ def get_patient(patient_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[PatientOut])
 def list_patients(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     
-    return PatientService.list_patients(db, skip, limit)
-
-
-@router.get("/search", response_model=list[PatientOut])
-def search_patients(
-    phone: str,
-    db: Session = Depends(get_db)
-):
-    return PatientService.search_by_phone(db, phone)
+    return paged_response(response, PatientService.list_patients(db, skip, limit, cursor))
 
 
 @router.put("/{patient_id}", response_model=PatientOut)
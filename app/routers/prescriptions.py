@@ -1,10 +1,15 @@
 """
 Prescription routes
 """
-from fastapi import APIRouter, Depends, status
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import SessionLocal, get_db
+from ..core.pagination import MAX_PAGE_SIZE, ndjson_response, paged_response
 from ..schemas import PrescriptionCreate, PrescriptionOut,PrescriptionWithDoctorOut
 from ..services.prescription_service import PrescriptionService
 from ..core.security import get_current_doctor
@@ -38,19 +43,42 @@ def get_prescription_by_appointment(
 
 
 @router.get("/patient/{patient_id}", response_model=list[PrescriptionWithDoctorOut])
-def get_patient_prescriptions(patient_id: int, db: Session = Depends(get_db)):
-    """Get all prescriptions for a patient"""
-    return PrescriptionService.get_patient_prescriptions(db, patient_id)
+def get_patient_prescriptions(
+    patient_id: int,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get a page of prescriptions for a patient, newest first"""
+    return paged_response(
+        response,
+        PrescriptionService.get_patient_prescriptions(db, patient_id, date_from, date_to, limit, cursor),
+    )
+
+
+@router.get("/patient/{patient_id}/export", response_class=StreamingResponse)
+def export_patient_prescriptions(patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Stream every prescription for a patient as NDJSON"""
+    return ndjson_response(
+        SessionLocal,
+        lambda db: PrescriptionService.export_patient_prescriptions(db, patient_id, date_from, date_to),
+        PrescriptionWithDoctorOut,
+    )
 
 
 @router.get("/", response_model=list[PrescriptionOut])
 def list_prescriptions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """List all prescriptions"""
-    return PrescriptionService.list_prescriptions(db, skip, limit)
+    return paged_response(response, PrescriptionService.list_prescriptions(db, skip, limit, cursor))
 
 
 @router.put("/{prescription_id}", response_model=PrescriptionOut)
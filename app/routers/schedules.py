@@ -1,9 +1,12 @@
+from datetime import date, time
+from typing import Optional
 
-from fastapi import APIRouter, Depends, status, Request, HTTPException
+from fastapi import APIRouter, Depends, status, Request, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..schemas import ScheduleCreate, ScheduleOut, ScheduleCreateInternal
+from ..core.pagination import paged_response
+from ..schemas import ScheduleCreate, ScheduleOut, ScheduleCreateInternal, ScheduleSlotsOut
 from ..services.schedule_service import ScheduleService
 from ..core.security import get_current_doctor
 
@@ -38,6 +41,17 @@ def get_schedule(schedule_id: int, db: Session = Depends(get_db)):
     return ScheduleService.get_schedule(db, schedule_id)
 
 
+@router.get("/{schedule_id}/slots", response_model=ScheduleSlotsOut)
+def get_schedule_slots(
+    schedule_id: int,
+    date: date,
+    after: Optional[time] = None,
+    db: Session = Depends(get_db)
+):
+    """Get bookable slots for a schedule on a date, and the next free one"""
+    return ScheduleService.get_schedule_slots(db, schedule_id, date, after)
+
+
 @router.get("/doctor/{doctor_id}", response_model=list[ScheduleOut])
 def get_doctor_schedules(doctor_id: int, db: Session = Depends(get_db)):
     """Get all schedules for a doctor"""
@@ -60,12 +74,14 @@ def get_my_schedules(request: Request, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[ScheduleOut])
 def list_schedules(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """List all schedules"""
-    return ScheduleService.list_schedules(db, skip, limit)
+    return paged_response(response, ScheduleService.list_schedules(db, skip, limit, cursor))
 
 
 @router.put("/{schedule_id}", response_model=ScheduleOut)
@@ -1,8 +1,11 @@
 
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status, Response
 from sqlalchemy.orm import Session
 
 from ..database import get_db
+from ..core.pagination import paged_response
 from ..schemas import UserOut
 from ..services.user_service import UserService
 from ..core.security import get_current_user
@@ -24,12 +27,14 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[UserOut])
 def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """List all users"""
-    return UserService.list_users(db, skip, limit)
+    return paged_response(response, UserService.list_users(db, skip, limit, cursor))
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
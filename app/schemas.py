@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import time, date
+from decimal import Decimal
 from typing import Optional
 
+from .core.numbers import leading_number
+
 
 
 class LoginRequest(BaseModel):
@@ -91,14 +94,20 @@ class DoctorCreate(BaseModel):
     phone: str
     chamber: Optional[str] = None
     bmdc_number: Optional[str] = None
-    experience: Optional[str] = None
-    consultation_fee: Optional[str] = None
+    experience: Optional[int] = Field(None, ge=0)  # years
+    consultation_fee: Optional[Decimal] = Field(None, ge=0, max_digits=10, decimal_places=2)
     # Accept lists of ids for relationships (optional)
     specialization_ids: Optional[list[int]] = None
     institute_ids: Optional[list[int]] = None
     qualification_ids: Optional[list[int]] = None
     qualification_names: Optional[list[str]] = None
 
+    @field_validator("experience", "consultation_fee", mode="before")
+    @classmethod
+    def _parse_number(cls, value):
+        # older clients send free text such as "5 years" or "500 BDT"
+        return leading_number(value) if isinstance(value, str) else value
+
 
 class DoctorOut(BaseModel):
     id: int
@@ -106,8 +115,8 @@ class DoctorOut(BaseModel):
     phone: Optional[str] = None
     chamber: Optional[str] = None
     bmdc_number: Optional[str] = None
-    experience: Optional[str] = None
-    consultation_fee: Optional[str] = None
+    experience: Optional[int] = None
+    consultation_fee: Optional[Decimal] = None
     status: str
     specializations: Optional[list[SpecializationOut]] = None
     institutes: Optional[list[InstituteOut]] = None
@@ -116,6 +125,34 @@ class DoctorOut(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+
+class DoctorFacetCount(BaseModel):
+    id: int
+    name: str
+    count: int
+
+
+class DoctorSearchOut(BaseModel):
+    items: list[DoctorOut]
+    total: int
+    # facet name (specializations / institutes / qualifications) -> counts of
+    # doctors matching every other filter, most common first
+    facets: dict[str, list[DoctorFacetCount]]
+
+
+class AvailabilityDayOut(BaseModel):
+    date: date
+    capacity: int
+    booked: int
+    remaining: int
+
+
+class DoctorAvailabilityOut(BaseModel):
+    doctor_id: int
+    full_name: str
+    # only days with remaining capacity
+    days: list[AvailabilityDayOut]
 # =========================
 # PATIENT
 # =========================
@@ -163,6 +200,14 @@ class ScheduleOut(ScheduleCreate):
     }
 
 
+class ScheduleSlotsOut(BaseModel):
+    schedule_id: int
+    date: date
+    slots: list[time]
+    free_slots: list[time]
+    next_free_slot: Optional[time] = None
+
+
 
 class AppointmentCreate(BaseModel):
     doctor_id: int
@@ -231,6 +276,8 @@ class PrescriptionCreate(BaseModel):
     patient_id: int
     notes: str
     medicines: Optional[list["PrescriptionMedicineCreate"]] = None
+    # skip the misspelled-medicine check and create unknown names as given
+    confirm_new_medicines: bool = False
 
 
 class MedicineCreate(BaseModel):
@@ -8,8 +8,8 @@ from ..repositories.admin_repo import AdminRepository
 class AdminService:
 
     @staticmethod
-    def get_dashboard_counts(db: Session) -> dict:
-        return AdminRepository.get_counts(db)
+    def get_dashboard_counts(db: Session, exact: bool = False) -> dict:
+        return AdminRepository.get_counts(db, exact)
 
     @staticmethod
     def list_pending_doctors(db: Session):
@@ -28,5 +28,9 @@ class AdminService:
         return AdminRepository.appointment_overview(db, days)
 
     @staticmethod
-    def popular_specializations(db: Session, limit: int = 10):
-        return AdminRepository.popular_specializations(db, limit)
+    def new_patients_overview(db: Session, days: int = 7):
+        return AdminRepository.new_patients_overview(db, days)
+
+    @staticmethod
+    def popular_specializations(db: Session, limit: int = 10, days: int = 30):
+        return AdminRepository.popular_specializations(db, limit, days)
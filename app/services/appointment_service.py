@@ -1,10 +1,11 @@
 """
 Appointment service - Business logic for appointment operations
 """
+from datetime import date
+from typing import Optional
 from sqlalchemy.orm import Session
 from ..schemas import AppointmentCreate, AppointmentOut, AppointmentWithPatientCreate,AppointmentDoctorOut
 from ..repositories.appointment_repo import AppointmentRepository
-from ..utils import send_patient_welcome_email
 class AppointmentService:
     
     @staticmethod
@@ -15,12 +16,6 @@ class AppointmentService:
     @staticmethod
     def create_appointment_with_patient(db: Session, data: AppointmentWithPatientCreate) -> AppointmentDoctorOut:
         appointment = AppointmentRepository.create_appointment_with_patient(db, data)
-        if hasattr(appointment, "_email"):
-            send_patient_welcome_email(
-                appointment._email,
-                appointment._temp_password
-            )
-
         return AppointmentDoctorOut.from_orm(appointment)
     
     @staticmethod
@@ -32,19 +27,29 @@ class AppointmentService:
         return AppointmentOut.from_orm(appointment)
     
     @staticmethod
-    def get_patient_appointments(db: Session, patient_id: int):
-        """Get all appointments for a patient"""
-        return AppointmentRepository.get_appointments_by_patient(db, patient_id)
+    def get_patient_appointments(db: Session, patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 100, cursor: Optional[str] = None):
+        """Page of appointments for a patient; returns (items, next_cursor)"""
+        return AppointmentRepository.get_appointments_by_patient(db, patient_id, date_from, date_to, limit, cursor)
+
+    @staticmethod
+    def export_patient_appointments(db: Session, patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """Every appointment for a patient, streamed in batches"""
+        return AppointmentRepository.iter_appointments_by_patient(db, patient_id, date_from, date_to)
     
     @staticmethod
-    def get_doctor_appointments(db: Session, doctor_id: int):
-        """Get all appointments for a doctor"""
-        return AppointmentRepository.get_appointments_by_doctor(db, doctor_id)
+    def get_doctor_appointments(db: Session, doctor_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 100, cursor: Optional[str] = None):
+        """Page of appointments for a doctor; returns (items, next_cursor)"""
+        return AppointmentRepository.get_appointments_by_doctor(db, doctor_id, date_from, date_to, limit, cursor)
+
+    @staticmethod
+    def export_doctor_appointments(db: Session, doctor_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """Every appointment for a doctor, streamed in batches"""
+        return AppointmentRepository.iter_appointments_by_doctor(db, doctor_id, date_from, date_to)
     
     @staticmethod
-    def list_appointments(db: Session, skip: int = 0, limit: int = 100):
-        """List all appointments"""
-        return AppointmentRepository.get_all_appointments(db, skip, limit)
+    def list_appointments(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """List a page of appointments; returns (items, next_cursor)"""
+        return AppointmentRepository.get_all_appointments(db, skip, limit, cursor)
     
     @staticmethod
     def update_appointment(db: Session, appointment_id: int, update_data: dict) -> AppointmentOut:
@@ -54,9 +59,9 @@ class AppointmentService:
             raise Exception("Appointment not found")
         return AppointmentOut.from_orm(appointment)
     @staticmethod
-    def get_patients_by_doctor(db: Session, doctor_id: int):
-        """Get all patients for a doctor"""
-        return AppointmentRepository.get_patients_by_doctor(db, doctor_id)
+    def get_patients_by_doctor(db: Session, doctor_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 100, cursor: Optional[str] = None):
+        """Page of patients for a doctor; returns (items, next_cursor)"""
+        return AppointmentRepository.get_patients_by_doctor(db, doctor_id, date_from, date_to, limit, cursor)
     @staticmethod
     def delete_appointment(db: Session, appointment_id: int) -> bool:
         """Delete appointment"""
@@ -0,0 +1,27 @@
+"""
+Async read service - business logic for the async hot read endpoints
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..repositories.async_read_repo import AsyncReadRepository
+
+
+class AsyncReadService:
+    """Service for the opt-in AsyncSession read paths"""
+
+    @staticmethod
+    async def get_doctor_appointments(db: AsyncSession, doctor_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 100, cursor: Optional[str] = None):
+        """Page of appointments for a doctor; returns (items, next_cursor)"""
+        return await AsyncReadRepository.get_appointments_by_doctor(db, doctor_id, date_from, date_to, limit, cursor)
+
+    @staticmethod
+    async def get_patient_dashboard_stats(db: AsyncSession, patient_id: int) -> dict:
+        """Return dashboard counts for a patient"""
+        return await AsyncReadRepository.get_patient_dashboard_counts(db, patient_id)
+
+    @staticmethod
+    async def get_patient_prescriptions(db: AsyncSession, patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 100, cursor: Optional[str] = None):
+        """Page of prescriptions for a patient; returns (items, next_cursor)"""
+        return await AsyncReadRepository.get_prescriptions_by_patient(db, patient_id, date_from, date_to, limit, cursor)
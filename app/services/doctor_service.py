@@ -1,9 +1,14 @@
+from datetime import date, timedelta
+from typing import Optional
 from sqlalchemy.orm import Session
+from ..core.config import settings
 from ..models import Doctor
 from ..schemas import DoctorCreate, DoctorOut
+from ..repositories.availability_index import availability_index
 from ..repositories.doctor_repo import DoctorRepository
 from ..repositories.appointment_repo import AppointmentRepository
 from ..repositories.schedule_repo import ScheduleRepository
+from ..exceptions.http_exceptions import ValidationException
 
 
 class DoctorService:
@@ -23,8 +28,28 @@ class DoctorService:
         return doctor
     
     @staticmethod
-    def list_doctors(db: Session, skip: int = 0, limit: int = 100):
-        return DoctorRepository.get_all_doctors(db, skip, limit)
+    def list_doctors(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        return DoctorRepository.get_all_doctors(db, skip, limit, cursor)
+    
+    @staticmethod
+    def search_directory(db: Session, selected: dict, status: Optional[str], fee_min=None, fee_max=None, min_experience: Optional[int] = None, limit: int = 20, cursor: Optional[str] = None) -> dict:
+        """Faceted doctor directory search"""
+        if fee_min is not None and fee_max is not None and fee_min > fee_max:
+            raise ValidationException("fee_min must not exceed fee_max")
+        return DoctorRepository.search_directory(db, selected, status, fee_min, fee_max, min_experience, limit, cursor)
+    
+    @staticmethod
+    def list_available(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 100) -> list:
+        """Approved doctors with free capacity on a day in [date_from, date_to] (default: today)"""
+        date_from = date_from or date.today()
+        date_to = date_to or date_from
+        if date_from < date.today():
+            raise ValidationException("date_from must not be in the past")
+        if date_to < date_from:
+            raise ValidationException("date_to must not be before date_from")
+        if date_to - date_from >= timedelta(days=settings.AVAILABILITY_MAX_DAYS):
+            raise ValidationException(f"Date range is limited to {settings.AVAILABILITY_MAX_DAYS} days")
+        return availability_index.available(db, date_from, date_to, limit)
     
     @staticmethod
     def list_doctors_by_status(db: Session, status: str):
@@ -46,15 +71,7 @@ class DoctorService:
     @staticmethod
     def get_dashboard_stats(db: Session, doctor_id: int) -> dict:
         """Get dashboard statistics for a doctor"""
-        today_appointments = AppointmentRepository.get_appointment_count_today(db, doctor_id)
-        total_patients = DoctorRepository.get_patient_count(db, doctor_id)
-        pending_reports = AppointmentRepository.get_pending_reports_count(db, doctor_id)
-        
-        return {
-            "today_appointments": today_appointments,
-            "total_patients": total_patients,
-            "pending_reports": pending_reports
-        }
+        return DoctorRepository.get_dashboard_counts(db, doctor_id)
     
     @staticmethod
     def get_doctor_schedule(db: Session, doctor_id: int):
@@ -1,10 +1,13 @@
 """
 Medicine service - Business logic for medicine operations
 """
+from typing import Optional
 from sqlalchemy.orm import Session
 from ..models import Medicine
 from ..schemas import MedicineCreate, MedicineOut
-from ..repositories.medicine_repo import MedicineRepository
+from ..exceptions.http_exceptions import DuplicateMedicineException
+from ..repositories.medicine_index import medicine_index
+from ..repositories.medicine_repo import MEDICINE_KEY_FIELDS, MedicineRepository, medicine_key
 
 
 class MedicineService:
@@ -22,18 +25,70 @@ class MedicineService:
         return MedicineOut.from_orm(med)
 
     @staticmethod
-    def list_medicines(db: Session, skip: int = 0, limit: int = 100):
-        return MedicineRepository.get_all_medicines(db, skip, limit)
+    def list_medicines(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        return MedicineRepository.get_all_medicines(db, skip, limit, cursor)
 
     @staticmethod
     def list_medicines_by_name(db: Session, name: str):
         return MedicineRepository.get_medicine_by_name(db, name)
 
+    @staticmethod
+    def typeahead(db: Session, query: str, limit: int = 10, mode: str = "prefix") -> list[MedicineOut]:
+        """Ranked prefix (or, with mode="fuzzy", misspelling-tolerant) matches from the in-memory
+        index; a name prefix query until the index is built"""
+        medicine_index.rebuild_if_stale()
+        if medicine_index.ready and mode == "fuzzy":
+            matches = MedicineService._still_in_catalog(db, [m for m, _ in medicine_index.fuzzy(query, limit)])
+        elif medicine_index.ready:
+            matches = MedicineService._still_in_catalog(db, medicine_index.search(query, limit))
+        else:
+            matches = MedicineRepository.search_by_name_prefix(db, query.strip(), limit)
+        return [MedicineOut.model_validate(m) for m in matches]
+
+    @staticmethod
+    def _still_in_catalog(db: Session, matches: list) -> list:
+        """Drop index entries whose row was deleted where the index could not
+        see it (another worker, the dedupe job); they leave the index too"""
+        existing = MedicineRepository.get_existing_ids(db, [m.id for m in matches])
+        for m in matches:
+            if m.id not in existing:
+                medicine_index.remove(m.id)
+        return [m for m in matches if m.id in existing]
+
+    @staticmethod
+    def suggest_existing(db: Session, medicines: list[MedicineCreate], limit: int = 3) -> list[dict]:
+        """Close catalog matches for new medicine names that look like misspellings.
+
+        A name that already exists verbatim (e.g. a new strength) is not
+        flagged; neither is anything while the index is not built.
+        """
+        if not medicine_index.ready:
+            return []
+        medicine_index.rebuild_if_stale()
+        flagged = []
+        for medicine in medicines:
+            if not medicine.name:
+                continue
+            matches = medicine_index.fuzzy(medicine.name, limit)
+            kept = {m.id for m in MedicineService._still_in_catalog(db, [m for m, _ in matches])}
+            matches = [(m, distance) for m, distance in matches if m.id in kept]
+            if matches and all(distance > 0 for _, distance in matches):
+                flagged.append({
+                    "name": medicine.name,
+                    "suggestions": [MedicineOut.model_validate(m).model_dump() for m, _ in matches],
+                })
+        return flagged
+
     @staticmethod
     def update_medicine(db: Session, medicine_id: int, update_data: dict) -> MedicineOut:
-        med = MedicineRepository.update_medicine(db, medicine_id, update_data)
-        if not med:
+        current = MedicineRepository.get_medicine_by_id(db, medicine_id)
+        if not current:
             raise Exception("Medicine not found")
+        fields = {f: update_data.get(f, getattr(current, f)) for f in MEDICINE_KEY_FIELDS}
+        other = MedicineRepository.get_medicine_by_key(db, medicine_key(**fields))
+        if other and other.id != medicine_id:
+            raise DuplicateMedicineException(f"Medicine already exists with id {other.id}")
+        med = MedicineRepository.update_medicine(db, medicine_id, update_data)
         return MedicineOut.from_orm(med)
 
     @staticmethod
@@ -1,6 +1,7 @@
 """
 Patient service - Business logic for patient operations
 """
+from typing import Optional
 from sqlalchemy.orm import Session
 from ..models import Patient
 from ..repositories.patient_repo import PatientRepository
@@ -26,9 +27,9 @@ class PatientService:
         return PatientOut.from_orm(patient)
     
     @staticmethod
-    def list_patients(db: Session, skip: int = 0, limit: int = 100):
-        """List all patients"""
-        return PatientRepository.get_all_patients(db, skip, limit)
+    def list_patients(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """List a page of patients; returns (items, next_cursor)"""
+        return PatientRepository.get_all_patients(db, skip, limit, cursor)
     
     @staticmethod
     def update_patient(db: Session, patient_id: int, update_data: dict) -> PatientOut:
@@ -50,15 +51,7 @@ class PatientService:
         - visited doctors (distinct doctors with past appointments)
         - active prescriptions (count of prescriptions)
         """
-        upcoming_appointments = PatientRepository.count_upcoming_appointments(db, patient_id)
-        visited_doctors = PatientRepository.count_visited_doctors(db, patient_id)
-        active_prescriptions = PatientRepository.count_active_prescriptions(db, patient_id)
-
-        return {
-            "upcoming_appointments": upcoming_appointments,
-            "visited_doctors": visited_doctors,
-            "active_prescriptions": active_prescriptions,
-        }
+        return PatientRepository.get_dashboard_counts(db, patient_id)
 
     @staticmethod
     def list_upcoming_appointments(db: Session, patient_id: int, limit: int = 10):
@@ -67,7 +60,7 @@ class PatientService:
         return appointments
 
     @staticmethod
-    def search_by_phone(db: Session, phone: str):
-        """Search patients by phone and return list of PatientOut."""
-        patients = PatientRepository.search_patients_by_phone(db, phone)
-        return [PatientOut.from_orm(p) for p in patients]
+    def search_by_phone(db: Session, phone: str, limit: int = 20, cursor: Optional[str] = None, match: Optional[str] = None):
+        """Search patients by phone prefix or last digits; returns (list of PatientOut, next_cursor)."""
+        patients, next_cursor = PatientRepository.search_patients_by_phone(db, phone, limit, cursor, match)
+        return [PatientOut.from_orm(p) for p in patients], next_cursor
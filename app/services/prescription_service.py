@@ -1,12 +1,19 @@
 """
 Prescription service - Business logic for prescription operations
 """
+from datetime import date
+from typing import Optional
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from ..models import Prescription
-from ..schemas import PrescriptionCreate, PrescriptionOut
+from ..schemas import MedicineCreate, PrescriptionCreate, PrescriptionOut
 from ..repositories.prescription_repo import PrescriptionRepository
 from ..repositories.appointment_repo import AppointmentRepository
-from ..exceptions.http_exceptions import ResourceNotFoundException, PermissionDeniedException
+from ..repositories.medicine_index import medicine_index
+from ..exceptions.http_exceptions import (
+    MedicineSuggestionException, PermissionDeniedException, ResourceNotFoundException, ValidationException,
+)
+from .medicine_service import MedicineService
 
 
 class PrescriptionService:
@@ -21,14 +28,26 @@ class PrescriptionService:
 
         if current_doctor and appointment.doctor_id != current_doctor.id:
             raise PermissionDeniedException("You are not allowed to create a prescription for this appointment")
-        updateAppointment = AppointmentRepository.update_appointment(
-            db,
-            appointment.id,
-            {"status": "completed"}
-        )
-        new_prescription = PrescriptionRepository.create_prescription(db, prescription)
+
+        if not prescription.confirm_new_medicines:
+            PrescriptionService._check_new_medicines(db, [
+                pm.medicine for pm in prescription.medicines or []
+                if not pm.medicine_id and pm.medicine and not pm.medicine.id
+            ])
+
+        # the appointment is marked completed in the same transaction as the prescription
+        new_prescription = PrescriptionRepository.create_prescription(db, prescription, appointment=appointment)
+        # prescription frequency is the typeahead ranking signal
+        medicine_index.record_usage(pm.medicine_id for pm in new_prescription.medicines)
         return PrescriptionOut.from_orm(new_prescription)
     
+    @staticmethod
+    def _check_new_medicines(db: Session, new_medicines: list[MedicineCreate]) -> None:
+        """Reject medicine names that look like misspellings of catalog entries (409 with suggestions)"""
+        suggestions = MedicineService.suggest_existing(db, new_medicines)
+        if suggestions:
+            raise MedicineSuggestionException(suggestions)
+
     @staticmethod
     def get_prescription(db: Session, prescription_id: int) -> PrescriptionOut:
        
@@ -46,21 +65,40 @@ class PrescriptionService:
         return PrescriptionOut.from_orm(prescription)
     
     @staticmethod
-    def get_patient_prescriptions(db: Session, patient_id: int):
-        """Get all prescriptions for a patient"""
-        return PrescriptionRepository.get_prescriptions_by_patient(db, patient_id)
+    def get_patient_prescriptions(db: Session, patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 100, cursor: Optional[str] = None):
+        """Page of prescriptions for a patient; returns (items, next_cursor)"""
+        return PrescriptionRepository.get_prescriptions_by_patient(db, patient_id, date_from, date_to, limit, cursor)
+
+    @staticmethod
+    def export_patient_prescriptions(db: Session, patient_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """Every prescription for a patient, streamed in batches"""
+        return PrescriptionRepository.iter_prescriptions_by_patient(db, patient_id, date_from, date_to)
     
     @staticmethod
-    def list_prescriptions(db: Session, skip: int = 0, limit: int = 100):
-        """List all prescriptions"""
-        return PrescriptionRepository.get_all_prescriptions(db, skip, limit)
+    def list_prescriptions(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """List a page of prescriptions; returns (items, next_cursor)"""
+        return PrescriptionRepository.get_all_prescriptions(db, skip, limit, cursor)
     
     @staticmethod
     def update_prescription(db: Session, prescription_id: int, update_data: dict) -> PrescriptionOut:
-        """Update prescription"""
+        """Update prescription; new medicine names get the same misspelling check as on create"""
+        if not PrescriptionRepository.get_prescription_by_id(db, prescription_id):
+            raise ResourceNotFoundException("Prescription not found")
+        if not update_data.pop("confirm_new_medicines", False):
+            new_medicines = []
+            for i, pm in enumerate(update_data.get("medicines") or []):
+                if not isinstance(pm, dict) or pm.get("medicine_id") or not isinstance(pm.get("medicine"), dict):
+                    continue
+                if pm["medicine"].get("id"):
+                    continue
+                try:
+                    new_medicines.append(MedicineCreate(**pm["medicine"]))
+                except ValidationError as e:
+                    error = e.errors()[0]
+                    field = ".".join(str(part) for part in error["loc"])
+                    raise ValidationException(f"medicines[{i}].medicine.{field}: {error['msg']}")
+            PrescriptionService._check_new_medicines(db, new_medicines)
         prescription = PrescriptionRepository.update_prescription(db, prescription_id, update_data)
-        if not prescription:
-            raise Exception("Prescription not found")
         return PrescriptionOut.from_orm(prescription)
     
     @staticmethod
@@ -1,10 +1,14 @@
 """
 Schedule service - Business logic for doctor schedule operations
 """
+from datetime import date, time
+from typing import Optional
 from sqlalchemy.orm import Session
 from ..models import DoctorSchedule
-from ..schemas import  ScheduleOut, ScheduleCreateInternal
+from ..schemas import  ScheduleOut, ScheduleCreateInternal, ScheduleSlotsOut
 from ..repositories.schedule_repo import ScheduleRepository
+from ..repositories.slot_repo import SlotRepository
+from ..exceptions.http_exceptions import ResourceNotFoundException
 
 
 class ScheduleService:
@@ -26,6 +30,26 @@ class ScheduleService:
             raise Exception("Schedule not found")
         return ScheduleOut.from_orm(schedule)
     
+    @staticmethod
+    def get_schedule_slots(
+        db: Session,
+        schedule_id: int,
+        day: date,
+        after: Optional[time] = None
+    ) -> ScheduleSlotsOut:
+        """Return all slots, the free ones and the next free slot for a date"""
+        schedule = ScheduleRepository.get_schedule_by_id(db, schedule_id)
+        if not schedule:
+            raise ResourceNotFoundException("Schedule not found")
+        book = SlotRepository.get_slot_book(db, schedule, day)
+        return ScheduleSlotsOut(
+            schedule_id=schedule_id,
+            date=day,
+            slots=book.slots,
+            free_slots=book.free,
+            next_free_slot=book.next_free(after),
+        )
+
     @staticmethod
     def get_doctor_schedules(db: Session, doctor_id: int):
         """Get all schedules for a doctor"""
@@ -37,9 +61,9 @@ class ScheduleService:
             return None
         return first_schedule.id
     @staticmethod
-    def list_schedules(db: Session, skip: int = 0, limit: int = 100):
-        """List all schedules"""
-        return ScheduleRepository.get_all_schedules(db, skip, limit)
+    def list_schedules(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """List a page of schedules; returns (items, next_cursor)"""
+        return ScheduleRepository.get_all_schedules(db, skip, limit, cursor)
     
     @staticmethod
     def update_schedule(db: Session, schedule_id: int, update_data: dict) -> ScheduleOut:
@@ -1,9 +1,10 @@
 from http.client import HTTPException
+from typing import Optional
 from sqlalchemy.orm import Session
 from ..models import User
 from ..schemas import UserCreate, UserOut
 from ..repositories.user_repo import UserRepository
-from ..utils import hash_password, verify_password
+from ..utils import hash_password, verify_password, password_needs_rehash
 from ..exceptions.http_exceptions import (
     EmailAlreadyExistsException,
     InvalidCredentialsException
@@ -31,6 +32,11 @@ class UserService:
         user = UserRepository.get_user_by_email(db, email)
         if not user or not verify_password(password, user.password):
             raise InvalidCredentialsException()
+
+        # bcrypt cost changed since this hash was made: upgrade it while we
+        # still hold the plaintext
+        if password_needs_rehash(user.password):
+            UserRepository.update_user(db, user.id, {"password": hash_password(password)})
         
         token = create_access_token({"id": user.id, "role": user.role})
         
@@ -57,9 +63,9 @@ class UserService:
         return user
     
     @staticmethod
-    def list_users(db: Session, skip: int = 0, limit: int = 100):
-        """List all users"""
-        return UserRepository.get_all_users(db, skip, limit)
+    def list_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+        """List a page of users; returns (items, next_cursor)"""
+        return UserRepository.get_all_users(db, skip, limit, cursor)
     
     @staticmethod
     def delete_user(db: Session, user_id: int) -> bool:
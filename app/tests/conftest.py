@@ -0,0 +1,94 @@
+"""
+Shared test fixtures
+"""
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db
+from app import models  # noqa: F401  (register tables on Base.metadata)
+from app.repositories import admin_repo, doctor_repo, patient_repo, slot_repo
+from app.repositories.availability_index import availability_index
+
+
+@pytest.fixture
+def db_engine():
+    """Fresh in-memory SQLite engine with the full schema"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine):
+    """Session bound to the in-memory test engine"""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def api_client(db_engine):
+    """TestClient whose requests use sessions on the in-memory test engine"""
+    from app.main import app
+
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def assert_num_queries(db_engine):
+    """Context manager asserting the exact number of SQL statements run on the test engine"""
+
+    @contextmanager
+    def check(expected: int):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db_engine, "before_cursor_execute", capture)
+        try:
+            yield statements
+        finally:
+            event.remove(db_engine, "before_cursor_execute", capture)
+        assert len(statements) == expected, f"expected {expected} statements, got {len(statements)}:\n" + "\n".join(statements)
+
+    return check
+
+
+@pytest.fixture(autouse=True)
+def clear_query_caches():
+    """Every test gets a fresh database, so cached counts must not carry over"""
+    caches = (
+        patient_repo.dashboard_cache, doctor_repo.dashboard_cache, doctor_repo._facet_cache,
+        admin_repo._specialization_cache, admin_repo._counts_cache, slot_repo._slot_cache,
+    )
+    for cache in caches + (availability_index,):
+        cache.clear()
+    yield
+    for cache in caches + (availability_index,):
+        cache.clear()
@@ -0,0 +1,69 @@
+"""
+Tests for the admin dashboard counters
+"""
+from sqlalchemy import literal
+
+from app.models import Appointment, Doctor, Patient, User
+from app.repositories import admin_repo
+
+
+def _seed(db_session):
+    db_session.add_all([User(id=i, email=f"user{i}@example.com", role="doctor" if i < 4 else "patient") for i in range(1, 7)])
+    db_session.add_all([
+        Doctor(id=i, full_name=f"Doctor {i}", phone=f"0170000000{i}", status="pending" if i == 1 else "approved")
+        for i in range(1, 4)
+    ])
+    db_session.add_all([Patient(id=i, full_name=f"Patient {i}", phone=f"018000000{i}") for i in range(4, 7)])
+    db_session.add_all([Appointment(doctor_id=2, patient_id=4 + i % 3) for i in range(5)])
+    db_session.commit()
+
+
+def test_dashboard_counts_in_one_statement(api_client, db_session, assert_num_queries):
+    """The four counters come from a single query (exact on SQLite)"""
+    _seed(db_session)
+
+    with assert_num_queries(1):
+        response = api_client.get("/api/v1/admin/dashboard")
+    assert response.json() == {
+        "total_doctors": 3,
+        "total_patients": 3,
+        "pending_doctors": 1,
+        "total_appointments": 5,
+        "approximate": False,
+    }
+    assert api_client.get("/api/v1/admin/dashboard", params={"exact": True}).json()["approximate"] is False
+
+
+def test_estimated_totals_are_cached_but_pending_is_live(db_engine, db_session, monkeypatch, assert_num_queries):
+    """On MySQL the estimated totals are reused from the cache while pending doctors are recounted"""
+    _seed(db_session)
+    # information_schema does not exist on SQLite; stand in fixed estimates
+    monkeypatch.setattr(db_engine.dialect, "name", "mysql")
+    monkeypatch.setattr(admin_repo, "_estimated_rows", lambda model: literal(1000))
+
+    first = admin_repo.AdminRepository.get_counts(db_session)
+    assert first == {
+        "total_doctors": 1000,
+        "total_patients": 1000,
+        "pending_doctors": 1,
+        "total_appointments": 1000,
+        "approximate": True,
+    }
+
+    db_session.get(Doctor, 2).status = "pending"
+    db_session.commit()
+    monkeypatch.setattr(admin_repo, "_estimated_rows", lambda model: literal(2000))
+    with assert_num_queries(1):
+        cached = admin_repo.AdminRepository.get_counts(db_session)
+    assert cached == {**first, "pending_doctors": 2}
+
+    exact = admin_repo.AdminRepository.get_counts(db_session, exact=True)
+    assert exact == {
+        "total_doctors": 3,
+        "total_patients": 3,
+        "pending_doctors": 2,
+        "total_appointments": 5,
+        "approximate": False,
+    }
+    admin_repo._counts_cache.clear()
+    assert admin_repo.AdminRepository.get_counts(db_session)["total_doctors"] == 2000
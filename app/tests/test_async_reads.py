@@ -0,0 +1,71 @@
+"""
+Tests for the async read repository (aiosqlite)
+"""
+from datetime import date, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models import (
+    Appointment, Doctor, Medicine, Patient, Prescription, PrescriptionMedicine, Specialization, User,
+)
+from app.repositories.async_read_repo import AsyncReadRepository
+from app.schemas import AppointmentDoctorOut, PrescriptionWithDoctorOut
+
+
+@pytest_asyncio.fixture
+async def async_db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+
+    session.add_all([
+        User(id=1, email="doc@example.com", role="doctor"),
+        User(id=2, email="pat@example.com", role="patient"),
+    ])
+    await session.flush()
+    cardiology = Specialization(name="Cardiology")
+    session.add_all([
+        Doctor(id=1, full_name="Dr. Test", phone="01700000000", specializations=[cardiology]),
+        Patient(id=2, full_name="Patient", age=30, gender="female", phone="01800000000", address="Dhaka"),
+        Appointment(id=1, doctor_id=1, patient_id=2, appointment_date=date.today() - timedelta(days=3)),
+        Appointment(id=2, doctor_id=1, patient_id=2, appointment_date=date.today() + timedelta(days=3)),
+        Medicine(id=1, name="Paracetamol", strength="500mg", form="Tablet"),
+    ])
+    await session.flush()
+    session.add(Prescription(id=1, appointment_id=1, patient_id=2, notes="rest"))
+    await session.flush()
+    session.add(PrescriptionMedicine(prescription_id=1, medicine_id=1, dosage="1+0+1"))
+    await session.commit()
+
+    yield session
+    await session.close()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_doctor_appointments_serialize(async_db):
+    """Appointments come back with everything AppointmentDoctorOut needs"""
+    rows, next_cursor = await AsyncReadRepository.get_appointments_by_doctor(async_db, 1)
+    out = [AppointmentDoctorOut.model_validate(r) for r in rows]
+    assert [a.id for a in out] == [2, 1]  # newest first
+    assert next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_patient_dashboard_counts(async_db):
+    """Dashboard counts match the seeded history"""
+    counts = await AsyncReadRepository.get_patient_dashboard_counts(async_db, 2)
+    assert counts == {"upcoming_appointments": 1, "visited_doctors": 1, "active_prescriptions": 1}
+
+
+@pytest.mark.asyncio
+async def test_prescription_history_serializes(async_db):
+    """Prescription history loads medicines and the doctor's specializations eagerly"""
+    rows, _ = await AsyncReadRepository.get_prescriptions_by_patient(async_db, 2)
+    out = PrescriptionWithDoctorOut.model_validate(rows[0])
+    assert out.medicines[0].medicine.name == "Paracetamol"
+    assert out.appointment.doctor.specializations[0].name == "Cardiology"
@@ -0,0 +1,43 @@
+"""
+Tests for the authentication middleware
+"""
+from app.core.security import create_access_token
+from app.models import Doctor, User
+
+SCHEDULE = {"day_of_week": "Monday - Friday", "start_time": "09:00:00", "end_time": "12:00:00", "max_patients": 6}
+
+
+def _auth(user_id: int, role: str) -> dict:
+    return {"Authorization": "Bearer " + create_access_token({"id": user_id, "role": role})}
+
+
+def test_valid_token_sets_user_id_and_role(api_client, db_session):
+    """Routes reading request.state get the token's user id and role"""
+    db_session.add(User(id=1, email="doc@example.com", role="doctor"))
+    db_session.flush()
+    db_session.add(Doctor(id=1, full_name="Dr. Test", phone="01700000000"))
+    db_session.commit()
+
+    response = api_client.post("/api/v1/schedules/", json=SCHEDULE, headers=_auth(1, "doctor"))
+    assert response.status_code == 201
+    assert db_session.get(Doctor, 1).schedules[0].id == response.json()["id"]
+
+    # same claims without the Bearer prefix
+    raw = {"Authorization": create_access_token({"id": 2, "role": "patient"})}
+    assert api_client.post("/api/v1/schedules/", json=SCHEDULE, headers=raw).status_code == 403
+
+
+def test_missing_or_bad_token_is_anonymous(api_client):
+    """A missing, malformed or expired token leaves the request anonymous, so guarded routes answer 401"""
+    assert api_client.post("/api/v1/schedules/", json=SCHEDULE).status_code == 401
+    bad = {"Authorization": "Bearer not-a-jwt"}
+    assert api_client.post("/api/v1/schedules/", json=SCHEDULE, headers=bad).status_code == 401
+    assert api_client.get("/api/v1/patients/me/dashboard", headers=bad).status_code == 401
+
+
+def test_public_paths_pass_through_with_security_headers(api_client):
+    """Public endpoints ignore a bad token and every response gets the security headers"""
+    response = api_client.get("/health", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 200
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["X-Frame-Options"] == "DENY"
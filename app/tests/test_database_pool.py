@@ -0,0 +1,84 @@
+"""
+Tests for the instrumented connection pool and the idle-connection ping
+"""
+import time
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from app import database
+from app.core.config import settings
+from app.database import InstrumentedQueuePool, PoolMetrics, _engine_options, _install_idle_ping
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """A fresh PoolMetrics in place of the process-wide one"""
+    fresh = PoolMetrics()
+    monkeypatch.setattr(database, "pool_metrics", fresh)
+    return fresh
+
+
+def _file_engine(tmp_path, **options):
+    return create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=InstrumentedQueuePool, **options)
+
+
+def test_engine_options_wire_the_pool_settings():
+    """Server databases get the sized, instrumented pool; in-memory SQLite keeps the default pool"""
+    options = _engine_options("mysql+pymysql://app@db/hospital")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert (options["pool_size"], options["max_overflow"], options["pool_timeout"], options["pool_recycle"]) == (
+        settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_POOL_TIMEOUT, settings.DB_POOL_RECYCLE,
+    )
+    assert options["pool_pre_ping"] is settings.DB_POOL_PRE_PING
+    assert "poolclass" not in _engine_options("mysql+pymysql://app@db/hospital", instrumented=False)
+    for url in ("sqlite://", "sqlite:///:memory:"):
+        assert set(_engine_options(url)) == {"echo", "pool_pre_ping"}
+
+
+def test_checkouts_overflow_and_timeouts_are_counted(tmp_path, metrics, monkeypatch):
+    """Checkouts past pool_size use the overflow; one past max_overflow times out and is counted"""
+    engine = _file_engine(tmp_path, pool_size=1, max_overflow=1, pool_timeout=0.05)
+    monkeypatch.setattr(database, "engine", engine)
+
+    first, second = engine.connect(), engine.connect()
+    stats = database.get_pool_stats()
+    assert (stats["pool"], stats["size"], stats["in_use"], stats["overflow"]) == ("InstrumentedQueuePool", 1, 2, 1)
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    second.close()
+    first.close()
+
+    stats = database.get_pool_stats()
+    assert (stats["in_use"], stats["idle"]) == (0, 1)
+    assert (stats["checkouts"], stats["timeouts"]) == (2, 1)
+    assert stats["wait_max_ms"] >= 50
+    engine.dispose()
+
+
+def test_idle_ping_replaces_a_dead_connection(tmp_path, metrics):
+    """A connection idle past the threshold is pinged on checkout; a dead one is swapped for a fresh one"""
+    engine = _file_engine(tmp_path, pool_size=1, max_overflow=0)
+    _install_idle_ping(engine, idle_seconds=0.01)
+    assert isinstance(engine.pool, QueuePool)
+
+    with engine.connect() as conn:
+        dead = conn.connection.dbapi_connection
+    with engine.connect() as conn:  # reused straight away, no ping
+        assert conn.connection.dbapi_connection is dead
+    assert metrics.liveness_pings == 0
+
+    dead.close()  # the server dropped it while it sat in the pool
+    time.sleep(0.02)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert conn.connection.dbapi_connection is not dead
+    # the replacement is fresh, so it is not pinged again
+    assert (metrics.liveness_pings, metrics.liveness_failures) == (1, 1)
+
+    time.sleep(0.02)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert (metrics.liveness_pings, metrics.liveness_failures) == (2, 1)
+    engine.dispose()
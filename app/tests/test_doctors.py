@@ -1,10 +1,15 @@
 """
 Tests for doctor operations
 """
+from datetime import date, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.models import Appointment, Doctor, Institute, Patient, Prescription, Qualification, Specialization, User
+from app.repositories.appointment_repo import AppointmentRepository
+from app.repositories.doctor_repo import DoctorRepository
 
 client = TestClient(app)
 
@@ -21,3 +26,176 @@ def test_get_doctor():
     response = client.get("/doctors/1")
     # Will return 404 if doctor doesn't exist
     assert response.status_code in [200, 404]
+
+
+def test_dashboard_counts_match_and_drop_on_prescription_writes(db_session):
+    """The aggregate agrees with the per-count queries and is evicted by prescription commits"""
+    today = date.today()
+    db_session.add_all([User(id=i, email=f"u{i}@example.com", role="doctor" if i == 1 else "patient") for i in (1, 2, 3)])
+    db_session.flush()
+    db_session.add(Doctor(id=1, full_name="D1", phone="1"))
+    db_session.add_all([Patient(id=i, full_name=f"P{i}", phone=f"0171234567{i}") for i in (2, 3)])
+    db_session.flush()
+    db_session.add_all([
+        Appointment(id=1, doctor_id=1, patient_id=2, appointment_date=today - timedelta(days=7)),
+        Appointment(id=2, doctor_id=1, patient_id=2, appointment_date=today),
+        Appointment(id=3, doctor_id=1, patient_id=3, appointment_date=today),
+    ])
+    db_session.flush()
+    db_session.add(Prescription(appointment_id=1, patient_id=2))
+    db_session.commit()
+
+    counts = DoctorRepository.get_dashboard_counts(db_session, 1)
+    assert counts == {
+        "today_appointments": AppointmentRepository.get_appointment_count_today(db_session, 1),
+        "total_patients": DoctorRepository.get_patient_count(db_session, 1),
+        "pending_reports": AppointmentRepository.get_pending_reports_count(db_session, 1),
+    } == {"today_appointments": 2, "total_patients": 2, "pending_reports": 1}
+
+    db_session.add(Prescription(appointment_id=2, patient_id=2))
+    db_session.commit()
+    assert DoctorRepository.get_dashboard_counts(db_session, 1)["pending_reports"] == 2
+    db_session.delete(db_session.query(Prescription).filter_by(appointment_id=1).one())
+    db_session.commit()
+    assert DoctorRepository.get_dashboard_counts(db_session, 1)["pending_reports"] == 1
+
+
+@pytest.mark.parametrize("path", ["/api/v1/doctors/?limit=100", "/api/v1/doctors/status/approved"])
+def test_doctor_list_endpoints_load_relationships_in_batches(db_session, api_client, assert_num_queries, path):
+    """A page of doctors costs one query plus one per relationship, however many doctors"""
+    db_session.add_all([User(id=i, email=f"d{i}@example.com", role="doctor") for i in range(1, 31)])
+    specializations = [Specialization(name=f"S{i}") for i in range(3)]
+    institutes = [Institute(name=f"I{i}") for i in range(3)]
+    qualifications = [Qualification(name=f"Q{i}") for i in range(3)]
+    db_session.flush()
+    db_session.add_all([
+        Doctor(
+            id=i, full_name=f"Doctor {i}", phone=f"0170{i:07d}", status="approved",
+            specializations=[specializations[i % 3]], institutes=[institutes[i % 3]], qualifications=[qualifications[i % 3]],
+        )
+        for i in range(1, 31)
+    ])
+    db_session.commit()
+
+    with assert_num_queries(4):
+        response = api_client.get(path)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == 30
+    assert body[0]["specializations"][0]["name"] == "S1"
+
+
+def test_directory_search_filters_and_counts_facets(db_session, api_client):
+    """Filters combine across facets; each facet is counted without its own filter"""
+    cardiology, neurology = Specialization(name="Cardiology"), Specialization(name="Neurology")
+    dmc, bsmmu = Institute(name="DMC"), Institute(name="BSMMU")
+    doctors = [
+        # id, fee, status, specializations, institutes
+        (1, "500 BDT", "approved", [cardiology], [dmc]),
+        (2, "800", "approved", [cardiology], [bsmmu]),
+        (3, "300", "approved", [neurology], [dmc]),
+        (4, "400", "pending", [cardiology], [dmc]),
+    ]
+    db_session.add_all([User(id=i, email=f"d{i}@example.com", role="doctor") for i, *_ in doctors])
+    db_session.flush()
+    db_session.add_all([
+        Doctor(id=i, full_name=f"Doctor {i}", phone=f"0170{i:07d}", consultation_fee=fee, experience="5 years",
+               status=status, specializations=specs, institutes=insts)
+        for i, fee, status, specs, insts in doctors
+    ])
+    db_session.commit()
+
+    response = api_client.get(f"/api/v1/doctors/search?specialization_id={cardiology.id}&fee_max=600")
+    assert response.status_code == 200
+    body = response.json()
+    assert [d["id"] for d in body["items"]] == [1]
+    assert body["total"] == 1
+    assert body["items"][0]["experience"] == 5
+    # specialization counts ignore the specialization filter but keep the fee and status filters
+    assert {f["name"]: f["count"] for f in body["facets"]["specializations"]} == {"Cardiology": 1, "Neurology": 1}
+    assert {f["name"]: f["count"] for f in body["facets"]["institutes"]} == {"DMC": 1}
+
+    response = api_client.get(f"/api/v1/doctors/search?institute_id={dmc.id}&institute_id={bsmmu.id}&limit=2")
+    assert [d["id"] for d in response.json()["items"]] == [1, 2]
+    assert "next_cursor" not in response.json()
+    cursor = response.headers["X-Next-Cursor"]
+    next_page = api_client.get(f"/api/v1/doctors/search?institute_id={dmc.id}&institute_id={bsmmu.id}&limit=2&cursor={cursor}")
+    assert not {d["id"] for d in next_page.json()["items"]} & {1, 2}
+    assert api_client.get("/api/v1/doctors/search?fee_min=900&fee_max=100").status_code == 422
+
+
+def test_available_doctors_follow_bookings_and_cancellations(db_session, api_client):
+    """Remaining capacity drops on booking and comes back on cancel without reloading the day"""
+    from datetime import time
+
+    from app.models import DoctorSchedule
+
+    today = date.today()
+    db_session.add_all([User(id=i, email=f"u{i}@example.com", role="doctor" if i < 3 else "patient") for i in (1, 2, 3)])
+    db_session.flush()
+    db_session.add_all([
+        Doctor(id=1, full_name="Open", phone="1", status="approved"),
+        Doctor(id=2, full_name="Pending", phone="2", status="pending"),
+    ])
+    db_session.add(Patient(id=3, full_name="P3", phone="01712345678"))
+    db_session.flush()
+    # no weekday in day_of_week: runs daily; two 30 minute slots
+    db_session.add_all([
+        DoctorSchedule(id=1, doctor_id=1, day_of_week="", start_time=time(9), end_time=time(10), max_patients=2),
+        DoctorSchedule(id=2, doctor_id=2, day_of_week="", start_time=time(9), end_time=time(10), max_patients=2),
+    ])
+    db_session.add(Appointment(id=1, doctor_id=1, patient_id=3, appointment_date=today, status="confirmed"))
+    db_session.commit()
+
+    def today_for(doctor_id):
+        body = api_client.get("/api/v1/doctors/available").json()
+        return next((d["days"][0] for d in body if d["doctor_id"] == doctor_id), None)
+
+    assert today_for(1) == {"date": today.isoformat(), "capacity": 2, "booked": 1, "remaining": 1}
+    assert today_for(2) is None
+
+    db_session.add(Appointment(id=2, doctor_id=1, patient_id=3, appointment_date=today))
+    db_session.commit()
+    assert today_for(1) is None
+
+    db_session.get(Appointment, 1).status = "cancelled"
+    db_session.commit()
+    assert today_for(1)["remaining"] == 1
+
+    tomorrow = (today + timedelta(days=1)).isoformat()
+    body = api_client.get(f"/api/v1/doctors/available?date_from={tomorrow}&date_to={tomorrow}").json()
+    assert body[0]["days"] == [{"date": tomorrow, "capacity": 2, "booked": 0, "remaining": 2}]
+    assert api_client.get(f"/api/v1/doctors/available?date_from={tomorrow}&date_to={today.isoformat()}").status_code == 422
+
+
+def test_available_doctors_with_weekday_range_schedules(db_session, api_client):
+    """A "Monday - Friday" schedule has capacity Tuesday to Thursday and none at the weekend"""
+    from datetime import time
+
+    from app.models import DoctorSchedule
+
+    today = date.today()
+    monday = today + timedelta(days=7 - today.weekday())
+    db_session.add_all([User(id=i, email=f"u{i}@example.com", role="doctor") for i in (1, 2)])
+    db_session.flush()
+    db_session.add_all([
+        Doctor(id=1, full_name="Weekdays", phone="1", status="approved"),
+        Doctor(id=2, full_name="Weekends", phone="2", status="approved"),
+    ])
+    db_session.flush()
+    db_session.add_all([
+        DoctorSchedule(id=1, doctor_id=1, day_of_week="Monday - Friday", start_time=time(9), end_time=time(10), max_patients=2),
+        DoctorSchedule(id=2, doctor_id=2, day_of_week="Sat, Sun", start_time=time(9), end_time=time(10), max_patients=2),
+    ])
+    db_session.commit()
+
+    body = api_client.get(
+        f"/api/v1/doctors/available?date_from={monday.isoformat()}&date_to={(monday + timedelta(days=6)).isoformat()}"
+    ).json()
+    open_days = {d["doctor_id"]: [date.fromisoformat(day["date"]).weekday() for day in d["days"]] for d in body}
+    assert open_days == {1: [0, 1, 2, 3, 4], 2: [5, 6]}
+
+    tuesday, thursday = (monday + timedelta(days=n) for n in (1, 3))
+    body = api_client.get(f"/api/v1/doctors/available?date_from={tuesday.isoformat()}&date_to={thursday.isoformat()}").json()
+    assert [d["doctor_id"] for d in body] == [1]
+    assert [day["capacity"] for day in body[0]["days"]] == [2, 2, 2]
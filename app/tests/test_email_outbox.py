@@ -0,0 +1,95 @@
+"""
+Tests for the email outbox dispatcher
+"""
+import smtplib
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from app.jobs.email_outbox import EmailOutboxDispatcher, smtp_configured
+from app.models import EmailOutbox
+from app.repositories.email_outbox_repo import EmailOutboxRepository
+
+
+class FakeSMTP:
+    """Stand-in for a local debugging SMTP server"""
+
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.sent = []
+        self.connections = 0
+
+    def __call__(self):
+        self.connections += 1
+        return self
+
+    def send_message(self, msg):
+        if msg["To"] in self.fail_for:
+            raise smtplib.SMTPRecipientsRefused({msg["To"]: (550, b"rejected")})
+        self.sent.append(msg["To"])
+
+    def quit(self):
+        pass
+
+
+def _enqueue(session_factory, addresses):
+    db = session_factory()
+    for address in addresses:
+        EmailOutboxRepository.enqueue(db, address, "Welcome", "hello")
+    db.commit()
+    db.close()
+
+
+def test_batch_is_sent_over_one_connection(db_engine):
+    """All due messages go out on a single SMTP connection"""
+    factory = sessionmaker(bind=db_engine)
+    _enqueue(factory, ["a@example.com", "b@example.com", "c@example.com"])
+    smtp = FakeSMTP()
+
+    sent = EmailOutboxDispatcher(session_factory=factory, smtp_factory=smtp).run_once()
+
+    assert sent == 3
+    assert smtp.connections == 1
+    db = factory()
+    assert {m.status for m in db.query(EmailOutbox)} == {"sent"}
+    assert all(m.body is None for m in db.query(EmailOutbox))
+
+
+def test_failed_message_is_retried_later(db_engine):
+    """A rejected message stays pending with a backoff instead of failing the batch"""
+    factory = sessionmaker(bind=db_engine)
+    _enqueue(factory, ["ok@example.com", "bad@example.com"])
+    smtp = FakeSMTP(fail_for=["bad@example.com"])
+
+    sent = EmailOutboxDispatcher(session_factory=factory, smtp_factory=smtp).run_once()
+
+    assert sent == 1
+    db = factory()
+    bad = db.query(EmailOutbox).filter(EmailOutbox.to_email == "bad@example.com").one()
+    assert bad.status == "pending"
+    assert bad.attempts == 1
+    assert bad.next_attempt_at > datetime.utcnow()
+    # not due yet, so a second pass sends nothing
+    assert EmailOutboxDispatcher(session_factory=factory, smtp_factory=smtp).run_once() == 0
+
+
+def test_final_failure_scrubs_body():
+    """A message that gives up drops its body, as a delivered one does"""
+    message = EmailOutbox(to_email="bad@example.com", subject="Welcome", body="temporary password", attempts=1)
+
+    EmailOutboxRepository.mark_failed(message, "rejected", max_attempts=2, backoff_seconds=1, backoff_max_seconds=1)
+
+    assert message.status == "failed"
+    assert message.body is None
+
+
+def test_unconfigured_smtp_leaves_messages_queued(db_engine):
+    """Without SMTP settings nothing is claimed, sent or counted as an attempt"""
+    factory = sessionmaker(bind=db_engine)
+    _enqueue(factory, ["a@example.com"])
+
+    assert not smtp_configured()
+    assert EmailOutboxDispatcher(session_factory=factory).run_once() == 0
+
+    message = factory().query(EmailOutbox).one()
+    assert (message.status, message.attempts, message.body) == ("pending", 0, "hello")
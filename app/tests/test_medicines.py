@@ -0,0 +1,204 @@
+"""
+Tests for medicine canonical keys, bulk get-or-create and the dedupe job
+"""
+import time
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.jobs.dedupe_medicines import dedupe_medicines
+from app.models import Medicine, Prescription, PrescriptionMedicine
+from app.repositories import medicine_repo
+from app.exceptions.http_exceptions import MedicineSuggestionException
+from app.repositories.medicine_index import max_edits, medicine_index
+from app.repositories.medicine_repo import MedicineRepository, medicine_key
+from app.schemas import MedicineCreate
+from app.services.medicine_service import MedicineService
+from app.services.prescription_service import PrescriptionService
+
+
+@pytest.fixture(autouse=True)
+def clear_key_cache():
+    medicine_repo._key_cache.clear()
+    yield
+    medicine_repo._key_cache.clear()
+
+
+def test_medicine_key_normalizes_case_and_spacing():
+    """Case, repeated whitespace and '500 mg' vs '500mg' map to the same key"""
+    assert medicine_key("Napa", "500mg", "Tablet") == medicine_key("  napa ", "500 MG", "tablet")
+    assert medicine_key("Napa", "500mg") != medicine_key("Napa", "650mg")
+
+
+def test_get_or_create_many_reuses_catalog_rows(db_session):
+    """Repeated and pre-existing medicines resolve to one row each"""
+    first = MedicineRepository.get_or_create_many(db_session, [
+        MedicineCreate(name="Napa", strength="500mg", form="tablet"),
+        {"name": "NAPA", "strength": "500 mg", "form": "Tablet"},
+        MedicineCreate(name="Seclo", strength="20mg"),
+    ])
+    db_session.commit()
+    second = MedicineRepository.get_or_create_many(db_session, [MedicineCreate(name="napa", strength="500mg", form="tablet")])
+
+    assert first[0] == first[1] == second[0]
+    assert db_session.query(Medicine).count() == 2
+
+
+def test_dedupe_job_merges_duplicates(db_engine, db_session):
+    """Legacy duplicates are merged into the keyed row and their lines repointed"""
+    kept = MedicineRepository.get_or_create_many(db_session, [MedicineCreate(name="Napa", strength="500mg")])[0]
+    legacy = [Medicine(name="napa", strength="500 mg"), Medicine(name="Napa ", strength="500MG"), Medicine(name="Ace")]
+    db_session.add_all(legacy)
+    db_session.add(Prescription(id=1, appointment_id=1, patient_id=1, notes=""))
+    db_session.flush()
+    db_session.add_all([PrescriptionMedicine(prescription_id=1, medicine_id=m.id) for m in legacy])
+    db_session.commit()
+
+    stats = dedupe_medicines(sessionmaker(bind=db_engine), batch_size=1)
+    db_session.expire_all()
+
+    assert stats == {"scanned": 4, "merged": 1, "removed": 2, "backfilled": 1}
+    assert {m.name: m.id for m in db_session.query(Medicine)} == {"Napa": kept, "Ace": legacy[2].id}
+    assert sorted(pm.medicine_id for pm in db_session.query(PrescriptionMedicine)) == sorted([kept, kept, legacy[2].id])
+    assert db_session.query(Medicine).filter(Medicine.canonical_key.is_(None)).count() == 0
+
+
+@pytest.fixture
+def built_index(db_engine, db_session):
+    """The shared typeahead index built over a small catalog, reset afterwards"""
+    db_session.add_all([
+        Medicine(id=1, name="Napa", strength="500mg", form="Tablet"),
+        Medicine(id=2, name="Napa Extra", strength="500mg", form="Tablet"),
+        Medicine(id=3, name="Napadol", strength="50mg", form="Capsule"),
+        Medicine(id=4, name="Ace", strength="500mg", form="Tablet"),
+        Prescription(id=1, appointment_id=1, patient_id=1, notes=""),
+    ])
+    db_session.flush()
+    db_session.add_all([PrescriptionMedicine(prescription_id=1, medicine_id=3) for _ in range(2)])
+    db_session.commit()
+    medicine_index.build(sessionmaker(bind=db_engine))
+    yield medicine_index
+    medicine_index.__init__()
+
+
+def test_typeahead_ranks_prefix_matches(built_index):
+    """Exact-prefix names first, prescription frequency breaks ties, extra words narrow"""
+    assert [m.id for m in built_index.search("nap", 10)] == [3, 1, 2]
+    assert [m.id for m in built_index.search("napa ex", 10)] == [2]
+    assert [m.id for m in built_index.search("tab 500", 10)] == [4, 1, 2]
+    assert built_index.search("zzz", 10) == []
+
+
+def test_typeahead_follows_committed_writes(built_index, db_session):
+    """Creates, updates and deletes reach the index on commit; rollbacks do not"""
+    db_session.add(Medicine(id=5, name="Nexum", strength="20mg"))
+    db_session.commit()
+    assert [m.id for m in built_index.search("nex", 10)] == [5]
+
+    db_session.add(Medicine(id=6, name="Nexcital"))
+    db_session.flush()
+    db_session.rollback()
+    assert [m.id for m in built_index.search("nex", 10)] == [5]
+
+    db_session.get(Medicine, 5).name = "Esonix"
+    db_session.commit()
+    assert built_index.search("nex", 10) == []
+
+    db_session.delete(db_session.get(Medicine, 4))
+    db_session.commit()
+    assert [m.id for m in built_index.search("ace", 10)] == []
+
+
+def test_typeahead_drops_medicines_deleted_behind_the_index(built_index, db_session):
+    """Rows removed by bulk statements or other workers are not offered and leave the index"""
+    db_session.query(Medicine).filter(Medicine.id == 3).delete(synchronize_session=False)
+    db_session.commit()
+    assert 3 in [m.id for m in built_index.search("nap", 10)]
+
+    assert [m.id for m in MedicineService.typeahead(db_session, "nap")] == [1, 2]
+    assert [m.id for m in MedicineService.typeahead(db_session, "napadl", mode="fuzzy")] == []
+    assert 3 not in [m.id for m in built_index.search("nap", 10)]
+
+
+def test_index_rebuilds_in_background_once_stale(built_index, db_session):
+    """Writes the ORM events never see show up after the periodic rebuild"""
+    db_session.execute(insert(Medicine).values(id=9, name="Nexum", strength="20mg"))
+    db_session.commit()
+    assert built_index.search("nex", 10) == []
+    assert not built_index.rebuild_if_stale()
+
+    assert built_index.rebuild_if_stale(max_age=0)
+    for _ in range(100):
+        if not built_index._rebuilding:
+            break
+        time.sleep(0.01)
+    assert [m.id for m in built_index.search("nex", 10)] == [9]
+
+
+def test_dedupe_job_rebuilds_the_index(built_index, db_engine, db_session):
+    """Duplicates removed by the dedupe job leave the typeahead index in the same process"""
+    db_session.add(Medicine(id=5, name="napa ", strength="500 MG", form="tablet"))
+    db_session.commit()
+    assert sorted(m.id for m in built_index.search("napa 500", 10)) == [1, 2, 5]
+
+    dedupe_medicines(sessionmaker(bind=db_engine))
+    assert sorted(m.id for m in built_index.search("napa 500", 10)) == [1, 2]
+
+
+def test_fuzzy_matches_misspelled_names(built_index):
+    """Misspellings within the edit budget match; unrelated names do not"""
+    built_index.upsert(10, "Paracetamol", "500mg")
+    built_index.upsert(11, "Amoxicillin", "250mg")
+
+    assert [(m.id, d) for m, d in built_index.fuzzy("paracetmol")] == [(10, 1)]
+    assert [(m.id, d) for m, d in built_index.fuzzy("Amoxycilin")] == [(11, 2)]
+    assert built_index.fuzzy("ibuprofen") == []
+
+
+def test_fuzzy_does_not_match_distinct_drugs(built_index):
+    """Look-alike drug names beyond the edit budget or trigram floor are not misspellings"""
+    built_index.upsert(12, "Hydralazine", "25mg")
+    built_index.upsert(13, "Prednisolone", "5mg")
+
+    assert max_edits("napadl") == 1 and max_edits("prednisone") == 2
+    assert built_index.fuzzy("hydroxyzine") == []  # 3 edits
+    assert built_index.fuzzy("napadlo") == []  # 2 edits, under 8 characters
+    assert built_index.fuzzy("ade") == []  # 1 edit, but only a quarter of the trigrams
+    assert [(m.id, d) for m, d in built_index.fuzzy("prednisolon")] == [(13, 1)]
+
+
+def test_suggest_existing_flags_only_misspellings(built_index, db_session):
+    """New names close to the catalog get suggestions; exact names and new drugs do not"""
+    flagged = MedicineService.suggest_existing(db_session, [
+        MedicineCreate(name="Napadl", strength="50mg"),
+        MedicineCreate(name="Napa", strength="650mg"),
+        MedicineCreate(name="Ibuprofen"),
+    ])
+
+    assert [f["name"] for f in flagged] == ["Napadl"]
+    assert flagged[0]["suggestions"][0]["id"] == 3
+
+
+def test_update_prescription_checks_new_medicine_names(built_index, db_session):
+    """Updates that add a misspelled medicine get the same 409 as creates unless confirmed"""
+    medicines = [{"medicine": {"name": "Napadl", "strength": "50mg"}, "dosage": "1+0+1"}]
+    with pytest.raises(MedicineSuggestionException) as exc_info:
+        PrescriptionService.update_prescription(db_session, 1, {"medicines": [dict(m) for m in medicines]})
+    assert exc_info.value.detail["medicines"][0]["suggestions"][0]["id"] == 3
+
+    updated = PrescriptionService.update_prescription(
+        db_session, 1, {"medicines": medicines, "confirm_new_medicines": True},
+    )
+    assert [pm.medicine.name for pm in updated.medicines] == ["Napadl"]
+
+
+def test_update_prescription_rejects_bad_medicine_payloads(built_index, api_client):
+    """Malformed new medicines are a 422 and unknown prescriptions a 404, not a server error"""
+    bad = {"medicines": [{"medicine": {"name": 123}}]}
+    response = api_client.put("/api/v1/prescriptions/1", json=bad)
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("medicines[0].medicine.name")
+
+    response = api_client.put("/api/v1/prescriptions/999", json={"medicines": [{"medicine": {"name": "Napadl"}}]})
+    assert response.status_code == 404
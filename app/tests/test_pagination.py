@@ -0,0 +1,108 @@
+"""
+Tests for keyset pagination
+"""
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_page, ndjson_response
+from app.exceptions.http_exceptions import ValidationException
+from app.models import Appointment, Doctor, Medicine, Patient, User
+from app.repositories.appointment_repo import AppointmentRepository
+from app.repositories.medicine_repo import MedicineRepository
+from app.schemas import AppointmentDoctorOut
+
+
+def test_cursor_walks_every_row_once(db_session):
+    """Following next_cursor visits each row exactly once, in id order"""
+    db_session.add_all([Medicine(id=i, name=f"Medicine {i}") for i in range(1, 26)])
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = MedicineRepository.get_all_medicines(db_session, limit=10, cursor=cursor)
+        seen += [m.id for m in items]
+        if cursor is None:
+            break
+    assert seen == list(range(1, 26))
+
+    # skip/limit still works and hands back a cursor for the following page
+    items, cursor = MedicineRepository.get_all_medicines(db_session, skip=20, limit=3)
+    assert [m.id for m in items] == [21, 22, 23]
+    items, _ = MedicineRepository.get_all_medicines(db_session, limit=3, cursor=cursor)
+    assert [m.id for m in items] == [24, 25]
+
+
+def test_composite_descending_key(db_session):
+    """(date, id) cursors page newest first without skipping ties"""
+    db_session.add_all([
+        User(id=1, email="doc@example.com", role="doctor"),
+        User(id=2, email="pat@example.com", role="patient"),
+    ])
+    db_session.flush()
+    db_session.add_all([Doctor(id=1, full_name="Doc", phone="01700000000"), Patient(id=2, full_name="Pat")])
+    start = date(2025, 1, 1)
+    db_session.add_all([
+        Appointment(id=i, doctor_id=1, patient_id=2, appointment_date=start + timedelta(days=i // 2))
+        for i in range(1, 8)
+    ])
+    db_session.commit()
+
+    columns = [Appointment.appointment_date, Appointment.id]
+    seen, cursor = [], None
+    while True:
+        items, cursor = keyset_page(db_session.query(Appointment), columns, cursor, limit=3, descending=True)
+        seen += [a.id for a in items]
+        if cursor is None:
+            break
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_invalid_cursor_is_rejected():
+    """Tampered or mismatched cursors raise a 422"""
+    assert decode_cursor(encode_cursor([date(2025, 1, 2), 5]), [Appointment.appointment_date, Appointment.id]) == [
+        date(2025, 1, 2), 5
+    ]
+    for bad in ["not-a-cursor", encode_cursor(["x"]), encode_cursor([1, 2])]:
+        with pytest.raises(ValidationException):
+            decode_cursor(bad, [Medicine.id])
+
+
+@pytest.mark.asyncio
+async def test_doctor_appointments_filters_and_export(db_engine, db_session):
+    """Date filters and cursors page a doctor's history; the NDJSON export streams all of it"""
+    db_session.add_all([
+        User(id=1, email="doc@example.com", role="doctor"),
+        User(id=2, email="pat@example.com", role="patient"),
+    ])
+    db_session.flush()
+    db_session.add_all([
+        Doctor(id=1, full_name="Doc", phone="01700000000"),
+        Patient(id=2, full_name="Pat", age=30, gender="male", phone="01800000000", address="Dhaka"),
+    ])
+    start = date(2025, 1, 1)
+    db_session.add_all([
+        Appointment(id=i, doctor_id=1, patient_id=2, appointment_date=start + timedelta(days=i))
+        for i in range(1, 11)
+    ])
+    db_session.commit()
+
+    items, cursor = AppointmentRepository.get_appointments_by_doctor(
+        db_session, 1, date_from=date(2025, 1, 3), date_to=date(2025, 1, 8), limit=4
+    )
+    assert [a.id for a in items] == [7, 6, 5, 4]
+    items, cursor = AppointmentRepository.get_appointments_by_doctor(
+        db_session, 1, date_from=date(2025, 1, 3), date_to=date(2025, 1, 8), limit=4, cursor=cursor
+    )
+    assert [a.id for a in items] == [3, 2] and cursor is None
+
+    response = ndjson_response(
+        sessionmaker(bind=db_engine),
+        lambda db: AppointmentRepository.iter_appointments_by_doctor(db, 1),
+        AppointmentDoctorOut,
+    )
+    lines = [line async for line in response.body_iterator]
+    assert [json.loads(line)["id"] for line in lines] == list(range(10, 0, -1))
+    assert json.loads(lines[0])["patient"]["full_name"] == "Pat"
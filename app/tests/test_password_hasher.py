@@ -0,0 +1,74 @@
+"""
+Tests for the bounded bcrypt hasher and rehash-on-login
+"""
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app import utils
+from app.core.password_hasher import PENDING_PER_WORKER, PasswordHasher, PasswordHasherBusy
+from app.models import User
+from app.services.user_service import UserService
+
+
+def test_hash_verify_round_trip_on_process_pool():
+    """Hashes made on the pool verify, wrong passwords do not"""
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=None, wait_timeout=5)
+    try:
+        hashed = hasher.hash("s3cret")
+        assert hasher.verify("s3cret", hashed)
+        assert not hasher.verify("wrong", hashed)
+        assert hasher.stats()["completed"] == 3
+    finally:
+        hasher.shutdown()
+
+
+def test_default_queue_is_sized_from_workers():
+    """Without an explicit cap, in-flight work is bounded per worker, below the request threadpool"""
+    assert PasswordHasher(rounds=4, workers=2, max_pending=0, wait_timeout=1).max_pending == 2 * PENDING_PER_WORKER < 40
+    assert PasswordHasher(rounds=4, workers=0, max_pending=0, wait_timeout=1).max_pending == PENDING_PER_WORKER
+
+
+def test_full_queue_sheds_with_503(monkeypatch):
+    """Once every slot is taken a caller waits at most wait_timeout, then gets 503"""
+    hasher = PasswordHasher(rounds=4, workers=0, max_pending=1, wait_timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    holder = threading.Thread(target=hasher._run, args=(hold,))
+    holder.start()
+    started.wait(5)
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("s3cret")
+        monkeypatch.setattr(utils, "password_hasher", hasher)
+        with pytest.raises(HTTPException) as exc_info:
+            utils.hash_password("s3cret")
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers == {"Retry-After": "1"}
+    finally:
+        release.set()
+        holder.join()
+    assert hasher.stats()["rejected"] == 2
+    assert hasher.verify("s3cret", hasher.hash("s3cret"))
+
+
+def test_login_upgrades_hash_made_with_other_cost(db_session, monkeypatch):
+    """A successful login re-hashes a password made with a different bcrypt cost"""
+    legacy = PasswordHasher(rounds=4, workers=0, max_pending=None, wait_timeout=1)
+    current = PasswordHasher(rounds=5, workers=0, max_pending=None, wait_timeout=1)
+    monkeypatch.setattr(utils, "password_hasher", current)
+    db_session.add(User(id=1, email="admin@example.com", password=legacy.hash("s3cret"), role="admin"))
+    db_session.commit()
+
+    result = UserService.authenticate_user(db_session, "admin@example.com", "s3cret")
+
+    assert result["user"].id == 1
+    upgraded = db_session.get(User, 1).password
+    assert upgraded.startswith("$2b$05$")
+    assert not current.needs_rehash(upgraded)
+    assert current.verify("s3cret", upgraded)
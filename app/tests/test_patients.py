@@ -0,0 +1,66 @@
+"""
+Tests for patient phone normalization and phone search
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.core.phone import normalize_phone
+from app.models import Appointment, Doctor, Patient, Prescription, User
+from app.repositories.patient_repo import PatientRepository
+
+
+@pytest.mark.parametrize("raw", ["01712-345678", "+880 1712 345678", "8801712345678", "008801712345678", "1712345678"])
+def test_normalize_phone_local_and_international(raw):
+    """Local, spaced and international spellings of one number normalize alike"""
+    assert normalize_phone(raw) == "+8801712345678"
+
+
+def test_search_by_prefix_and_last_digits(db_session):
+    """Numbers are found by leading digits or by their last digits, exact match first"""
+    phones = {1: "01712345678", 2: "017123456789", 3: "01812345678", 4: "01799990678"}
+    db_session.add_all([User(id=i, email=f"p{i}@example.com", role="patient") for i in phones])
+    db_session.flush()
+    db_session.add_all([Patient(id=i, full_name=f"P{i}", phone=phone) for i, phone in phones.items()])
+    db_session.commit()
+
+    def ids(query, limit=20, match=None):
+        return [p.id for p in PatientRepository.search_patients_by_phone(db_session, query, limit, match=match)[0]]
+
+    assert db_session.get(Patient, 1).phone == "+8801712345678"
+    assert ids("01712345678") == [1, 2]
+    assert ids("+88017") == [1, 2, 4]
+    assert ids("5678") == [1, 3]
+    assert ids("0678") == []
+    assert ids("0678", match="suffix") == [4]
+    assert ids("+880171", limit=1) == [1]
+
+
+def test_dashboard_counts_one_query_and_evicted_on_write(db_session):
+    """Counts come from a single SELECT, are cached, and drop on an appointment commit"""
+    today = date.today()
+    db_session.add_all([User(id=i, email=f"u{i}@example.com", role="doctor" if i < 3 else "patient") for i in (1, 2, 3)])
+    db_session.flush()
+    db_session.add_all([Doctor(id=1, full_name="D1", phone="1"), Doctor(id=2, full_name="D2", phone="2")])
+    db_session.add(Patient(id=3, full_name="P3", phone="01712345678"))
+    db_session.flush()
+    db_session.add_all([
+        Appointment(doctor_id=1, patient_id=3, appointment_date=today - timedelta(days=3)),
+        Appointment(doctor_id=1, patient_id=3, appointment_date=today - timedelta(days=2)),
+        Appointment(doctor_id=2, patient_id=3, appointment_date=today + timedelta(days=1)),
+    ])
+    db_session.flush()
+    db_session.add(Prescription(appointment_id=1, patient_id=3))
+    db_session.commit()
+
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    expected = {"upcoming_appointments": 1, "visited_doctors": 1, "active_prescriptions": 1}
+    assert PatientRepository.get_dashboard_counts(db_session, 3) == expected
+    assert PatientRepository.get_dashboard_counts(db_session, 3) == expected
+    assert len(statements) == 1
+
+    db_session.add(Appointment(doctor_id=2, patient_id=3, appointment_date=today))
+    db_session.commit()
+    assert PatientRepository.get_dashboard_counts(db_session, 3)["upcoming_appointments"] == 2
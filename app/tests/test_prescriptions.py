@@ -1,10 +1,17 @@
 """
 Tests for prescription operations
 """
+from datetime import date
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 
 from app.main import app
+from app.models import Appointment, Doctor, Medicine, Patient, Prescription, User
+from app.repositories.prescription_repo import PrescriptionRepository
+from app.schemas import MedicineCreate, PrescriptionCreate, PrescriptionMedicineCreate
 
 client = TestClient(app)
 
@@ -21,3 +28,59 @@ def test_get_prescription():
     response = client.get("/prescriptions/1")
     # Will return 404 if prescription doesn't exist
     assert response.status_code in [200, 404]
+
+
+def _seed_appointment(db):
+    db.add_all([
+        User(id=1, email="doc@example.com", role="doctor"),
+        User(id=2, email="pat@example.com", role="patient"),
+    ])
+    db.flush()
+    db.add_all([
+        Doctor(id=1, full_name="Doc", phone="01700000000"),
+        Patient(id=2, full_name="Pat", phone="01800000000"),
+        Medicine(id=1, name="Paracetamol"),
+    ])
+    db.flush()
+    appointment = Appointment(id=1, doctor_id=1, patient_id=2, appointment_date=date.today())
+    db.add(appointment)
+    db.commit()
+    return appointment
+
+
+def test_create_prescription_single_commit(db_session):
+    """Header, new medicines, lines and the appointment status land in one commit"""
+    appointment = _seed_appointment(db_session)
+    commits = []
+    event.listen(db_session.get_bind(), "commit", lambda conn: commits.append(1))
+
+    data = PrescriptionCreate(
+        appointment_id=1,
+        patient_id=2,
+        notes="rest",
+        medicines=[
+            PrescriptionMedicineCreate(medicine_id=1, dosage="1+0+1"),
+            PrescriptionMedicineCreate(medicine=MedicineCreate(name="Omeprazole", strength="20mg"), dosage="1+0+0"),
+        ],
+    )
+    prescription = PrescriptionRepository.create_prescription(db_session, data, appointment=appointment)
+
+    assert len(commits) == 1
+    assert sorted(pm.medicine.name for pm in prescription.medicines) == ["Omeprazole", "Paracetamol"]
+    assert appointment.status == "completed"
+
+
+def test_create_prescription_rolls_back_on_failure(db_session):
+    """A failing medicine leaves neither a partial prescription nor a completed appointment"""
+    appointment = _seed_appointment(db_session)
+    data = PrescriptionCreate(
+        appointment_id=1,
+        patient_id=2,
+        notes="rest",
+        medicines=[PrescriptionMedicineCreate(medicine=MedicineCreate(strength="20mg"))],  # name is NOT NULL
+    )
+    with pytest.raises(IntegrityError):
+        PrescriptionRepository.create_prescription(db_session, data, appointment=appointment)
+
+    assert db_session.query(Prescription).count() == 0
+    assert db_session.get(Appointment, 1).status == "pending"
@@ -0,0 +1,191 @@
+"""
+EXPLAIN QUERY PLAN checks for repository queries
+
+Runs the read paths of app/repositories against a seeded SQLite database and
+fails when a statement scans a whole table instead of using an index. Queries
+that read an entire table by design (paginated "list all" endpoints, global
+counts) are listed in each case's allowlist.
+"""
+import re
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import (
+    Appointment, Doctor, DoctorSchedule, EmailOutbox, Medicine, Patient, Prescription,
+    PrescriptionMedicine, User,
+)
+from app.repositories.admin_repo import AdminRepository
+from app.repositories.appointment_repo import AppointmentRepository
+from app.repositories.doctor_repo import DoctorRepository
+from app.repositories.email_outbox_repo import EmailOutboxRepository
+from app.repositories.medicine_repo import MedicineRepository
+from app.repositories.patient_repo import PatientRepository
+from app.repositories.prescription_repo import PrescriptionRepository
+from app.repositories.rollup_repo import RollupRepository
+from app.repositories.schedule_repo import ScheduleRepository
+from app.repositories.slot_repo import SlotRepository
+from app.repositories.user_repo import UserRepository
+
+TODAY = date.today()
+
+
+def _rolled_up(call):
+    """Run `call` with the analytics rolled up through yesterday, then undo the rollup"""
+    def run(db):
+        RollupRepository.rebuild_days(db, TODAY - timedelta(days=2), TODAY - timedelta(days=1))
+        RollupRepository.set_watermark(db, TODAY - timedelta(days=1))
+        db.flush()
+        try:
+            return call(db)
+        finally:
+            db.rollback()
+    return run
+
+
+# (repository call, tables it may scan in full)
+CASES = [
+    ("AppointmentRepository.get_appointments_by_patient", lambda db: AppointmentRepository.get_appointments_by_patient(db, 101), set()),
+    ("AppointmentRepository.get_appointments_by_doctor", lambda db: AppointmentRepository.get_appointments_by_doctor(db, 1), set()),
+    ("AppointmentRepository.get_patients_by_doctor", lambda db: AppointmentRepository.get_patients_by_doctor(db, 1), set()),
+    ("AppointmentRepository.get_today_appointments_by_doctor", lambda db: AppointmentRepository.get_today_appointments_by_doctor(db, 1), set()),
+    ("AppointmentRepository.get_appointment_count_today", lambda db: AppointmentRepository.get_appointment_count_today(db, 1), set()),
+    ("AppointmentRepository.get_pending_reports_count", lambda db: AppointmentRepository.get_pending_reports_count(db, 1), set()),
+    ("PatientRepository.count_upcoming_appointments", lambda db: PatientRepository.count_upcoming_appointments(db, 101), set()),
+    ("PatientRepository.count_visited_doctors", lambda db: PatientRepository.count_visited_doctors(db, 101), set()),
+    ("PatientRepository.count_active_prescriptions", lambda db: PatientRepository.count_active_prescriptions(db, 101), set()),
+    ("PatientRepository.get_dashboard_counts", lambda db: PatientRepository.get_dashboard_counts(db, 101), set()),
+    ("PatientRepository.get_upcoming_appointments", lambda db: PatientRepository.get_upcoming_appointments(db, 101), set()),
+    ("PatientRepository.search_patients_by_phone", lambda db: PatientRepository.search_patients_by_phone(db, "0180"), set()),
+    ("PatientRepository.search_patients_by_phone[suffix]", lambda db: PatientRepository.search_patients_by_phone(db, "5678"), set()),
+    ("PrescriptionRepository.get_prescriptions_by_patient", lambda db: PrescriptionRepository.get_prescriptions_by_patient(db, 101), set()),
+    ("PrescriptionRepository.get_prescription_by_appointment", lambda db: PrescriptionRepository.get_prescription_by_appointment(db, 1), set()),
+    ("ScheduleRepository.get_schedules_by_doctor", lambda db: ScheduleRepository.get_schedules_by_doctor(db, 1), set()),
+    ("SlotRepository.get_booked_times", lambda db: SlotRepository.get_booked_times(db, 1, TODAY), set()),
+    ("DoctorRepository.get_all_doctors", lambda db: DoctorRepository.get_all_doctors(db), {"doctors"}),
+    ("DoctorRepository.get_doctors_by_status", lambda db: DoctorRepository.get_doctors_by_status(db, "approved"), set()),
+    ("DoctorRepository.search_directory", lambda db: DoctorRepository.search_directory(db, {"specializations": [1]}, fee_max=500), set()),
+    ("DoctorRepository.get_dashboard_counts", lambda db: DoctorRepository.get_dashboard_counts(db, 1), set()),
+    ("DoctorRepository.get_patient_count", lambda db: DoctorRepository.get_patient_count(db, 1), set()),
+    ("MedicineRepository.get_medicine_by_name", lambda db: MedicineRepository.get_medicine_by_name(db, "Medicine 3"), set()),
+    ("UserRepository.get_user_by_email", lambda db: UserRepository.get_user_by_email(db, "doctor1@example.com"), set()),
+    ("EmailOutboxRepository.claim_due", lambda db: EmailOutboxRepository.claim_due(db, 10), set()),
+    ("AdminRepository.get_counts", lambda db: AdminRepository.get_counts(db), {"doctors", "patients", "appointments"}),
+    ("AdminRepository.list_pending_doctors", lambda db: AdminRepository.list_pending_doctors(db), set()),
+    ("AdminRepository.top_medicines", lambda db: AdminRepository.top_medicines(db), {"medicines", "prescription_medicines"}),
+    ("AdminRepository.top_doctors_by_completed_appointments", lambda db: AdminRepository.top_doctors_by_completed_appointments(db), set()),
+    ("AdminRepository.appointment_overview", lambda db: AdminRepository.appointment_overview(db), set()),
+    ("AdminRepository.popular_specializations", lambda db: AdminRepository.popular_specializations(db), {"specializations"}),
+    ("AdminRepository.popular_specializations[rollup]", _rolled_up(AdminRepository.popular_specializations), {"specializations"}),
+    ("AdminRepository.top_medicines[rollup]", _rolled_up(AdminRepository.top_medicines), set()),
+    ("AdminRepository.top_doctors_by_completed_appointments[rollup]", _rolled_up(AdminRepository.top_doctors_by_completed_appointments), set()),
+    ("AdminRepository.appointment_overview[rollup]", _rolled_up(AdminRepository.appointment_overview), set()),
+    ("AdminRepository.new_patients_overview[rollup]", _rolled_up(AdminRepository.new_patients_overview), set()),
+]
+
+# "SCAN appointments" / "SCAN TABLE appointments" (older SQLite), but not
+# "SCAN appointments USING [COVERING] INDEX ..." and not subquery aliases
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+def _seed(db):
+    doctors, patients = range(1, 21), range(101, 301)
+    db.add_all([User(id=i, email=f"doctor{i}@example.com", role="doctor") for i in doctors])
+    db.add_all([User(id=i, email=f"patient{i}@example.com", role="patient") for i in patients])
+    db.flush()
+    db.add_all([
+        Doctor(id=i, full_name=f"Doctor {i}", phone=f"0170{i:07d}", status="approved" if i % 3 else "pending")
+        for i in doctors
+    ])
+    db.add_all([Patient(id=i, full_name=f"Patient {i}", phone=f"0180{i:07d}") for i in patients])
+    db.add_all([
+        DoctorSchedule(id=i, doctor_id=i, day_of_week=None, start_time=time(9), end_time=time(17), max_patients=16)
+        for i in doctors
+    ])
+    db.add_all([Medicine(id=i, name=f"Medicine {i}") for i in range(1, 51)])
+    db.flush()
+
+    statuses = ["pending", "confirmed", "completed", "cancelled"]
+    appointment_id = 0
+    for p in patients:
+        for k in range(5):
+            appointment_id += 1
+            doctor_id = (p + k) % 20 + 1
+            db.add(Appointment(
+                id=appointment_id,
+                doctor_id=doctor_id,
+                patient_id=p,
+                schedule_id=doctor_id,
+                appointment_date=TODAY + timedelta(days=k - 2),
+                appointment_time=time(9 + k),
+                status=statuses[(p + k) % 4],
+            ))
+    db.flush()
+    for a in range(1, appointment_id + 1, 2):
+        db.add(Prescription(id=a, appointment_id=a, patient_id=101 + (a - 1) // 5))
+        db.add(PrescriptionMedicine(prescription_id=a, medicine_id=a % 50 + 1))
+    db.add_all([EmailOutbox(to_email=f"p{i}@example.com", subject="hi", status="sent") for i in range(50)])
+    db.commit()
+
+
+def _captured_statements(engine, db, call):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    _seed(db)
+    yield engine, db
+    db.close()
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name,call,allowed", CASES, ids=[c[0] for c in CASES])
+def test_repository_query_uses_indexes(seeded, name, call, allowed):
+    """Each statement the repository issues is served by an index"""
+    engine, db = seeded
+    statements = _captured_statements(engine, db, call)
+    assert statements, f"{name} issued no SELECT"
+
+    tables = set(Base.metadata.tables)
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            for row in plan:
+                match = _FULL_SCAN.match(row[-1])
+                if match and match.group(1) in tables and match.group(1) not in allowed:
+                    pytest.fail(f"{name} scans `{match.group(1)}`:\n{statement}\n" + "\n".join(r[-1] for r in plan))
+
+
+def test_phone_suffix_search_uses_reversed_index(seeded):
+    """Bare digits search the reversed-phone index, not the phone prefix index"""
+    engine, db = seeded
+    patients, _ = PatientRepository.search_patients_by_phone(db, "0250", match="suffix")
+    assert [p.id for p in patients] == [250]
+    assert PatientRepository.search_patients_by_phone(db, "250")[0] == patients
+
+    statements = _captured_statements(engine, db, lambda db: PatientRepository.search_patients_by_phone(db, "5678"))
+    with engine.connect() as conn:
+        plan = " ".join(
+            row[-1] for statement, parameters in statements
+            for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        )
+    assert "ix_patients_phone_reversed" in plan
@@ -0,0 +1,105 @@
+"""
+Tests for read-replica routing, using two SQLite files as primary and replica
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, ReplicaRouter, RoutingSession
+from app.models import Doctor, User
+from app.repositories.doctor_repo import DoctorRepository
+
+
+def _seed(engine, doctor_id: int, name: str) -> None:
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(id=doctor_id, email=f"{name}@example.com", role="doctor"))
+        db.flush()
+        db.add(Doctor(id=doctor_id, full_name=name, phone="01700000000"))
+        db.commit()
+
+
+@pytest.fixture
+def routed(tmp_path):
+    """Session factory whose primary and replica hold different doctors"""
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    _seed(primary, 1, "primary")
+    _seed(replica, 2, "replica")
+    router = ReplicaRouter(primary, [replica], max_lag_seconds=5, check_seconds=60)
+    yield router, sessionmaker(class_=RoutingSession, router=router, bind=primary, autoflush=False)
+    primary.dispose()
+    replica.dispose()
+
+
+def _names(db):
+    items, _ = DoctorRepository.get_all_doctors(db)
+    return [d.full_name for d in items]
+
+
+def test_reads_go_to_replica_and_writes_stick_to_primary(routed):
+    """Replica serves reads until the session writes, then the primary does"""
+    _, factory = routed
+    with factory() as db:
+        assert _names(db) == ["replica"]
+        # plain lookups stay on the primary
+        assert DoctorRepository.get_doctor_by_id(db, 1).full_name == "primary"
+
+        DoctorRepository.update_doctor(db, 1, {"full_name": "primary-updated"})
+        assert _names(db) == ["primary-updated"]
+
+
+def test_lagging_replica_falls_back_to_primary(routed):
+    """A replica behind by more than the allowed lag is skipped"""
+    router, factory = routed
+    router.replica_lag = lambda conn: 30.0
+    with factory() as db:
+        assert _names(db) == ["primary"]
+    assert router.stats()["primary_fallbacks"] == 1
+
+
+def test_replica_down_falls_back_to_primary(tmp_path):
+    """A replica that cannot be reached is taken out of rotation"""
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    _seed(primary, 1, "primary")
+    replica = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+    router = ReplicaRouter(primary, [replica], max_lag_seconds=5, check_seconds=60)
+    factory = sessionmaker(class_=RoutingSession, router=router, bind=primary)
+
+    with factory() as db:
+        assert _names(db) == ["primary"]
+    assert router.stats()["replicas"][0]["usable"] is False
+
+
+def test_slow_reprobe_does_not_block_reads(routed):
+    """An expired replica is re-probed in the background while reads use its last known state"""
+    router, _ = routed
+    replica_engine = router.replicas[0].engine
+    assert router.pick() is replica_engine
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_lag(conn):
+        started.set()
+        release.wait(5)
+        return 30.0
+
+    router.replica_lag = slow_lag
+    router.replicas[0].checked_at -= router.check_seconds
+    try:
+        assert router.pick() is replica_engine
+        assert started.wait(5)
+        # the probe is still stuck; reads neither wait for it nor start another
+        assert router.pick() is replica_engine
+        assert router.replicas[0].probing
+    finally:
+        release.set()
+    for _ in range(50):
+        if not router.replicas[0].probing:
+            break
+        time.sleep(0.01)
+    assert router.pick() is router.primary
+    assert router.stats()["replicas"][0]["error"] == "lagging"
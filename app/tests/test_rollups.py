@@ -0,0 +1,148 @@
+"""
+Tests for the admin analytics rollups
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.jobs.dedupe_medicines import dedupe_medicines
+from app.jobs.rollups import refresh_rollups
+from app.models import (
+    Appointment, DailyAppointmentCount, DailyMedicineUsage, Doctor, Medicine, Patient, Prescription, PrescriptionMedicine, Specialization, User,
+)
+from app.repositories.admin_repo import AdminRepository
+from app.repositories.rollup_repo import RollupRepository
+
+TODAY = date.today()
+
+
+def _seed(db):
+    db.add_all([User(id=i, email=f"doctor{i}@example.com", role="doctor") for i in (1, 2)])
+    db.add_all([
+        User(id=100 + i, email=f"patient{i}@example.com", role="patient", created_at=datetime.combine(TODAY - timedelta(days=i), datetime.min.time()))
+        for i in range(4)
+    ])
+    db.add_all([Doctor(id=i, full_name=f"Doctor {i}", phone=f"0170000000{i}", status="approved") for i in (1, 2)])
+    db.add_all([Patient(id=100 + i, full_name=f"Patient {i}", phone=f"018000000{i}") for i in range(4)])
+    db.add_all([Medicine(id=i, name=f"Medicine {i}") for i in (1, 2)])
+    db.flush()
+    for i in range(12):
+        day = TODAY - timedelta(days=i % 4)
+        status = "completed" if i % 3 else "pending"
+        db.add(Appointment(id=i + 1, doctor_id=1 + i % 2, patient_id=100 + i % 4, appointment_date=day, status=status))
+    db.flush()
+    for i in range(6):
+        created = datetime.combine(TODAY - timedelta(days=i % 3), datetime.min.time()) + timedelta(hours=10)
+        db.add(Prescription(id=i + 1, appointment_id=i + 1, patient_id=100 + i % 4, created_at=created))
+        db.add(PrescriptionMedicine(prescription_id=i + 1, medicine_id=1 if i < 4 else 2))
+    db.commit()
+
+
+def _analytics(db):
+    return (
+        [(m.id, int(used)) for m, used in AdminRepository.top_medicines(db)],
+        [(d.id, int(c)) for d, c in AdminRepository.top_doctors_by_completed_appointments(db)],
+        AdminRepository.appointment_overview(db, 7),
+        AdminRepository.new_patients_overview(db, 7),
+    )
+
+
+def test_rollups_match_raw_analytics(db_engine):
+    """Analytics read from rollups plus live rows equal the raw-table answers"""
+    factory = sessionmaker(bind=db_engine)
+    db = factory()
+    _seed(db)
+    raw = _analytics(db)
+
+    assert refresh_rollups(factory) > 0
+    db.expire_all()
+    assert RollupRepository.get_watermark(db) == TODAY - timedelta(days=1)
+    assert db.query(DailyAppointmentCount).count() > 0
+    assert _analytics(db) == raw
+    assert sum(day["count"] for day in raw[3]) == 4
+
+
+def test_refresh_picks_up_changes_inside_lookback(db_engine):
+    """A status change on a rolled-up day shows up after the next refresh"""
+    factory = sessionmaker(bind=db_engine)
+    db = factory()
+    _seed(db)
+    refresh_rollups(factory)
+
+    appointment = db.get(Appointment, 2)  # yesterday, completed
+    appointment.status = "cancelled"
+    db.commit()
+    before = {d.id: int(c) for d, c in AdminRepository.top_doctors_by_completed_appointments(db)}
+
+    refresh_rollups(factory, lookback_days=3)
+    db.expire_all()
+    after = {d.id: int(c) for d, c in AdminRepository.top_doctors_by_completed_appointments(db)}
+    assert after[2] == before[2] - 1
+
+
+def test_specialization_analytics_use_the_association(api_client, db_engine):
+    """Specialization counts come from doctor_specializations and refresh on appointment commits"""
+    factory = sessionmaker(bind=db_engine)
+    db = factory()
+    _seed(db)
+    cardiology, neurology = Specialization(id=1, name="Cardiology"), Specialization(id=2, name="Neurology")
+    first, second = db.get(Doctor, 1), db.get(Doctor, 2)
+    first.specializations.extend([cardiology, neurology])
+    second.specializations.append(cardiology)
+    db.commit()
+
+    response = api_client.get("/api/v1/admin/analytics/specializations", params={"days": 2})
+    assert response.status_code == 200
+    # doctor 1 has appointments today and 2 days ago, doctor 2 yesterday and 3 days ago
+    assert response.json() == [
+        {"id": 1, "specialization": "Cardiology", "count": 2, "appointments": 6, "completed": 4},
+        {"id": 2, "specialization": "Neurology", "count": 1, "appointments": 3, "completed": 2},
+    ]
+
+    db.add(Appointment(id=100, doctor_id=1, patient_id=100, appointment_date=TODAY, status="completed"))
+    db.commit()
+    cardiology_row = api_client.get("/api/v1/admin/analytics/specializations", params={"days": 2}).json()[0]
+    assert (cardiology_row["appointments"], cardiology_row["completed"]) == (7, 5)
+
+    top = api_client.get("/api/v1/admin/analytics/top-doctors").json()
+    assert {row["doctor"]["id"]: row["doctor"]["specializations"] for row in top} == {
+        1: ["Cardiology", "Neurology"],
+        2: ["Cardiology"],
+    }
+
+
+def test_dedupe_merges_rolled_up_medicine_usage(db_engine):
+    """Usage already rolled up under a duplicate medicine counts towards the survivor after dedupe"""
+    factory = sessionmaker(bind=db_engine)
+    db = factory()
+    _seed(db)
+    db.add(Medicine(id=3, name="medicine 1 "))
+    db.flush()
+    db.add(Prescription(id=7, appointment_id=7, patient_id=100, created_at=datetime.combine(TODAY - timedelta(days=1), datetime.min.time())))
+    db.add(PrescriptionMedicine(prescription_id=7, medicine_id=3))
+    db.commit()
+    refresh_rollups(factory)
+    db.expire_all()
+    assert dict((m.id, int(used)) for m, used in AdminRepository.top_medicines(db)) == {1: 4, 2: 2, 3: 1}
+
+    dedupe_medicines(factory)
+    db.expire_all()
+    assert [(m.id, int(used)) for m, used in AdminRepository.top_medicines(db)] == [(1, 5), (2, 2)]
+    assert db.query(DailyMedicineUsage).filter(DailyMedicineUsage.medicine_id == 3).count() == 0
+
+
+def test_only_one_process_refreshes_at_a_time(db_engine, monkeypatch):
+    """A held watermark lock or a refresh within the interval makes other workers skip their run"""
+    factory = sessionmaker(bind=db_engine)
+    db = factory()
+    _seed(db)
+
+    monkeypatch.setattr(RollupRepository, "claim_watermark", staticmethod(lambda db: None))
+    assert refresh_rollups(factory) == 0
+    assert db.query(DailyAppointmentCount).count() == 0
+    monkeypatch.undo()
+
+    assert refresh_rollups(factory, min_interval_seconds=450) > 0
+    # another worker waking up within half the interval finds it fresh
+    assert refresh_rollups(factory, min_interval_seconds=450) == 0
+    assert refresh_rollups(factory) == 7
@@ -0,0 +1,58 @@
+"""
+Tests for token verification caching
+"""
+import time
+from datetime import timedelta
+
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import Patient, User
+
+
+def test_ttl_cache_expires_and_evicts():
+    """Entries expire after their TTL and the oldest is evicted when full"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("b") is None
+
+    cache.set("c", 3)
+    cache.set("d", 4)
+    assert cache.get("a") is None
+    assert cache.get("c") == 3 and cache.get("d") == 4
+
+
+def test_verify_token_decodes_once(monkeypatch):
+    """A verified token is served from the cache on later calls"""
+    calls = []
+    real_decode = security.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    token = security.create_access_token({"id": 7, "role": "doctor"}, timedelta(minutes=5))
+
+    assert security.verify_token(token)["id"] == 7
+    assert security.verify_token(token)["role"] == "doctor"
+    assert len(calls) == 1
+
+
+def test_role_guard_loads_the_user_by_default(api_client, db_session, monkeypatch):
+    """A re-roled user loses access at once; claims-only auth keeps the token's role until it expires"""
+    db_session.add(User(id=7, email="p7@example.com", role="patient"))
+    db_session.flush()
+    db_session.add(Patient(id=7, full_name="Patient 7", phone="01800000007"))
+    db_session.commit()
+    headers = {"Authorization": "Bearer " + security.create_access_token({"id": 7, "role": "patient"})}
+    assert api_client.get("/api/v1/patients/me/dashboard", headers=headers).status_code == 200
+
+    db_session.get(User, 7).role = "doctor"
+    db_session.commit()
+    assert api_client.get("/api/v1/patients/me/dashboard", headers=headers).status_code == 403
+
+    monkeypatch.setattr(settings, "AUTH_LOAD_USER", False)
+    assert api_client.get("/api/v1/patients/me/dashboard", headers=headers).status_code == 200
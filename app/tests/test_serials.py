@@ -0,0 +1,39 @@
+"""
+Tests for the block-reserving serial number allocator
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Patient, User
+from app.repositories.serial_repo import FeistelPermutation, SerialAllocator
+
+
+def test_feistel_permutation_is_a_bijection():
+    """Every value of the domain maps to a distinct value of the same domain"""
+    permute = FeistelPermutation(1000, "key")
+    assert sorted(permute(n) for n in range(1000)) == list(range(1000))
+    assert [permute(n) for n in range(5)] != list(range(5))
+
+
+def test_allocators_share_blocks_without_collisions(tmp_path):
+    """Two processes draw disjoint blocks, skip legacy serials and stay in range"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'serials.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    legacy = 10000000 + FeistelPermutation(90000000, "key")(0)
+    db.add(User(id=1, email="p@example.com", role="patient"))
+    db.flush()
+    db.add(Patient(id=1, serial_number=legacy))
+    db.commit()
+
+    first = SerialAllocator("patient_serial", 10000000, 99999999, block_size=10, key="key", column=Patient.serial_number)
+    second = SerialAllocator("patient_serial", 10000000, 99999999, block_size=10, key="key", column=Patient.serial_number)
+    serials = [first.allocate(db) for _ in range(15)] + [second.allocate(db) for _ in range(15)]
+
+    assert len(set(serials)) == 30
+    assert legacy not in serials
+    assert all(10000000 <= s <= 99999999 for s in serials)
+    assert (first.blocks_reserved, second.blocks_reserved) == (2, 2)
+    db.close()
+    engine.dispose()
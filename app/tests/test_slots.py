@@ -0,0 +1,163 @@
+"""
+Tests for slot materialization and assignment
+"""
+from datetime import date, time
+
+import pytest
+
+from app.exceptions.http_exceptions import SlotUnavailableException
+from app.models import Appointment, Doctor, DoctorSchedule, Patient, User
+from app.repositories import appointment_repo
+from app.repositories.appointment_repo import AppointmentRepository
+from app.repositories.slot_repo import SlotBook, SlotRepository, materialize_slots, parse_weekdays, schedule_runs_on
+from app.schemas import AppointmentWithPatientCreate, PatientCreate
+
+# 2025-01-06 is a Monday
+MONDAY = date(2025, 1, 6)
+
+
+def _schedule(**kwargs):
+    values = dict(
+        id=1,
+        doctor_id=1,
+        day_of_week="Monday",
+        start_time=time(9, 0),
+        end_time=time(11, 0),
+        max_patients=3,
+        duration_per_appointment=30,
+    )
+    values.update(kwargs)
+    return DoctorSchedule(**values)
+
+
+def _seed(db):
+    db.add_all([
+        User(id=1, email="doc@example.com", role="doctor"),
+        User(id=2, email="pat@example.com", role="patient"),
+    ])
+    db.flush()
+    db.add_all([
+        Doctor(id=1, full_name="Dr. Test", phone="01700000000"),
+        Patient(id=2, full_name="Patient", phone="01800000000"),
+        _schedule(),
+    ])
+    db.commit()
+
+
+def test_materialize_slots_respects_max_patients():
+    """Slots stop at max_patients even when the window allows more"""
+    assert materialize_slots(_schedule()) == [time(9, 0), time(9, 30), time(10, 0)]
+    assert len(materialize_slots(_schedule(max_patients=None))) == 4
+
+
+def test_schedule_runs_on_weekday():
+    """Only the listed weekdays are bookable"""
+    assert schedule_runs_on(_schedule(), MONDAY)
+    assert not schedule_runs_on(_schedule(), date(2025, 1, 7))
+    assert schedule_runs_on(_schedule(day_of_week=None), date(2025, 1, 7))
+
+
+@pytest.mark.parametrize("raw,expected", [
+    ("Monday - Friday", {0, 1, 2, 3, 4}),
+    ("mon-fri", {0, 1, 2, 3, 4}),
+    ("Sat to Thu", {5, 6, 0, 1, 2, 3}),
+    ("Fri - Mon", {4, 5, 6, 0}),
+])
+def test_parse_weekdays_ranges(raw, expected):
+    """Ranges include both ends and may wrap past Sunday"""
+    assert parse_weekdays(raw) == expected
+
+
+@pytest.mark.parametrize("raw,expected", [
+    ("sun,tue", {6, 1}),
+    ("Sunday, Wednesday", {6, 2}),
+    ("Mon - Wed, Sat", {0, 1, 2, 5}),
+])
+def test_parse_weekdays_lists(raw, expected):
+    """Comma separated days and ranges combine"""
+    assert parse_weekdays(raw) == expected
+
+
+@pytest.mark.parametrize("raw,expected", [
+    ("Tues., Weds", {1, 2}),
+    ("Thurs & Sat", {3, 5}),
+    ("thu", {3}),
+    ("month", set()),
+])
+def test_parse_weekdays_abbreviations(raw, expected):
+    """Common abbreviations count; words that merely start like a day do not"""
+    assert parse_weekdays(raw) == expected
+
+
+def test_schedule_runs_mid_week_in_a_range():
+    """A "Monday - Friday" schedule runs Tuesday to Thursday too"""
+    schedule = _schedule(day_of_week="Monday - Friday")
+    assert [schedule_runs_on(schedule, date(2025, 1, 6 + i)) for i in range(7)] == [True] * 5 + [False] * 2
+
+
+def test_slot_book_next_free():
+    """next_free skips booked slots and honours the `after` bound"""
+    book = SlotBook(materialize_slots(_schedule()), [time(9, 0)])
+    assert book.next_free() == time(9, 30)
+    assert book.next_free(time(9, 45)) == time(10, 0)
+    assert book.next_free(time(10, 1)) is None
+
+
+def test_assign_slot_until_full(db_session):
+    """Bookings take consecutive free slots and fail once the schedule is full"""
+    _seed(db_session)
+    assigned = []
+    for _ in range(3):
+        slot = SlotRepository.assign_slot(db_session, 1, 1, MONDAY)
+        db_session.add(Appointment(
+            doctor_id=1, patient_id=2, schedule_id=1,
+            appointment_date=MONDAY, appointment_time=slot,
+        ))
+        db_session.commit()
+        assigned.append(slot)
+
+    assert assigned == [time(9, 0), time(9, 30), time(10, 0)]
+    with pytest.raises(SlotUnavailableException):
+        SlotRepository.assign_slot(db_session, 1, 1, MONDAY)
+
+
+def test_assign_requested_slot_taken(db_session):
+    """A requested slot that is already booked is rejected"""
+    _seed(db_session)
+    db_session.add(Appointment(
+        doctor_id=1, patient_id=2, schedule_id=1,
+        appointment_date=MONDAY, appointment_time=time(9, 30),
+    ))
+    db_session.commit()
+
+    with pytest.raises(SlotUnavailableException):
+        SlotRepository.assign_slot(db_session, 1, 1, MONDAY, time(9, 30))
+    assert SlotRepository.assign_slot(db_session, 1, 1, MONDAY, time(10, 0)) == time(10, 0)
+
+
+def test_new_patient_booking_hashes_before_locking_the_schedule(db_session, monkeypatch):
+    """The schedule lock is taken after the password hash, and the slot cache is dropped after commit"""
+    _seed(db_session)
+    calls = []
+    monkeypatch.setattr(appointment_repo, "hash_password", lambda password: calls.append("hash") or "hashed")
+    assign_slot = SlotRepository.assign_slot
+
+    def recording_assign_slot(db, *args):
+        calls.append("lock")
+        slot = assign_slot(db, *args)
+        # a concurrent reader caching the slot book before the booking commits
+        SlotRepository.get_slot_book(db, db.get(DoctorSchedule, 1), MONDAY)
+        return slot
+
+    monkeypatch.setattr(SlotRepository, "assign_slot", staticmethod(recording_assign_slot))
+    data = AppointmentWithPatientCreate(
+        patient=PatientCreate(full_name="New", age=30, gender="F", phone="01811111111", blood_group_id=1, address="Dhaka"),
+        doctor_id=1,
+        schedule_id=1,
+        appointment_date=MONDAY,
+    )
+    appointment = AppointmentRepository.create_appointment_with_patient(db_session, data)
+
+    assert calls == ["hash", "lock"]
+    assert appointment.appointment_time == time(9, 0)
+    assert SlotRepository.get_slot_book(db_session, db_session.get(DoctorSchedule, 1), MONDAY).next_free() == time(9, 30)
@@ -1,38 +1,58 @@
-from passlib.context import CryptContext
 import secrets
-from email.message import EmailMessage
-import smtplib
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from fastapi import HTTPException, status
+
+from .core.config import settings
+from .core.password_hasher import PasswordHasher, PasswordHasherBusy
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    wait_timeout=settings.PASSWORD_HASH_WAIT_SECONDS,
+)
 
 
 def generate_temp_password() -> str:
     return secrets.token_urlsafe(8)
 
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 def hash_password(password: str):
-    return pwd_context.hash(password)
+    try:
+        return password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise _busy()
 
 
 def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
+    if not hashed:
+        return False
+    try:
+        return password_hasher.verify(plain, hashed)
+    except PasswordHasherBusy:
+        raise _busy()
+
 
+def password_needs_rehash(hashed) -> bool:
+    return bool(hashed) and password_hasher.needs_rehash(hashed)
 
 
-def send_patient_welcome_email(to_email: str, temp_password: str):
-    msg = EmailMessage()
-    msg["Subject"] = "Your Patient Account Credentials"
-    msg["From"] = "kamruzzaman.doctorkoi@gmail.com"
-    msg["To"] = to_email
 
-    msg.set_content(
-        f"""
+def build_patient_welcome_email(to_email: str, temp_password: str) -> tuple[str, str]:
+    """Return (subject, body) of the welcome mail for a newly created patient"""
+    subject = "Your Patient Account Credentials"
+    body = f"""
             Your patient account has been created.
             Email: {to_email}
             Temporary password: {temp_password}
 
             Please log in and change your password immediately."""
-    )
-
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login("kamruzzaman.doctorkoi@gmail.com", "cqzj famm diyd vwpa")
-        server.send_message(msg)
\ No newline at end of file
+    return subject, body
@@ -0,0 +1,137 @@
+"""
+Latency of GET /api/v1/admin/dashboard with the old four COUNT queries vs
+the single combined statement, and (on MySQL) the table-statistics
+estimates with and without the counts cache.
+
+    python -m benchmarks.bench_admin_counts [--requests 20] [--appointments 5000000]
+
+Seeds a throwaway SQLite database unless DATABASE_URL is set; the estimate
+variants need MySQL (e.g. DATABASE_URL=mysql+pymysql://.../bench), where
+InnoDB has to walk an index for every exact COUNT(*). The seed is inserted
+in batches and reused when the appointments table already has enough rows.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_admin_counts.db")
+os.environ.setdefault("EMAIL_OUTBOX_DISPATCH_IN_APP", "false")
+os.environ.setdefault("ANALYTICS_ROLLUP_IN_APP", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.database import Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Appointment, Doctor, Patient, User  # noqa: E402
+from app.repositories.admin_repo import _counts_cache  # noqa: E402
+from app.services.admin_service import AdminService  # noqa: E402
+
+DOCTORS = 2000
+PATIENTS = 200000
+BATCH_SIZE = 50000
+
+
+def legacy_counts(db, exact: bool = False) -> dict:
+    """The pre-aggregation repository method, kept here as the baseline"""
+    return {
+        "total_doctors": db.query(func.count(Doctor.id)).scalar() or 0,
+        "total_patients": db.query(func.count(Patient.id)).scalar() or 0,
+        "pending_doctors": db.query(func.count(Doctor.id)).filter(Doctor.status == "pending").scalar() or 0,
+        "total_appointments": db.query(func.count(Appointment.id)).scalar() or 0,
+    }
+
+
+def _insert_batches(conn, model, rows) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            conn.execute(insert(model), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(model), batch)
+
+
+def seed(appointments: int, rng: random.Random) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count(Appointment.id))).scalar() >= appointments:
+            return
+    today = date.today()
+    with engine.begin() as conn:
+        _insert_batches(conn, User, (
+            {"id": i, "email": f"user{i}@example.com", "role": "doctor" if i <= DOCTORS else "patient"}
+            for i in range(1, DOCTORS + PATIENTS + 1)
+        ))
+        _insert_batches(conn, Doctor, (
+            {"id": i, "full_name": f"Doctor {i}", "phone": f"0170{i:07d}", "status": "pending" if i % 10 == 0 else "approved"}
+            for i in range(1, DOCTORS + 1)
+        ))
+        _insert_batches(conn, Patient, (
+            {"id": i, "full_name": f"Patient {i}", "phone": f"+880180{i:07d}", "serial_number": i}
+            for i in range(DOCTORS + 1, DOCTORS + PATIENTS + 1)
+        ))
+        _insert_batches(conn, Appointment, (
+            {
+                "doctor_id": rng.randint(1, DOCTORS),
+                "patient_id": rng.randint(DOCTORS + 1, DOCTORS + PATIENTS),
+                "appointment_date": today - timedelta(days=rng.randint(0, 730)),
+                "status": "completed",
+            }
+            for _ in range(appointments)
+        ))
+
+
+def measure(client: TestClient, total: int, params: dict) -> list:
+    timings = []
+    for _ in range(total):
+        started = time.perf_counter()
+        response = client.get("/api/v1/admin/dashboard", params=params)
+        timings.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+    return timings
+
+
+def main(total: int, appointments: int) -> None:
+    rng = random.Random(25)
+    started = time.perf_counter()
+    seed(appointments, rng)
+    print(f"seeded {appointments} appointments in {time.perf_counter() - started:.1f}s ({engine.dialect.name})")
+
+    counts = AdminService.get_dashboard_counts
+    maxsize = _counts_cache.maxsize
+    variants = {
+        "four COUNTs": (staticmethod(legacy_counts), {}, 0),
+        "one statement": (counts, {"exact": True}, 0),
+    }
+    if engine.dialect.name == "mysql":
+        variants["estimates"] = (counts, {}, 0)
+        variants["estimates+cache"] = (counts, {}, maxsize)
+    else:
+        print("(estimate variants need MySQL; set DATABASE_URL)")
+
+    print(f"{'variant':<16} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10}")
+    with TestClient(app) as client:
+        for label, (service, params, cache_size) in variants.items():
+            AdminService.get_dashboard_counts = service
+            _counts_cache.maxsize = cache_size
+            _counts_cache.clear()
+            measure(client, 2, params)
+            timings = sorted(measure(client, total, params))
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{label:<16} {statistics.median(timings):>10.2f} {p95:>10.2f} {statistics.mean(timings):>10.2f}")
+    AdminService.get_dashboard_counts = counts
+    _counts_cache.maxsize = maxsize
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--appointments", type=int, default=5_000_000)
+    args = parser.parse_args()
+    main(args.requests, args.appointments)
@@ -0,0 +1,116 @@
+"""
+Throughput of the API with the old BaseHTTPMiddleware AuthMiddleware vs the
+pure ASGI one, on /health and /api/v1/doctors/.
+
+    python -m benchmarks.bench_auth_middleware [--requests 500] [--concurrency 50]
+
+Runs in-process over httpx's ASGI transport against a throwaway SQLite
+database, so the numbers isolate framework/middleware overhead.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_middleware.db")
+os.environ.setdefault("EMAIL_OUTBOX_DISPATCH_IN_APP", "false")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from app import routers  # noqa: E402
+from app.core.security import create_access_token, verify_token  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.middleware.auth_middleware import AuthMiddleware  # noqa: E402
+from app.models import Doctor, User  # noqa: E402
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """The pre-ASGI implementation, kept here as the baseline"""
+
+    async def dispatch(self, request: Request, call_next):
+        request.state.user_id = None
+        request.state.user_role = None
+        auth_header = request.headers.get("authorization")
+        if auth_header:
+            token = auth_header
+            if auth_header.lower().startswith("bearer "):
+                token = auth_header.split(None, 1)[1]
+            try:
+                payload = verify_token(token)
+                request.state.user_id = payload.get("id")
+                request.state.user_role = payload.get("role")
+            except HTTPException:
+                pass
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        return response
+
+
+def build_app(middleware_cls) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware_cls)
+    for name in routers.__all__:
+        app.include_router(getattr(routers, name))
+
+    @app.get("/health")
+    def health_check():
+        return {"status": "healthy"}
+
+    return app
+
+
+def seed(doctors: int = 20) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if db.query(Doctor).count() == 0:
+        for i in range(1, doctors + 1):
+            db.add(User(id=i, email=f"doctor{i}@example.com", role="doctor"))
+        db.flush()
+        for i in range(1, doctors + 1):
+            db.add(Doctor(id=i, full_name=f"Doctor {i}", phone=f"0170000{i:04d}", status="approved"))
+        db.commit()
+    db.close()
+
+
+async def measure(app: FastAPI, path: str, total: int, concurrency: int, headers: dict) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get(path, headers=headers)
+                response.raise_for_status()
+
+        # warm up
+        await client.get(path, headers=headers)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+async def main(total: int, concurrency: int) -> None:
+    seed()
+    headers = {"Authorization": "Bearer " + create_access_token({"id": 1, "role": "doctor"})}
+    apps = {
+        "BaseHTTPMiddleware": build_app(LegacyAuthMiddleware),
+        "pure ASGI": build_app(AuthMiddleware),
+    }
+    print(f"{'path':<22} {'middleware':<20} {'req/s':>10}")
+    for path in ("/health", "/api/v1/doctors/"):
+        for label, app in apps.items():
+            rps = await measure(app, path, total, concurrency, headers)
+            print(f"{path:<22} {label:<20} {rps:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,125 @@
+"""
+Fuzzy medicine matching over a synthetic catalog: trigram index vs a full
+edit-distance scan.
+
+    python -m benchmarks.bench_medicine_fuzzy [--medicines 100000] [--queries 500]
+
+Builds the catalog in a throwaway SQLite database, loads it with
+MedicineIndex.build as the API does at startup, then looks up misspelled
+(1-2 random edits) catalog names and reports latency and recall@5.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_medicine_fuzzy.db")
+os.environ.setdefault("EMAIL_OUTBOX_DISPATCH_IN_APP", "false")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Medicine  # noqa: E402
+from app.repositories.medicine_index import MedicineIndex, bounded_levenshtein, max_edits  # noqa: E402
+from app.repositories.medicine_repo import normalize_medicine_text  # noqa: E402
+
+SYLLABLES = [
+    "a", "ab", "ace", "am", "ba", "bro", "ce", "ci", "cil", "clo", "cor", "da", "der", "dol",
+    "dro", "e", "en", "fen", "fex", "flu", "ga", "gli", "ka", "kor", "la", "lin", "lo", "lu",
+    "ma", "met", "mi", "mox", "na", "ne", "nex", "ni", "o", "pa", "pen", "pra", "pro", "ra",
+    "ri", "sec", "so", "ta", "tel", "tin", "to", "trin", "u", "va", "vi", "xa", "xi", "zi", "zol",
+]
+STRENGTHS = ["5mg", "10mg", "20mg", "40mg", "250mg", "500mg", "650mg", "1g"]
+FORMS = ["Tablet", "Capsule", "Syrup", "Injection", "Suspension"]
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def synthetic_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 4))).title()
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    chars = list(name.lower())
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        op = rng.choice(("drop", "swap", "replace", "insert"))
+        if op == "drop" and len(chars) > 3:
+            del chars[i]
+        elif op == "swap" and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        elif op == "insert":
+            chars.insert(i, rng.choice(LETTERS))
+        else:
+            chars[i] = rng.choice(LETTERS)
+    return "".join(chars)
+
+
+def seed(count: int, rng: random.Random) -> None:
+    Base.metadata.create_all(bind=engine)
+    rows = [
+        {"name": synthetic_name(rng), "strength": rng.choice(STRENGTHS), "form": rng.choice(FORMS)}
+        for _ in range(count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Medicine), rows)
+
+
+def full_scan(names: dict, query: str, limit: int = 5) -> list:
+    """Baseline: bounded edit distance against every catalog name"""
+    normalized = normalize_medicine_text(query)
+    bound = max_edits(normalized)
+    scored = []
+    for medicine_id, name in names.items():
+        distance = bounded_levenshtein(normalized, name, bound)
+        if distance <= bound:
+            scored.append((distance, medicine_id))
+    return [medicine_id for _, medicine_id in sorted(scored)[:limit]]
+
+
+def report(label: str, timings: list, hits: int, total: int) -> None:
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<16} {statistics.median(timings):>9.3f} {p95:>9.3f} {hits / total:>9.1%}")
+
+
+def main(medicines: int, queries: int, scan_queries: int) -> None:
+    rng = random.Random(15)
+    seed(medicines, rng)
+    index = MedicineIndex()
+    started = time.perf_counter()
+    index.build(SessionLocal)
+    print(f"indexed {medicines} medicines in {time.perf_counter() - started:.1f}s")
+
+    names = {m.id: m.normalized_name for m in index._entries.values()}
+    ids = list(names)
+    samples = []
+    for medicine_id in rng.sample(ids, queries):
+        samples.append((misspell(names[medicine_id], rng), names[medicine_id]))
+
+    print(f"{'method':<16} {'p50 ms':>9} {'p95 ms':>9} {'recall@5':>9}")
+    timings, hits = [], 0
+    for query, expected in samples:
+        started = time.perf_counter()
+        found = index.fuzzy(query, 5)
+        timings.append((time.perf_counter() - started) * 1000)
+        hits += any(m.normalized_name == expected for m, _ in found)
+    report("trigram index", timings, hits, len(samples))
+
+    timings, hits = [], 0
+    for query, expected in samples[:scan_queries]:
+        started = time.perf_counter()
+        found = full_scan(names, query)
+        timings.append((time.perf_counter() - started) * 1000)
+        hits += any(names[medicine_id] == expected for medicine_id in found)
+    report("full scan", timings, hits, min(scan_queries, len(samples)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--medicines", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--scan-queries", type=int, default=20, help="queries for the (slow) full-scan baseline")
+    args = parser.parse_args()
+    main(args.medicines, args.queries, args.scan_queries)
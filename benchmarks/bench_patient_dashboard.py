@@ -0,0 +1,112 @@
+"""
+Latency of GET /api/v1/patients/me/dashboard with the old three COUNT
+queries vs the single aggregate query, with and without the counts cache.
+
+    python -m benchmarks.bench_patient_dashboard [--requests 2000] [--patients 2000]
+
+Runs in-process over TestClient against a throwaway SQLite database; each
+request picks a random patient. Point DATABASE_URL at MySQL to include
+network round trips in the numbers.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_patient_dashboard.db")
+os.environ.setdefault("EMAIL_OUTBOX_DISPATCH_IN_APP", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.security import create_access_token  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Appointment, Doctor, Patient, Prescription, User  # noqa: E402
+from app.repositories.patient_repo import PatientRepository, dashboard_cache  # noqa: E402
+from app.services.patient_service import PatientService  # noqa: E402
+
+DOCTORS = 50
+
+
+def legacy_dashboard_stats(db, patient_id: int) -> dict:
+    """The pre-aggregation service method, kept here as the baseline"""
+    return {
+        "upcoming_appointments": PatientRepository.count_upcoming_appointments(db, patient_id),
+        "visited_doctors": PatientRepository.count_visited_doctors(db, patient_id),
+        "active_prescriptions": PatientRepository.count_active_prescriptions(db, patient_id),
+    }
+
+
+def seed(patients: int, visits: int, rng: random.Random) -> None:
+    Base.metadata.create_all(bind=engine)
+    today = date.today()
+    users = [{"id": i, "email": f"user{i}@example.com", "role": "doctor" if i <= DOCTORS else "patient"} for i in range(1, DOCTORS + patients + 1)]
+    doctors = [{"id": i, "full_name": f"Doctor {i}", "phone": f"0170{i:07d}", "status": "approved"} for i in range(1, DOCTORS + 1)]
+    patient_rows = [
+        {"id": i, "full_name": f"Patient {i}", "phone": f"+880180{i:07d}", "serial_number": i}
+        for i in range(DOCTORS + 1, DOCTORS + patients + 1)
+    ]
+    appointments, prescriptions = [], []
+    appointment_id = 0
+    for row in patient_rows:
+        for _ in range(rng.randint(0, visits * 2)):
+            appointment_id += 1
+            day = today + timedelta(days=rng.randint(-365, 30))
+            appointments.append({"id": appointment_id, "doctor_id": rng.randint(1, DOCTORS), "patient_id": row["id"], "appointment_date": day})
+            if day < today:
+                prescriptions.append({"appointment_id": appointment_id, "patient_id": row["id"]})
+    with engine.begin() as conn:
+        for model, rows in ((User, users), (Doctor, doctors), (Patient, patient_rows), (Appointment, appointments), (Prescription, prescriptions)):
+            if rows:
+                conn.execute(insert(model), rows)
+
+
+def measure(client: TestClient, tokens: list, total: int, rng: random.Random) -> list:
+    timings = []
+    for _ in range(total):
+        headers = {"Authorization": "Bearer " + rng.choice(tokens)}
+        started = time.perf_counter()
+        response = client.get("/api/v1/patients/me/dashboard", headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+    return timings
+
+
+def main(total: int, patients: int, visits: int) -> None:
+    rng = random.Random(18)
+    seed(patients, visits, rng)
+    # a small hot set, as on a real dashboard where users refresh their own page
+    tokens = [create_access_token({"id": i, "role": "patient"}) for i in rng.sample(range(DOCTORS + 1, DOCTORS + patients + 1), 50)]
+    aggregate = PatientService.get_dashboard_stats
+    maxsize = dashboard_cache.maxsize
+    variants = {
+        "three COUNTs": (staticmethod(legacy_dashboard_stats), 0),
+        "one aggregate": (aggregate, 0),
+        "aggregate+cache": (aggregate, maxsize),
+    }
+    print(f"{patients} patients, {total} requests per variant")
+    print(f"{'variant':<16} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    with TestClient(app) as client:
+        for label, (stats, cache_size) in variants.items():
+            PatientService.get_dashboard_stats = stats
+            dashboard_cache.maxsize = cache_size
+            dashboard_cache.clear()
+            measure(client, tokens, 50, rng)
+            timings = sorted(measure(client, tokens, total, rng))
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{label:<16} {statistics.median(timings):>8.2f} {p95:>8.2f} {statistics.mean(timings):>8.2f}")
+    PatientService.get_dashboard_stats = aggregate
+    dashboard_cache.maxsize = maxsize
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--visits", type=int, default=20, help="average appointments per patient")
+    args = parser.parse_args()
+    main(args.requests, args.patients, args.visits)
@@ -0,0 +1,130 @@
+"""
+Latency of creating a 10-drug prescription with the old per-row commit flow
+vs the single-transaction bulk insert.
+
+    python -m benchmarks.bench_prescription_create [--runs 200] [--drugs 10]
+
+Every prescription uses new inline medicines (the worst case for the old
+flow: one commit per medicine) against a throwaway SQLite database. Point
+DATABASE_URL at MySQL to include network round trips in the numbers.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_prescription.db")
+os.environ.setdefault("EMAIL_OUTBOX_DISPATCH_IN_APP", "false")
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Appointment, Doctor, Medicine, Patient, PrescriptionMedicine, Prescription, User  # noqa: E402
+from app.repositories.appointment_repo import AppointmentRepository  # noqa: E402
+from app.repositories.prescription_repo import PrescriptionRepository  # noqa: E402
+from app.schemas import MedicineCreate, PrescriptionCreate, PrescriptionMedicineCreate  # noqa: E402
+
+
+def legacy_create_prescription(db, prescription: PrescriptionCreate):
+    """The pre-batching service + repository flow, kept here as the baseline"""
+    AppointmentRepository.update_appointment(db, prescription.appointment_id, {"status": "completed"})
+    db_prescription = Prescription(
+        appointment_id=prescription.appointment_id,
+        patient_id=prescription.patient_id,
+        notes=prescription.notes,
+    )
+    db.add(db_prescription)
+    db.commit()
+    db.refresh(db_prescription)
+    for med in prescription.medicines:
+        m = med.medicine
+        db_med = Medicine(name=m.name, strength=m.strength, form=m.form, manufacturer=m.manufacturer)
+        db.add(db_med)
+        db.commit()
+        db.refresh(db_med)
+        db.add(PrescriptionMedicine(
+            prescription_id=db_prescription.id,
+            medicine_id=db_med.id,
+            dosage=med.dosage,
+            duration=med.duration,
+            instruction=med.instruction,
+        ))
+    db.commit()
+    db.refresh(db_prescription)
+    return db_prescription
+
+
+def seed(patients: int) -> list:
+    """One doctor and one appointment per patient, so no run hits the same-day update path"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(id=1, email="doctor@example.com", role="doctor"))
+    db.flush()
+    db.add(Doctor(id=1, full_name="Doctor", phone="01700000000", status="approved"))
+    for i in range(2, patients + 2):
+        db.add(User(id=i, email=f"patient{i}@example.com", role="patient"))
+    db.flush()
+    appointments = []
+    for i in range(2, patients + 2):
+        db.add(Patient(id=i, full_name=f"Patient {i}", phone=f"0180{i:07d}"))
+        appointment = Appointment(doctor_id=1, patient_id=i, appointment_date=date.today())
+        db.add(appointment)
+        appointments.append(appointment)
+    db.commit()
+    ids = [(a.id, a.patient_id) for a in appointments]
+    db.close()
+    return ids
+
+
+def payload(appointment_id: int, patient_id: int, drugs: int) -> PrescriptionCreate:
+    return PrescriptionCreate(
+        appointment_id=appointment_id,
+        patient_id=patient_id,
+        notes="bench",
+        medicines=[
+            PrescriptionMedicineCreate(
+                medicine=MedicineCreate(name=f"Drug {n}", strength="500mg", form="tablet"),
+                dosage="1+0+1",
+                duration="7 days",
+            )
+            for n in range(drugs)
+        ],
+    )
+
+
+def measure(create, appointments: list, drugs: int) -> list:
+    timings = []
+    for appointment_id, patient_id in appointments:
+        data = payload(appointment_id, patient_id, drugs)
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            create(db, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+    return timings
+
+
+def main(runs: int, drugs: int) -> None:
+    appointments = seed(runs * 2)
+    flows = {
+        "per-row commits": legacy_create_prescription,
+        "single transaction": lambda db, data: PrescriptionRepository.create_prescription(
+            db, data, appointment=db.get(Appointment, data.appointment_id)
+        ),
+    }
+    print(f"{drugs}-drug prescription, {runs} runs")
+    print(f"{'flow':<20} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    for i, (label, create) in enumerate(flows.items()):
+        timings = sorted(measure(create, appointments[i * runs:(i + 1) * runs], drugs))
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{label:<20} {statistics.median(timings):>8.2f} {p95:>8.2f} {statistics.mean(timings):>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--drugs", type=int, default=10)
+    args = parser.parse_args()
+    main(args.runs, args.drugs)
@@ -9,7 +9,8 @@ CREATE TABLE `users` (
   `password` VARCHAR(255),
   `role` ENUM('doctor','patient','admin') NOT NULL,
   `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  PRIMARY KEY (`id`)
+  PRIMARY KEY (`id`),
+  KEY `ix_users_created_at` (`created_at`)
 );
 
 -- ---------------------
@@ -30,10 +31,11 @@ CREATE TABLE `doctors` (
   `phone` VARCHAR(20) NOT NULL UNIQUE,
   `chamber` VARCHAR(256),
   `bmdc_number` VARCHAR(20) UNIQUE,
-  `experience` VARCHAR(20),
-  `consultation_fee` VARCHAR(20),
+  `experience` INT,
+  `consultation_fee` DECIMAL(10,2),
   `status` ENUM('pending','approved','rejected','blocked') DEFAULT 'pending',
   PRIMARY KEY (`id`),
+  KEY `ix_doctors_status_fee` (`status`, `consultation_fee`),
   FOREIGN KEY (`id`) REFERENCES `users` (`id`)
 );
 
@@ -46,10 +48,13 @@ CREATE TABLE `patients` (
   `age` INT,
   `gender` VARCHAR(20),
   `phone` VARCHAR(20),
+  `phone_reversed` VARCHAR(20),
   `blood_group_id` INT,
   `address` VARCHAR(256),
   `serial_number` INT UNIQUE,
   PRIMARY KEY (`id`),
+  KEY `ix_patients_phone` (`phone`),
+  KEY `ix_patients_phone_reversed` (`phone_reversed`),
   FOREIGN KEY (`id`) REFERENCES `users` (`id`),
   FOREIGN KEY (`blood_group_id`) REFERENCES `blood_groups` (`id`)
 );
@@ -89,6 +94,7 @@ CREATE TABLE `doctor_specializations` (
   `doctor_id` INT NOT NULL,
   `specialization_id` INT NOT NULL,
   PRIMARY KEY (`doctor_id`, `specialization_id`),
+  KEY `ix_doctor_specializations_specialization` (`specialization_id`, `doctor_id`),
   FOREIGN KEY (`doctor_id`) REFERENCES `doctors` (`id`),
   FOREIGN KEY (`specialization_id`) REFERENCES `specializations` (`id`)
 );
@@ -100,6 +106,7 @@ CREATE TABLE `doctor_institutes` (
   `doctor_id` INT NOT NULL,
   `institute_id` INT NOT NULL,
   PRIMARY KEY (`doctor_id`, `institute_id`),
+  KEY `ix_doctor_institutes_institute` (`institute_id`, `doctor_id`),
   FOREIGN KEY (`doctor_id`) REFERENCES `doctors` (`id`),
   FOREIGN KEY (`institute_id`) REFERENCES `institutes` (`id`)
 );
@@ -111,6 +118,7 @@ CREATE TABLE `doctor_qualifications` (
   `doctor_id` INT NOT NULL,
   `qualification_id` INT NOT NULL,
   PRIMARY KEY (`doctor_id`, `qualification_id`),
+  KEY `ix_doctor_qualifications_qualification` (`qualification_id`, `doctor_id`),
   FOREIGN KEY (`doctor_id`) REFERENCES `doctors` (`id`),
   FOREIGN KEY (`qualification_id`) REFERENCES `qualifications` (`id`)
 );
@@ -127,6 +135,7 @@ CREATE TABLE `doctor_schedules` (
   `max_patients` INT,
   `duration_per_appointment` INT DEFAULT 30,
   PRIMARY KEY (`id`),
+  KEY `ix_doctor_schedules_doctor_id` (`doctor_id`),
   FOREIGN KEY (`doctor_id`) REFERENCES `doctors` (`id`)
 );
 
@@ -143,6 +152,11 @@ CREATE TABLE `appointments` (
   `status` ENUM('pending','confirmed','completed','cancelled') DEFAULT 'pending',
   `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
+  KEY `ix_appointments_doctor_date_patient` (`doctor_id`, `appointment_date`, `patient_id`),
+  KEY `ix_appointments_patient_date` (`patient_id`, `appointment_date`, `doctor_id`),
+  KEY `ix_appointments_schedule_date` (`schedule_id`, `appointment_date`, `appointment_time`),
+  KEY `ix_appointments_status_date_doctor` (`status`, `appointment_date`, `doctor_id`),
+  KEY `ix_appointments_date` (`appointment_date`),
   FOREIGN KEY (`doctor_id`) REFERENCES `doctors` (`id`),
   FOREIGN KEY (`patient_id`) REFERENCES `patients` (`id`),
   FOREIGN KEY (`schedule_id`) REFERENCES `doctor_schedules` (`id`)
@@ -159,6 +173,8 @@ CREATE TABLE `prescriptions` (
   `document_path` VARCHAR(255),
   `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
+  KEY `ix_prescriptions_patient_created` (`patient_id`, `created_at`),
+  KEY `ix_prescriptions_created_at` (`created_at`),
   FOREIGN KEY (`appointment_id`) REFERENCES `appointments` (`id`),
   FOREIGN KEY (`patient_id`) REFERENCES `patients` (`id`)
 );
@@ -172,7 +188,10 @@ CREATE TABLE `medicines` (
   `strength` VARCHAR(50),
   `form` VARCHAR(50),
   `manufacturer` VARCHAR(150),
-  PRIMARY KEY (`id`)
+  `canonical_key` VARCHAR(40),
+  PRIMARY KEY (`id`),
+  KEY `ix_medicines_name` (`name`),
+  UNIQUE KEY `uq_medicines_canonical_key` (`canonical_key`)
 );
 
 -- ---------------------
@@ -186,10 +205,72 @@ CREATE TABLE `prescription_medicines` (
   `duration` VARCHAR(50),
   `instruction` VARCHAR(255),
   PRIMARY KEY (`id`),
+  KEY `ix_prescription_medicines_prescription_id` (`prescription_id`),
+  KEY `ix_prescription_medicines_medicine_id` (`medicine_id`),
   FOREIGN KEY (`prescription_id`) REFERENCES `prescriptions` (`id`),
   FOREIGN KEY (`medicine_id`) REFERENCES `medicines` (`id`)
 );
 
+-- ---------------------
+-- Table: email_outbox
+-- ---------------------
+CREATE TABLE `email_outbox` (
+  `id` INT NOT NULL AUTO_INCREMENT,
+  `to_email` VARCHAR(100) NOT NULL,
+  `subject` VARCHAR(255) NOT NULL,
+  `body` TEXT,
+  `status` ENUM('pending','sent','failed') NOT NULL DEFAULT 'pending',
+  `attempts` INT NOT NULL DEFAULT 0,
+  `next_attempt_at` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  `last_error` VARCHAR(500),
+  `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  `sent_at` TIMESTAMP NULL,
+  PRIMARY KEY (`id`),
+  KEY `ix_email_outbox_status_next_attempt` (`status`, `next_attempt_at`)
+);
+
+-- ---------------------
+-- Table: serial_sequences
+-- ---------------------
+CREATE TABLE `serial_sequences` (
+  `name` VARCHAR(50) NOT NULL,
+  `next_value` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`name`)
+);
+
+-- ---------------------
+-- Analytics rollups (filled by `python -m app.jobs.rollups`)
+-- ---------------------
+CREATE TABLE `daily_appointment_counts` (
+  `day` DATE NOT NULL,
+  `doctor_id` INT NOT NULL,
+  `status` VARCHAR(20) NOT NULL,
+  `count` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`day`, `doctor_id`, `status`),
+  KEY `ix_daily_appointment_counts_status_doctor` (`status`, `doctor_id`, `day`, `count`)
+);
+
+CREATE TABLE `daily_medicine_usage` (
+  `day` DATE NOT NULL,
+  `medicine_id` INT NOT NULL,
+  `count` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`day`, `medicine_id`),
+  KEY `ix_daily_medicine_usage_medicine` (`medicine_id`, `day`, `count`)
+);
+
+CREATE TABLE `daily_new_patients` (
+  `day` DATE NOT NULL,
+  `count` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`day`)
+);
+
+CREATE TABLE `rollup_watermarks` (
+  `name` VARCHAR(50) NOT NULL,
+  `through_day` DATE,
+  `refreshed_at` TIMESTAMP NULL,
+  PRIMARY KEY (`name`)
+);
+
 INSERT INTO medicines (name, strength, form, manufacturer) VALUES
 ('Paracetamol', '500mg', 'Tablet', 'Eskayef'),
 ('Amoxicillin', '250mg', 'Capsule', 'Square Pharmaceuticals'),